@@ -1,4 +1,3 @@
-import json
 from urllib.parse import urljoin
 import re
 import os
@@ -7,6 +6,14 @@ import duckdb
 import pandas as pd
 import requests
 import streamlit as st
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from e10_auth import forget_auth, require_auth
+from e10_governor import close_connections, discard_spill, session_governor, unspill
+from e10_json import dumps_bytes, response_json
+from e10_resilience import send
+from e10_store import engine
 
 # ---------- Page config ----------
 st.set_page_config(page_title="ARMS Performance Entity Viewer", layout="wide")
@@ -107,7 +114,7 @@ def add_player_name_col(df: pd.DataFrame) -> pd.DataFrame:
 
 def ensure_duck(df: pd.DataFrame):
     if "duck" not in st.session_state or st.session_state.get("duck_closed", False):
-        st.session_state.duck = duckdb.connect(database=":memory:")
+        st.session_state.duck = engine().session_cursor()
         st.session_state.duck_closed = False
     con: duckdb.DuckDBPyConnection = st.session_state.duck
     try:
@@ -121,11 +128,15 @@ def quote_ident(col: str) -> str:
     return '"' + col.replace('"', '""') + '"'
 
 def reset_state():
+    close_connections(st.session_state)
+    ctx = get_script_run_ctx()
+    if ctx:
+        discard_spill(ctx.session_id)
     for k in (
         "url", "data", "df",
         "cols_to_show", "last_nonempty_cols",
         "ct_filter", "player_ms", "player_free",
-        "player_like", "player_like_ms"
+        "player_like", "player_like_ms", "evicted", "duck_closed",
     ):
         st.session_state.pop(k, None)
 
@@ -147,6 +158,22 @@ CLIENTS = [
     "solihullmoors2007.edge10online.co.uk",
 ]
 
+# ---------- Session governor ----------
+# Idle sessions are spilled to disk and closed; they reload on their next rerun
+_ctx = get_script_run_ctx()
+if _ctx:
+    # Sessions the runtime no longer has are unregistered on the next sweep
+    governor = session_governor(
+        is_active=lambda sid: not runtime.exists() or runtime.get_instance().is_active_session(sid))
+    governor.touch(_ctx.session_id, _ctx.session_state, id(st.session_state.get("df")))
+    if st.session_state.pop("evicted", None):
+        restored = unspill(_ctx.session_id)
+        if restored:
+            for k, v in restored.items():
+                st.session_state[k] = v
+        else:
+            st.info("This session's data was released to free server memory; fetch again to continue.")
+
 # ---------- Sidebar ----------
 with st.sidebar:
     logo_path = "ARMS_Performance_Logo_White_Alt.png"
@@ -211,22 +238,27 @@ if run:
     prog = st.progress(0, text="Starting")
     try:
         with st.status("Fetching data...", expanded=True) as status:
+            status.write("Checking credentials")
+            require_auth(site, user, pwd)
             status.write("Sending request")
             prog.progress(30, text="Sending request")
-            r = requests.get(
+            r = send(
+                "GET",
                 url,
                 auth=requests.auth.HTTPBasicAuth(user, pwd),
                 headers={"Accept": "application/json"},
                 timeout=(15,180),
             )
             if r.status_code >= 400:
+                if r.status_code == 401:
+                    forget_auth(site, user, pwd)
                 status.update(label=f"HTTP {r.status_code}", state="error")
                 st.error(f"HTTP {r.status_code}: {r.text[:500]}")
                 st.stop()
 
             status.write("Parsing JSON")
             prog.progress(60, text="Parsing JSON")
-            data = r.json()
+            data = response_json(r)
 
             status.write("Normalizing table")
             prog.progress(85, text="Normalizing table")
@@ -372,4 +404,4 @@ if "df" in st.session_state:
     with c2:
         st.download_button("Download filtered full table CSV", df_filt.to_csv(index=False).encode("utf-8"), "api_data_filtered.csv", "text/csv")
     with c3:
-        st.download_button("Download raw JSON", json.dumps(st.session_state.data, indent=2).encode("utf-8"), "api_raw.json", "application/json")
+        st.download_button("Download raw JSON", dumps_bytes(st.session_state.data, indent=True), "api_raw.json", "application/json")
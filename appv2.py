@@ -1,13 +1,51 @@
-import json
-from urllib.parse import urljoin
+import hashlib
 import re
 import os
+import tempfile
 import datetime as dt
+import time
+from collections import deque
 
 import duckdb
 import pandas as pd
 import requests
 import streamlit as st
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from e10_bulk import bulk_update, patch_diff
+from e10_cache import LRUCache, frame_nbytes
+from e10_catalog import (
+    build_catalog, delete_column_set, load_column_sets, profile_table, save_column_set, search_catalog,
+    top_values, update_catalog,
+)
+from e10_outbox import (
+    OUTBOX_POLL_SECONDS, TERMINAL, cancel, enqueue_create, get_write, host_of, list_writes, new_key,
+    outbox_worker, retry_now, set_credentials,
+)
+from e10_governor import close_connections, discard_spill, session_governor, unspill
+from e10_json import dumps, dumps_bytes, loads
+from e10_auth import AuthRejected, cached_auth, forget_auth, probe, require_auth
+from e10_api import COMPOSITE_ENDPOINTS, build_url, fetch_many, get_raw, transfer_summary
+from e10_resilience import breaker_states
+from e10_schema import (
+    DTYPES, SWAGGER_PATHS, apply_schema, infer_schema, ingest, load_schema, save_schema,
+    schema_from_swagger,
+)
+from e10_detail import DETAIL_TTL_SECONDS, DETAIL_WORKERS, detail_frame, fetch_details, merge_details, remember_detail
+from e10_console import console_connection, explain_analyze, export_csv, normalize_sql, run_query
+from e10_normalize import NORMALIZE_WORKERS, PARALLEL_MIN_RECORDS, normalize_records
+from e10_search import index_people, indexed_hosts, refresh_hosts, search_people, upsert_people
+from e10_store import (
+    data_path, diff_snapshots, engine, list_snapshots, load_dataset, load_snapshot, save_snapshot,
+    store_dataset, stored_table,
+)
+from e10_tables import (
+    CHILD_PREFIX, PATH_SAMPLE, add_player_name_col, build_related, case_insensitive_col, child_table_name,
+    column_paths, entity_ids_in_groups, entity_ids_matching, explode_nested,
+    group_names_by_entity, lazy_columns, materialize_tables, quote_ident,
+    records_frame, records_of, upsert_children, upsert_raw_records, upsert_rows,
+)
 
 # ---------- Page config ----------
 st.set_page_config(page_title="ARMS Performance Entity Viewer", layout="wide")
@@ -75,12 +113,6 @@ st.markdown(
 )
 
 # ---------- Helpers ----------
-def build_url(site: str, endpoint: str) -> str:
-    site = (site or "").strip().rstrip("/")
-    if not site.startswith("http"):
-        site = "https://" + site
-    return urljoin(site + "/", endpoint.lstrip("/"))
-
 def to_df(payload):
     if isinstance(payload, list):
         return pd.json_normalize(payload)
@@ -92,44 +124,401 @@ def to_df(payload):
         return pd.json_normalize(payload)
     return pd.DataFrame()
 
-def add_player_name_col(df: pd.DataFrame) -> pd.DataFrame:
-    f = next((c for c in df.columns if c.lower() == "firstname"), None)
-    l = next((c for c in df.columns if c.lower() == "lastname"), None)
-    if f and l:
-        pn = (
-            df[f].astype(str).fillna("").str.strip()
-            + " "
-            + df[l].astype(str).fillna("").str.strip()
-        ).str.replace(r"\s+", " ", regex=True).str.strip()
-        if "Player Name" in df.columns:
-            df = df.drop(columns=["Player Name"])
-        df.insert(0, "Player Name", pn)
-    return df
-
 def ensure_duck(df: pd.DataFrame):
     if "duck" not in st.session_state or st.session_state.get("duck_closed", False):
-        st.session_state.duck = duckdb.connect(database=":memory:")
+        # Private cursor on the process-wide engine: api_data and temp tables stay per session
+        st.session_state.duck = engine().session_cursor()
         st.session_state.duck_closed = False
+        # Related tables from a composite fetch live in the connection itself
+        materialize_tables(st.session_state.duck, st.session_state.get("related", {}))
     con: duckdb.DuckDBPyConnection = st.session_state.duck
+    con.execute("DROP VIEW IF EXISTS api_data")
+    table = stored_table(df)
+    if table:
+        # The shared store holds this exact frame; query its table instead of the pandas copy
+        con.execute(f"CREATE TEMP VIEW api_data AS SELECT * FROM {quote_ident(table)}")
+    else:
+        con.register("api_data", df)
+    return con
+
+def drop_duck():
+    """Close the session's DuckDB connection/cursor (and its temp tables)."""
+    con = st.session_state.pop("duck", None)
+    if con is not None:
+        try:
+            con.close()
+        except Exception:
+            pass
+
+def bump_version():
+    """Mark the session dataset as changed (invalidates version-keyed caches)."""
+    st.session_state.df_version = st.session_state.get("df_version", 0) + 1
+    track_session()
+
+# Full-result CSV exports older than this are removed when the next one is written
+EXPORT_TTL_SECONDS = 3600
+
+def csv_export(con: duckdb.DuckDBPyConnection, sql: str) -> str:
+    """Path of the full-result CSV, written once per (dataset version, query)."""
+    cache: LRUCache = st.session_state.sql_cache
+    key = (st.session_state.get("df_version"), normalize_sql(sql), "csv")
+    path = cache.get(key)
+    if path is None or not os.path.exists(path):
+        folder = os.path.dirname(data_path("exports", "_"))
+        cutoff = time.time() - EXPORT_TTL_SECONDS
+        for name in os.listdir(folder):
+            try:
+                if os.path.getmtime(os.path.join(folder, name)) < cutoff:
+                    os.remove(os.path.join(folder, name))
+            except OSError:
+                pass
+        fd, path = tempfile.mkstemp(suffix=".csv", dir=folder)
+        os.close(fd)
+        export_csv(con, sql, path)
+        cache.put(key, path)
+    return path
+
+def sql_console_con() -> duckdb.DuckDBPyConnection:
+    """Sandboxed console connection holding the current dataset version."""
+    if "sql_con" not in st.session_state:
+        st.session_state.sql_con = console_connection()
+        st.session_state.sql_con_version = None
+    con = st.session_state.sql_con
+    if st.session_state.sql_con_version != st.session_state.get("df_version"):
+        tables = {"api_data": st.session_state.df, **st.session_state.get("related", {})}
+        for (name,) in con.execute("SELECT view_name FROM duckdb_views() WHERE NOT internal").fetchall():
+            con.unregister(name)
+        for name, frame in tables.items():
+            con.register(name, frame)
+        st.session_state.sql_con_version = st.session_state.get("df_version")
+    return con
+
+def filter_view(df_base: pd.DataFrame, ct_col: str | None, like_opts: list[str]) -> tuple[pd.DataFrame, list[str]]:
+    """Apply the VIEW tab filters; returns (filtered frame, pasted names not found)."""
+    df_filt = df_base
+    if ct_col and st.session_state.get("ct_filter"):
+        df_filt = df_filt[df_filt[ct_col].astype(str).isin(st.session_state.ct_filter)]
+
+    id_col = case_insensitive_col(df_base, "id")
+    if id_col and st.session_state.get("group_filter"):
+        in_groups = entity_ids_in_groups(ensure_duck(df_base), st.session_state.group_filter)
+        df_filt = df_filt[df_filt[id_col].astype(str).isin(in_groups)]
+    if id_col and st.session_state.get("nested_table") and st.session_state.get("nested_vals"):
+        child = st.session_state.related[st.session_state.nested_table]
+        value_cols = [c for c in child.columns if c not in ("entityId", "ordinal")]
+        nested_col = st.session_state.get("nested_col") if len(value_cols) > 1 else value_cols[0]
+        matched = entity_ids_matching(ensure_duck(df_base), st.session_state.nested_table, nested_col, st.session_state.nested_vals)
+        df_filt = df_filt[df_filt[id_col].astype(str).isin(matched)]
+
+    allowed = set(st.session_state.get("player_ms", []) or [])
+    like_query_present = bool(st.session_state.get("player_like"))
+    like_selected = set(st.session_state.get("player_like_ms", []) or [])
+    if like_query_present:
+        allowed |= (like_selected if like_selected else set(like_opts))
+
+    missing = []
+    pasted = st.session_state.get("player_free", "") or ""
+    if pasted:
+        pasted_set = {x.strip() for x in re.split(r"[,\n]", pasted) if x.strip()}
+        existing = set(df_base["Player Name"].dropna().unique().tolist())
+        missing = sorted([p for p in pasted_set if p not in existing])
+        found = pasted_set - set(missing)
+        allowed |= found
+
+    if "Player Name" in df_base.columns and allowed:
+        df_filt = df_filt[df_filt["Player Name"].isin(allowed)]
+
+    prof_col = st.session_state.get("prof_col")
+    prof_vals = set(st.session_state.get("prof_vals") or [])
+    if prof_col in df_filt.columns and prof_vals:
+        col = df_filt[prof_col]
+        # Match DuckDB's VARCHAR rendering of typed columns
+        if pd.api.types.is_datetime64_any_dtype(col):
+            text = col.dt.strftime("%Y-%m-%d %H:%M:%S")
+        elif pd.api.types.is_bool_dtype(col):
+            text = col.astype(str).str.lower()
+        else:
+            text = col.astype(str)
+        mask = text.isin(prof_vals - {NULL_TOKEN, BLANK_TOKEN}) & col.notna()
+        if NULL_TOKEN in prof_vals:
+            mask |= col.isna()
+        if BLANK_TOKEN in prof_vals:
+            mask |= col.notna() & (text.str.strip() == "")
+        df_filt = df_filt[mask]
+    return df_filt, missing
+
+def view_state_key(like_tokens: list[str], cols_render: list[str]) -> tuple:
+    """Everything the rendered VIEW table depends on."""
+    ss = st.session_state
+    pasted = ss.get("player_free", "") or ""
+    return (
+        ss.get("df_version"),
+        tuple(sorted(ss.get("ct_filter") or [])),
+        tuple(sorted(ss.get("group_filter") or [])),
+        (ss.get("nested_table"), ss.get("nested_col"), tuple(sorted(ss.get("nested_vals") or []))),
+        tuple(sorted(ss.get("player_ms") or [])),
+        (bool(ss.get("player_like")), tuple(like_tokens), tuple(sorted(ss.get("player_like_ms") or []))),
+        frozenset(x.strip() for x in re.split(r"[,\n]", pasted) if x.strip()),
+        (ss.get("prof_col"), tuple(sorted(ss.get("prof_vals") or []))),
+        tuple(cols_render),
+    )
+
+def facet_options(df: pd.DataFrame, col: str) -> list[str]:
+    """Sorted distinct values of a filter column, cached per dataset version."""
+    version = st.session_state.get("df_version")
+    facets = {k: v for k, v in st.session_state.get("facets", {}).items() if k[0] == version}
+    if (version, col) not in facets:
+        facets[(version, col)] = sorted(df[col].dropna().astype(str).unique().tolist())
+    st.session_state.facets = facets
+    return facets[(version, col)]
+
+def get_dup_index(df: pd.DataFrame) -> dict:
+    version, index = st.session_state.get("dup_index", (None, None))
+    if index is None or version != st.session_state.get("df_version"):
+        index = build_dup_index(df)
+        st.session_state.dup_index = (st.session_state.get("df_version"), index)
+    return index
+
+def holds_entities_of(base_site: str) -> bool:
+    """True when the session dataset is the entity list of `base_site`."""
+    src = st.session_state.get("source") or {}
+    endpoint = (src.get("endpoint") or "").strip("/").lower()
+    return (
+        "df" in st.session_state
+        and (src.get("site") or "").strip().lower() == (base_site or "").strip().lower()
+        and endpoint in ("api/entity", "composite")
+    )
+
+def index_records(records: list[dict], host: str):
+    """Keep the global search index current after writes; index problems never block a write."""
     try:
-        con.unregister("api_data")
-    except Exception:
+        upsert_people(pd.json_normalize(records), host)
+    except duckdb.Error:
         pass
-    con.register("api_data", df)
-    return con
 
-def quote_ident(col: str) -> str:
-    return '"' + col.replace('"', '""') + '"'
+def upsert_records(records: list[dict]) -> bool:
+    """Write created/read-back subjects straight into the session dataset.
+
+    One pass for the whole batch: updates the frame, child and link tables,
+    DuckDB, the facet cache and the duplicate index, and bumps the dataset
+    version; no refetch needed. A subject listed twice keeps its last record.
+    """
+    df = st.session_state.df
+    id_col = case_insensitive_col(df, "id")
+    records = [r for r in records if isinstance(r, dict)]
+    if not id_col or not records:
+        return False
+    # One record per id, so the frame and the lazy raw records stay the same length
+    records = list({str(next((v for k, v in r.items() if k.lower() == "id"), None)): r for r in records}.values())
+    lazy = st.session_state.get("lazy")
+    if lazy:
+        paths = {**lazy["paths"], **column_paths(records)}
+        new = records_frame(records, paths, [c for c in df.columns if c in paths])
+        new, children = explode_nested(add_player_name_col(new), case_insensitive_col(new, "id"))
+        if st.session_state.get("schema_endpoint"):
+            new, _ = ingest(new, st.session_state.schema_endpoint, register=False)
+    else:
+        new, children, _ = normalize(records, endpoint=st.session_state.get("schema_endpoint"), register=False)
+    new_id_col = case_insensitive_col(new, "id")
+    if new.empty or not new_id_col or new[new_id_col].isna().any():
+        return False
+    new = new.rename(columns={new_id_col: id_col})
+    new_ids = set(new[id_col].astype(str))
+    replaced = bool(df[id_col].astype(str).isin(new_ids).any())
+
+    merged = upsert_rows(df, new, id_col)
+    if lazy:
+        # New list in the frame's new row order; the raw payload stays as fetched
+        lazy["records"] = upsert_raw_records(lazy["records"], records, id_col)
+        lazy["paths"] = paths
+    related = st.session_state.get("related", {})
+    child_tables = upsert_children({k: v for k, v in related.items() if k.startswith(CHILD_PREFIX)}, children, new_ids)
+    related = build_related(merged, child_tables, related.get("groups"), related.get("templates"))
+    st.session_state.related = related
+    con = ensure_duck(merged)
+    materialize_tables(con, {k: v for k, v in related.items() if k.startswith(CHILD_PREFIX) or k == "entity_groups"})
+    merged = add_group_names(merged, con)
+
+    old_version = st.session_state.get("df_version")
+    st.session_state.df = merged
+    bump_version()
+    version = st.session_state.df_version
+    if replaced:
+        st.session_state.pop("facets", None)
+        st.session_state.pop("dup_index", None)
+        return True
+    added = merged.loc[merged.index[len(df):]]
+    st.session_state.facets = {
+        (version, col): sorted(set(opts) | set(added[col].dropna().astype(str))) if col in added.columns else opts
+        for (v, col), opts in st.session_state.get("facets", {}).items() if v == old_version
+    }
+    dup_version, index = st.session_state.get("dup_index", (None, None))
+    if index is not None and dup_version == old_version:
+        for key, labels in build_dup_index(added).items():
+            index.setdefault(key, []).extend(labels)
+        st.session_state.dup_index = (version, index)
+    return True
+
+def apply_outbox_results():
+    """Write-through for this session's queued creates that finished since the last rerun."""
+    applied = st.session_state.setdefault("outbox_applied", set())
+    created = []
+    for key in st.session_state.get("outbox_keys") or []:
+        row = None if key in applied else get_write(key)
+        if row is None or row["status"] not in TERMINAL:
+            continue
+        applied.add(key)
+        name = f"{row['payload'].get('firstName', '')} {row['payload'].get('lastName', '')}".strip()
+        if row["status"] != "done":
+            st.toast(f"{name}: {row['status']} ({row['last_error']})")
+            continue
+        st.toast(f"Created {name} ({row['result_id']})")
+        record = row["response"]
+        if not isinstance(record, dict) or not record.get("id"):
+            continue
+        index_records([record], row["site"])
+        if row["user"] == user:
+            remember_detail(row["site"], requests.auth.HTTPBasicAuth(user, pwd), record)
+        if holds_entities_of(row["site"]):
+            created.append(record)
+    if created:
+        upsert_records(created)
+
+def hand_over_credentials(base_site: str, verdict: bool | None):
+    """Give this login to the outbox worker; only a confirmed one replaces credentials it already holds."""
+    if verdict is not False:
+        set_credentials(base_site, user, pwd, replace=verdict is True)
+
+
+def outbox_panel(base_site: str):
+    """Queued creates for this site; refreshes itself while this session has writes in flight."""
+    rows = list_writes(base_site) if base_site else []
+    if not rows:
+        return
+    mine = set(st.session_state.get("outbox_keys") or [])
+    if user and pwd and any(r["status"] == "pending" and r["user"] == user for r in rows):
+        # Resume writes queued before a restart or in an earlier session
+        try:
+            verdict = probe(base_site, user, pwd)["ok"]
+        except requests.RequestException:
+            verdict = None
+        hand_over_credentials(base_site, verdict)
+        outbox_worker().wake()
+    in_flight = any(r["status"] not in TERMINAL for r in rows if r["key"] in mine)
+
+    def render():
+        rows = list_writes(base_site)
+        applied = st.session_state.get("outbox_applied", set())
+        if any(r["key"] in mine and r["status"] in TERMINAL and r["key"] not in applied for r in rows):
+            st.rerun()  # full rerun so VIEW picks up the new subject
+        st.subheader("Outbox")
+        st.dataframe(pd.DataFrame([{
+            "key": r["key"][:8],
+            "name": f"{r['payload'].get('firstName', '')} {r['payload'].get('lastName', '')}".strip(),
+            "user": r["user"],
+            "status": r["status"],
+            "attempts": r["attempts"],
+            "subject id": r["result_id"],
+            "last error": r["last_error"],
+            "queued": dt.datetime.fromtimestamp(r["created_at"]).strftime("%Y-%m-%d %H:%M:%S"),
+        } for r in rows]), use_container_width=True, hide_index=True)
+        actionable = {r["key"]: r for r in rows if r["status"] in ("pending", "failed", "review")}
+        if not actionable:
+            return
+        c1, c2, c3, c4 = st.columns([2, 1, 1, 1])
+        with c1:
+            pick = st.selectbox(
+                "Queued write", options=list(actionable), key="outbox_pick",
+                format_func=lambda k: f"{k[:8]}  {actionable[k]['status']}",
+            )
+        with c2:
+            if st.button("Retry now", key="outbox_retry"):
+                retry_now(pick)
+                st.rerun(scope="fragment")
+        with c3:
+            if actionable[pick]["status"] == "review" and st.button("Send anyway", key="outbox_force",
+                                                                     help="Checked on the site: the subject was not created"):
+                retry_now(pick, skip_reconcile=True)
+                st.rerun(scope="fragment")
+        with c4:
+            if st.button("Discard", key="outbox_cancel"):
+                cancel(pick)
+                st.rerun(scope="fragment")
+
+    st.fragment(render, run_every=OUTBOX_POLL_SECONDS if in_flight else None)()
+
+def enrich_with_details(records: list[dict]) -> list[str]:
+    """Merge subject detail fields into the session dataset as columns; returns the new ones.
+
+    Columns from an earlier enrichment are refilled; list columns and lazy
+    paths are left alone.
+    """
+    df = st.session_state.df
+    id_col = case_insensitive_col(df, "id")
+    done = st.session_state.get("detail_cols", [])
+    lazy = st.session_state.get("lazy")
+    skip = [c for c in df.columns if c not in done] + (list(lazy["paths"]) if lazy else [])
+    details = detail_frame(records, id_col, skip)
+    if details.shape[1] <= 1:
+        return []
+    if st.session_state.get("schema_endpoint"):
+        # Details cover only some subjects, so their inferred types are not registered
+        details, _ = ingest(details, st.session_state.schema_endpoint, register=False)
+    merged = merge_details(df, details)
+    cols = [c for c in details.columns if c != id_col]
+    st.session_state.df = merged
+    bump_version()
+    ensure_duck(merged)
+    st.session_state.detail_cols = list(dict.fromkeys(done + cols))
+    if "catalog" in st.session_state:
+        st.session_state.catalog = update_catalog(st.session_state.catalog, merged[cols])
+    return [c for c in cols if c not in done]
+
+def local_records(df: pd.DataFrame, ids: list[str], fields: list[str]) -> list[dict]:
+    """Current local values of `fields` (groupIds as a list) for the preview diff."""
+    id_col = case_insensitive_col(df, "id")
+    rows = df[df[id_col].astype(str).isin(set(ids))]
+    groups = st.session_state.get("related", {}).get(child_table_name(case_insensitive_col(df, "groupIds") or "groupIds"))
+    by_id = groups.groupby("entityId")["value"].apply(list).to_dict() if groups is not None else {}
+    out = []
+    for rec in rows.to_dict("records"):
+        sid = str(rec[id_col])
+        local = {"id": sid, **{f: rec.get(case_insensitive_col(df, f) or f) for f in fields if f != "groupIds"}}
+        if "groupIds" in fields:
+            local["groupIds"] = by_id.get(sid, [])
+        out.append(local)
+    return out
 
 def reset_state():
+    close_connections(st.session_state)
+    ctx = get_script_run_ctx()
+    if ctx:
+        discard_spill(ctx.session_id)
     for k in (
         "url", "data", "df",
         "cols_to_show", "last_nonempty_cols",
         "ct_filter", "player_ms", "player_free",
-        "player_like", "player_like_ms"
+        "player_like", "player_like_ms",
+        "related", "group_filter",
+        "nested_table", "nested_col", "nested_vals",
+        "lazy", "catalog", "source", "col_search", "col_set_pick", "col_set_name",
+        "snap_old", "snap_new",
+        "df_version", "sql_con", "sql_con_version", "sql_cache", "sql_text", "sql_run",
+        "view_cache", "facets", "dup_index",
+        "bulk_patch", "bulk_ids", "bulk_results", "bulk_confirm",
+        "profile", "prof_col", "prof_vals", "schema_endpoint", "schema_col", "schema_dtype",
+        "evicted", "duck_closed", "global_query",
+        "detail_cols", "detail_show", "detail_results",
     ):
         st.session_state.pop(k, None)
 
+# Drill-down tokens for missing values in the column profile
+NULL_TOKEN = "(null)"
+BLANK_TOKEN = "(blank)"
+
+# Above this many columns "Choose cols to show" only lists the selection and catalog hits
+COLUMN_OPTIONS_LIMIT = 150
+
 # Compatibility for rerun across Streamlit versions
 try:
     RERUN = st.rerun
@@ -163,9 +552,6 @@ def to_contact_type(value: str | int) -> int:
         return 2
     return 1
 
-def case_insensitive_col(df: pd.DataFrame, name: str):
-    return next((c for c in df.columns if c.lower() == name.lower()), None)
-
 def try_prefill_from_filters(df: pd.DataFrame) -> tuple[str, str, dt.date | None, int]:
     """Derive first, last, dob, contactType default from current filters."""
     first = ""
@@ -200,15 +586,32 @@ def try_prefill_from_filters(df: pd.DataFrame) -> tuple[str, str, dt.date | None
             if dcol:
                 try:
                     # handle possible timestamp strings
-                    dob_str = str(row.iloc[0][dcol])
-                    # keep only date part
-                    dob_date = pd.to_datetime(dob_str, errors="coerce").date() if pd.notna(dob_str) else None
-                    dob = dob_date
+                    v = row.iloc[0][dcol]
+                    if isinstance(v, pd.Timestamp):
+                        dob = v.date()
+                    else:
+                        # keep only date part
+                        dob_date = pd.to_datetime(str(v), errors="coerce").date() if pd.notna(v) else None
+                        dob = dob_date
                 except Exception:
                     dob = None
     return first, last, dob, ct_default
 
-def find_duplicates(df: pd.DataFrame, first: str, last: str, dob: dt.date | None) -> pd.DataFrame:
+def name_key(first, last) -> tuple[str, str]:
+    return (str(first or "").strip().lower(), str(last or "").strip().lower())
+
+def build_dup_index(df: pd.DataFrame) -> dict[tuple[str, str], list]:
+    """(first, last) lowercased -> row labels, for duplicate checks without a full scan."""
+    fcol = case_insensitive_col(df, "firstName")
+    lcol = case_insensitive_col(df, "lastName")
+    index = {}
+    if fcol and lcol:
+        for label, f, l in zip(df.index, df[fcol], df[lcol]):
+            index.setdefault(name_key(f, l), []).append(label)
+    return index
+
+def find_duplicates(df: pd.DataFrame, first: str, last: str, dob: dt.date | None,
+                    index: dict | None = None) -> pd.DataFrame:
     if df is None or df.empty:
         return pd.DataFrame()
     fcol = case_insensitive_col(df, "firstName")
@@ -216,22 +619,25 @@ def find_duplicates(df: pd.DataFrame, first: str, last: str, dob: dt.date | None
     dcol = case_insensitive_col(df, "dateOfBirth")
     if not fcol or not lcol:
         return pd.DataFrame()
-    mask = (df[fcol].astype(str).str.strip().str.lower() == (first or "").strip().lower()) & \
-           (df[lcol].astype(str).str.strip().str.lower() == (last or "").strip().lower())
+    if index is not None:
+        # Only the rows sharing the name need the date comparison
+        df = df.loc[index.get(name_key(first, last), [])]
+        mask = pd.Series(True, index=df.index)
+    else:
+        mask = (df[fcol].astype(str).str.strip().str.lower() == (first or "").strip().lower()) & \
+               (df[lcol].astype(str).str.strip().str.lower() == (last or "").strip().lower())
     if dob and dcol:
         # compare date only
         try:
-            dob_series = pd.to_datetime(df[dcol], errors="coerce").dt.date
+            dates = df[dcol]
+            if not pd.api.types.is_datetime64_any_dtype(dates):
+                dates = pd.to_datetime(dates, errors="coerce")
+            dob_series = dates.dt.date
             mask &= (dob_series == dob)
         except Exception:
             pass
     return df.loc[mask]
 
-def post_create_subject(base_url: str, auth: requests.auth.HTTPBasicAuth, payload: dict, timeout=45):
-    url = build_url(base_url, "/api/entity/subject")
-    headers = {"Accept": "application/json", "Content-Type": "application/json"}
-    return requests.post(url, auth=auth, headers=headers, json=payload, timeout=timeout)
-
 # ---------- Known clients ----------
 CLIENTS = [
     "afcbournemouth9456.edge10online.co.uk",
@@ -253,6 +659,56 @@ CLIENTS = [
     "p27baseballacademy7227.edge10online.com"
 ]
 
+# ---------- Session governor ----------
+def reload_from_source() -> dict | None:
+    """Fallback when the spill file is gone: shared store, then the newest snapshot."""
+    src = st.session_state.get("source")
+    if not src:
+        return None
+    df = load_dataset(src["site"], src["endpoint"])
+    if df is None:
+        snaps = list_snapshots(src["site"], src["endpoint"])
+        if not snaps:
+            return None
+        df = load_snapshot(snaps[0][1])
+    if st.session_state.get("schema_endpoint"):
+        df = apply_schema(df, load_schema(st.session_state.schema_endpoint))
+    return {"df": df, "data": None, "related": {}, "catalog": build_catalog(df)}
+
+def restore_evicted(session_id: str):
+    """Bring back a dataset the governor released while this tab sat idle."""
+    evicted = st.session_state.pop("evicted", None)
+    if not evicted:
+        return
+    values = unspill(session_id)
+    origin = "spill file"
+    if values is None:
+        values = reload_from_source()
+        origin = "stored copy (related tables need a refetch)"
+    if values is None:
+        st.info("This session's data was released to free server memory; fetch again to continue.")
+        return
+    for k, v in values.items():
+        st.session_state[k] = v
+    bump_version()
+    st.toast(f"Dataset reloaded from {origin} (released: {evicted['reason']})")
+
+def track_session():
+    """Report this session's rerun (and footprint, when the dataset changed) to the governor."""
+    ctx = get_script_run_ctx()
+    if ctx:
+        governor.touch(ctx.session_id, ctx.session_state, st.session_state.get("df_version"))
+
+def session_is_active(session_id: str) -> bool:
+    """Whether the session is still connected (thread-safe; without a runtime, assume so)."""
+    return not runtime.exists() or runtime.get_instance().is_active_session(session_id)
+
+governor = session_governor(is_active=session_is_active)
+track_session()
+_ctx = get_script_run_ctx()
+if _ctx:
+    restore_evicted(_ctx.session_id)
+
 # ---------- Sidebar ----------
 with st.sidebar:
     logo_path = "ARMS_Performance_Logo_White_Alt.png"
@@ -289,6 +745,26 @@ with st.sidebar:
         value="api/entity/",
         help="Examples: api/entity/ OR api/template OR api/entity/groups OR for a full list of API calls check out sitename/swagger",
     )
+    composite = st.toggle(
+        "Composite fetch (entities + groups + templates)",
+        value=False,
+        help="Loads " + ", ".join(COMPOSITE_ENDPOINTS.values()) + " in parallel and links entities to group names. Ignores Endpoint path.",
+    )
+    lazy_mode = st.toggle(
+        "Lazy columns (wide endpoints)",
+        value=False,
+        help="Flattens only key and selected columns; others are flattened when added in Choose cols to show",
+    )
+    parallel_norm = st.toggle(
+        "Parallel normalization (large payloads)",
+        value=False,
+        help=f"Flattens payloads of {PARALLEL_MIN_RECORDS:,}+ records in chunks on {NORMALIZE_WORKERS} worker processes",
+    )
+    snapshot_on_fetch = st.toggle(
+        "Save snapshot on fetch",
+        value=False,
+        help="Stores each fetch as a compressed Parquet snapshot so it can be diffed later",
+    )
 
     st.markdown(
         f"<h3 style='color:{ACCENT}; font-weight:800; margin:1rem 0 .25rem;'>LOGIN</h3>",
@@ -297,19 +773,171 @@ with st.sidebar:
     user = st.text_input("Username")
     pwd = st.text_input("Password", type="password")
 
+    verdict = cached_auth(site, user, pwd) if site and user and pwd else None
+    if verdict is not None:
+        st.caption("Credentials verified for this site" if verdict else "Credentials rejected by this site")
+
     c1, c2 = st.columns(2)
     with c1:
         run = st.button("Fetch", type="primary")
     with c2:
         clear = st.button("Reset")
 
+    mem = governor.stats()
+    eng = engine().stats()
+    st.caption(
+        f"Server memory: {mem['resident_mb']:.0f} of {mem['budget_mb']:.0f} MB across "
+        f"{mem['sessions']} sessions, {mem['evictions']} idle evictions. "
+        f"DuckDB: {eng['threads']} threads, {eng['running']} of {eng['max_queries']} query slots busy"
+    )
+
 if clear:
     reset_state()
     RERUN()
 
 # ---------- Fetch ----------
+def normalize(data, lazy: bool = False, endpoint: str | None = None, parallel: bool = False,
+              register: bool = True) -> tuple[pd.DataFrame, dict[str, pd.DataFrame], dict | None]:
+    """Flatten a payload; list-valued fields move to child tables.
+
+    In lazy mode only key and selected columns are flattened and the raw
+    records are returned alongside so more columns can be added later.
+    With `parallel`, large record lists are flattened on a process pool.
+    Columns are typed from the endpoint's schema when one is given; new
+    columns are only registered in it when `register` (full fetches).
+    """
+    lazy_state = None
+    if lazy:
+        records = records_of(data)
+        lazy_state = {"records": records, "paths": column_paths(records, PATH_SAMPLE),
+                      "complete": len(records) <= PATH_SAMPLE}
+        selected = st.session_state.get("cols_to_show")
+        find_lazy_paths(lazy_state, selected or [])
+        df = records_frame(records, lazy_state["paths"], lazy_columns(lazy_state["paths"], selected))
+        df = add_player_name_col(df)
+    else:
+        df = normalize_records(records_of(data), workers=None if parallel else 1)
+    df, children = explode_nested(df, case_insensitive_col(df, "id"))
+    if endpoint:
+        df, _ = ingest(df, endpoint, register)
+    return df, children, lazy_state
+
+def find_lazy_paths(lazy: dict, names: list[str], force: bool = False) -> bool:
+    """Walk every raw record once when a wanted column is not among the sampled paths.
+
+    Returns True if the walk ran.
+    """
+    if lazy.get("complete"):
+        return False
+    if not force and all(n in lazy["paths"] or n == "Player Name" for n in names):
+        return False
+    lazy["paths"] = {**lazy["paths"], **column_paths(lazy["records"])}
+    lazy["complete"] = True
+    return True
+
+
+def materialize_lazy(cols: list[str]):
+    """Flatten lazy columns that are selected but not yet in the session frame."""
+    lazy = st.session_state.lazy
+    df = st.session_state.df
+    find_lazy_paths(lazy, [c for c in cols if c not in df.columns])
+    missing = [c for c in cols if c in lazy["paths"] and c not in df.columns]
+    if not missing:
+        return
+    id_col = case_insensitive_col(df, "id")
+    extra = records_frame(lazy["records"], lazy["paths"], missing).set_index(df.index)
+    if id_col:
+        extra, children = explode_nested(pd.concat([df[[id_col]], extra], axis=1), id_col)
+        extra = extra.drop(columns=[id_col])
+        if st.session_state.get("schema_endpoint"):
+            extra, _ = ingest(extra, st.session_state.schema_endpoint)
+        st.session_state.related = {**st.session_state.get("related", {}), **children}
+        materialize_tables(ensure_duck(df), children)
+    st.session_state.df = pd.concat([df, extra], axis=1)
+    bump_version()
+    if "catalog" in st.session_state:
+        st.session_state.catalog = update_catalog(st.session_state.catalog, extra)
+
+def add_group_names(df: pd.DataFrame, con: duckdb.DuckDBPyConnection) -> pd.DataFrame:
+    id_col = case_insensitive_col(df, "id")
+    if not id_col or not {"groups", "entity_groups"} <= st.session_state.get("related", {}).keys():
+        return df
+    names = group_names_by_entity(con).set_index("entityId")["Groups"]
+    df = df.drop(columns=["Groups"], errors="ignore")
+    df.insert(1 if "Player Name" in df.columns else 0, "Groups", df[id_col].astype(str).map(names))
+    return df
+
+def log_transfer(stats: dict):
+    """Keep get_raw() stats for this session's Transfer stats panel."""
+    if "transfer_log" not in st.session_state:
+        st.session_state.transfer_log = deque(maxlen=500)
+    st.session_state.transfer_log.append(stats)
+
+def describe_transfer(stats: dict) -> str:
+    return (
+        f"Received {stats['decoded_bytes'] / 1e6:.2f} MB "
+        f"({stats['wire_bytes'] / 1e6:.2f} MB on the wire, {stats['encoding']}, "
+        f"decode {stats['decode_ms']:.0f} ms)"
+    )
+
+def swagger_dtypes() -> dict[str, str]:
+    """Column dtypes declared by the site's swagger document ({} if none is published)."""
+    auth = requests.auth.HTTPBasicAuth(user, pwd)
+    for path in SWAGGER_PATHS:
+        try:
+            r, body, stats = get_raw(build_url(site, path), auth=auth)
+            log_transfer(stats)
+            if r.status_code < 400:
+                return schema_from_swagger(loads(body))
+        except (requests.RequestException, ValueError):
+            continue
+    return {}
+
+def retype_session(schema: dict[str, str]):
+    """Save a schema and re-apply it to the session frame."""
+    save_schema(st.session_state.schema_endpoint, schema)
+    df = st.session_state.df
+    typed = apply_schema(df, schema)
+    if typed is df:
+        return
+    st.session_state.df = typed
+    bump_version()
+    changed = [c for c in typed.columns if typed[c].dtype != df[c].dtype]
+    if "catalog" in st.session_state and changed:
+        st.session_state.catalog = update_catalog(st.session_state.catalog, typed[changed])
+
+def composite_fetch(status, prog):
+    """Fetch the composite endpoints in parallel; returns (url, data, df, related, lazy_state, digest)."""
+    status.write(f"Sending {len(COMPOSITE_ENDPOINTS)} requests in parallel")
+    prog.progress(30, text="Sending requests")
+    payloads, errors, stats = fetch_many(site, COMPOSITE_ENDPOINTS, requests.auth.HTTPBasicAuth(user, pwd))
+    for name, s in stats.items():
+        log_transfer(s)
+        status.write(f"{COMPOSITE_ENDPOINTS[name]}: {describe_transfer(s)}")
+    if "entities" in errors:
+        if getattr(getattr(errors["entities"], "response", None), "status_code", None) == 401:
+            forget_auth(site, user, pwd)
+        status.update(label="Entity fetch failed", state="error")
+        st.error(f"{COMPOSITE_ENDPOINTS['entities']}: {errors['entities']}")
+        st.stop()
+    for name, err in errors.items():
+        st.warning(f"{COMPOSITE_ENDPOINTS[name]} skipped: {err}")
+
+    status.write("Normalizing tables")
+    prog.progress(70, text="Normalizing tables")
+    df, children, lazy_state = normalize(payloads["entities"], lazy_mode, COMPOSITE_ENDPOINTS["entities"], parallel_norm)
+    related = build_related(
+        df,
+        children,
+        to_df(payloads["groups"]) if "groups" in payloads else None,
+        to_df(payloads["templates"]) if "templates" in payloads else None,
+    )
+    url = " + ".join(build_url(site, ep) for ep in COMPOSITE_ENDPOINTS.values())
+    digest = "+".join(f"{name}:{stats[name]['digest']}" for name in sorted(stats))
+    return url, payloads, df, related, lazy_state, digest
+
 if run:
-    if not site or not endpoint or not user or not pwd:
+    if not site or not user or not pwd or not (endpoint or composite):
         st.error("Please fill site name, endpoint, username, and password")
         st.stop()
 
@@ -317,27 +945,42 @@ if run:
     prog = st.progress(0, text="Starting")
     try:
         with st.status("Fetching data...", expanded=True) as status:
-            status.write("Sending request")
-            prog.progress(30, text="Sending request")
-            r = requests.get(
-                url,
-                auth=requests.auth.HTTPBasicAuth(user, pwd),
-                headers={"Accept": "application/json"},
-                timeout=(15,180),
-            )
-            if r.status_code >= 400:
-                status.update(label=f"HTTP {r.status_code}", state="error")
-                st.error(f"HTTP {r.status_code}: {r.text[:500]}")
+            status.write("Checking credentials")
+            prog.progress(10, text="Checking credentials")
+            try:
+                require_auth(site, user, pwd)
+            except AuthRejected as e:
+                status.update(label="Credentials rejected", state="error")
+                st.error(str(e))
                 st.stop()
+            if composite:
+                url, data, df, related, lazy_state, digest = composite_fetch(status, prog)
+            else:
+                status.write("Sending request")
+                prog.progress(30, text="Sending request")
+                r, body, stats = get_raw(
+                    url,
+                    auth=requests.auth.HTTPBasicAuth(user, pwd),
+                    timeout=(15,180),
+                )
+                log_transfer(stats)
+                if r.status_code >= 400:
+                    if r.status_code == 401:
+                        forget_auth(site, user, pwd)
+                    status.update(label=f"HTTP {r.status_code}", state="error")
+                    st.error(f"HTTP {r.status_code}: {body[:500].decode('utf-8', 'replace')}")
+                    st.stop()
 
-            status.write("Parsing JSON")
-            prog.progress(60, text="Parsing JSON")
-            data = r.json()
+                status.write(describe_transfer(stats))
+                status.write("Parsing JSON")
+                prog.progress(60, text="Parsing JSON")
+                data = loads(body)
 
-            status.write("Normalizing table")
-            prog.progress(85, text="Normalizing table")
-            df = to_df(data)
-            df = add_player_name_col(df)
+                status.write("Normalizing table")
+                prog.progress(85, text="Normalizing table")
+                df, children, lazy_state = normalize(data, lazy_mode, endpoint, parallel_norm)
+                related = build_related(df, children)
+                digest = stats["digest"]
 
             prog.progress(100, text="Done")
             status.update(label="Fetch complete", state="complete")
@@ -347,8 +990,36 @@ if run:
             st.json(data)
         else:
             st.session_state.url = url
-            st.session_state.data = data
+            if lazy_state:
+                st.session_state.lazy = lazy_state
+            else:
+                st.session_state.pop("lazy", None)
+            # Fresh connection so it only holds this fetch's related tables
+            st.session_state.related = related
+            drop_duck()
+            df = add_group_names(df, ensure_duck(df))
+            if not lazy_state:
+                # With a shared store, sessions that fetched the same payload share one frame
+                df = store_dataset(df, site, "composite" if composite else endpoint, digest)
+            # A stored dataset is not kept as parsed JSON too (no raw JSON download then)
+            st.session_state.data = None if stored_table(df) else data
             st.session_state.df = df
+            bump_version()
+            st.session_state.source = {"site": site, "endpoint": "composite" if composite else endpoint}
+            st.session_state.schema_endpoint = COMPOSITE_ENDPOINTS["entities"] if composite else endpoint
+            st.session_state.catalog = build_catalog(df, lazy_state["paths"] if lazy_state else None)
+            if snapshot_on_fetch:
+                save_snapshot(df, site, st.session_state.source["endpoint"])
+            if holds_entities_of(site):
+                try:
+                    index_people(df, site, st.session_state.schema_endpoint)
+                except duckdb.Error as e:
+                    st.warning(f"Global search index not updated: {e}")
+            if "groups" not in related:
+                st.session_state.pop("group_filter", None)
+            if st.session_state.get("nested_table") not in related:
+                for k in ("nested_table", "nested_col", "nested_vals"):
+                    st.session_state.pop(k, None)
 
             # Default visible columns (limit to 8 initially for small screens)
             if "cols_to_show" not in st.session_state:
@@ -374,21 +1045,31 @@ if run:
 # =========================================================
 #                         TABS
 # =========================================================
-tab_view, tab_write = st.tabs(["VIEW", "CREATE PLAYER"])
+apply_outbox_results()
+
+tab_view, tab_sql, tab_write, tab_bulk, tab_search = st.tabs(["VIEW", "SQL", "CREATE PLAYER", "BULK UPDATE", "GLOBAL SEARCH"])
 
 # ---------- Tab: View data ----------
 with tab_view:
     if "df" in st.session_state:
-        df_base = st.session_state.df.copy()
+        if st.session_state.get("lazy"):
+            materialize_lazy(st.session_state.get("cols_to_show") or [])
+        df_base = st.session_state.df
         st.caption(f"GET {st.session_state.url}")
+        with st.expander("Transfer stats", expanded=False):
+            st.dataframe(transfer_summary(st.session_state.get("transfer_log", ())), use_container_width=True, hide_index=True)
+            breakers = breaker_states()
+            if breakers:
+                st.caption("Circuit breakers: " + "  •  ".join(f"{h}: {state}" for h, state in breakers.items()))
 
         like_opts = []
+        like_tokens = []
         # Collapse by default (nicer on mobile)
         filt_exp = st.expander("Filters", expanded=False)
         with filt_exp:
             ct_col = next((c for c in df_base.columns if c.lower() == "contacttype"), None)
             if ct_col:
-                uniq_ct = sorted(df_base[ct_col].dropna().astype(str).unique().tolist())
+                uniq_ct = facet_options(df_base, ct_col)
                 st.multiselect(
                     "contactType",
                     options=uniq_ct,
@@ -396,8 +1077,36 @@ with tab_view:
                     help="Contact Type = 1 : Player | Contact Type = 2 : Staff"
                 )
 
+            related = st.session_state.get("related", {})
+            if {"groups", "entity_groups"} <= related.keys():
+                st.multiselect(
+                    "Groups",
+                    options=sorted(related["groups"]["name"].dropna().astype(str).unique().tolist()),
+                    key="group_filter",
+                    help="Entities in any of the picked groups (joined via entity_groups)"
+                )
+
+            child_tables = sorted(t for t in related if t.startswith(CHILD_PREFIX))
+            if child_tables:
+                nested_table = st.selectbox(
+                    "Nested field",
+                    options=[""] + child_tables,
+                    key="nested_table",
+                    help="List-valued fields are stored as child tables keyed by entity id"
+                )
+                if nested_table:
+                    child = related[nested_table]
+                    value_cols = [c for c in child.columns if c not in ("entityId", "ordinal")]
+                    nested_col = st.selectbox("Nested column", options=value_cols, key="nested_col") if len(value_cols) > 1 else value_cols[0]
+                    con_all = ensure_duck(df_base)
+                    nested_opts = con_all.execute(
+                        f"SELECT DISTINCT CAST({quote_ident(nested_col)} AS VARCHAR) AS v FROM {quote_ident(nested_table)} "
+                        "WHERE v IS NOT NULL ORDER BY 1 LIMIT 1000"
+                    ).fetchdf()["v"].tolist()
+                    st.multiselect("Nested values (any match)", options=nested_opts, key="nested_vals")
+
             if "Player Name" in df_base.columns:
-                player_opts = sorted(df_base["Player Name"].dropna().unique().tolist())
+                player_opts = facet_options(df_base, "Player Name")
                 st.multiselect(
                     "Players (exact match, multi select)",
                     options=player_opts,
@@ -430,35 +1139,119 @@ with tab_view:
                     key="player_free",
                 )
 
-        # Apply filters
-        df_filt = df_base.copy()
-        if ct_col and st.session_state.get("ct_filter"):
-            df_filt = df_filt[df_filt[ct_col].astype(str).isin(st.session_state.ct_filter)]
-
-        allowed = set(st.session_state.get("player_ms", []) or [])
-        like_query_present = bool(st.session_state.get("player_like"))
-        like_selected = set(st.session_state.get("player_like_ms", []) or [])
-        if like_query_present:
-            allowed |= (like_selected if like_selected else set(like_opts))
-
-        pasted = st.session_state.get("player_free", "") or ""
-        if pasted:
-            pasted_set = {x.strip() for x in re.split(r"[,\n]", pasted) if x.strip()}
-            existing = set(df_base["Player Name"].dropna().unique().tolist())
-            missing = sorted([p for p in pasted_set if p not in existing])
-            found = pasted_set - set(missing)
-            if missing:
-                st.warning("Not found: " + ", ".join(missing))
-            allowed |= found
-
-        if "Player Name" in df_base.columns and allowed:
-            df_filt = df_filt[df_filt["Player Name"].isin(allowed)]
+        # Column profile: one aggregate pass per dataset version, drill-down filter
+        with st.expander("Column profile", expanded=False):
+            version = st.session_state.get("df_version")
+            if st.session_state.get("profile", (None,))[0] != version:
+                st.session_state.profile = (version, profile_table(ensure_duck(df_base)), {})
+            _, profile, top_cache = st.session_state.profile
+            st.dataframe(profile, use_container_width=True, hide_index=True, height=280)
+            prof_col = st.selectbox("Drill into column", options=[""] + profile["column"].tolist(), key="prof_col")
+            if prof_col:
+                if prof_col not in top_cache:
+                    top_cache[prof_col] = top_values(ensure_duck(df_base), prof_col)
+                tops = top_cache[prof_col]
+                st.dataframe(tops, use_container_width=True, hide_index=True)
+                st.multiselect(
+                    "Filter rows where this column is",
+                    options=[NULL_TOKEN, BLANK_TOKEN] + tops["value"].dropna().tolist(),
+                    key="prof_vals",
+                    help="Top values only; use (null) / (blank) to find missing data"
+                )
+
+        # Schema registry: declared dtypes per endpoint, parsed once at ingestion
+        if st.session_state.get("schema_endpoint"):
+            with st.expander("Schema", expanded=False):
+                schema = load_schema(st.session_state.schema_endpoint)
+                st.caption(f"Registered for `{st.session_state.schema_endpoint}`; new columns are inferred on fetch.")
+                st.dataframe(
+                    pd.DataFrame({
+                        "column": list(schema),
+                        "declared": list(schema.values()),
+                        "loaded as": [str(df_base[c].dtype) if c in df_base.columns else "" for c in schema],
+                    }),
+                    use_container_width=True, hide_index=True, height=240,
+                )
+                c1, c2, c3 = st.columns([2, 1, 1])
+                with c1:
+                    sc_col = st.selectbox("Column", options=[""] + list(schema), key="schema_col")
+                with c2:
+                    sc_type = st.selectbox("Dtype", options=DTYPES, key="schema_dtype")
+                with c3:
+                    if sc_col and st.button("Declare"):
+                        retype_session({**schema, sc_col: sc_type})
+                        RERUN()
+                c1, c2 = st.columns(2)
+                with c1:
+                    if st.button("Seed from swagger"):
+                        declared = {c: t for c, t in swagger_dtypes().items() if c in schema}
+                        if declared:
+                            retype_session({**schema, **declared})
+                            RERUN()
+                        st.info("No swagger types matched the loaded columns")
+                with c2:
+                    if st.button("Re-infer from loaded data"):
+                        retype_session({**schema, **infer_schema(df_base)})
+                        RERUN()
+                st.caption("Declaring a parsed column as `string` takes effect on the next fetch.")
 
         # Choose columns
-        all_cols = df_filt.columns.tolist()
+        all_cols = df_base.columns.tolist()
+        if st.session_state.get("lazy"):
+            # Unflattened columns are offered too and materialized on the next rerun
+            all_cols += [c for c in st.session_state.lazy["paths"] if c not in all_cols]
+            if not st.session_state.lazy.get("complete"):
+                n_sample = min(PATH_SAMPLE, len(st.session_state.lazy["records"]))
+                if st.button("Find more columns", help=f"Columns are listed from {n_sample:,} sampled records; this scans all of them"):
+                    find_lazy_paths(st.session_state.lazy, [], force=True)
+                    if "catalog" in st.session_state:
+                        st.session_state.catalog = build_catalog(st.session_state.df, st.session_state.lazy["paths"])
+                    RERUN()
+
+        # Column catalog: search, bulk add and saved sets per (client, endpoint)
+        col_options = all_cols
+        catalog = st.session_state.get("catalog")
+        if catalog is not None:
+            with st.expander(f"Column catalog ({len(catalog)} columns)", expanded=False):
+                query = st.text_input("Search columns (prefix or substring)", key="col_search", placeholder="profile.")
+                hits = search_catalog(catalog[catalog["column"].isin(all_cols)], query)
+                st.dataframe(hits, use_container_width=True, hide_index=True, height=240)
+                if query and st.button(f"Add {len(hits)} matches to visible columns"):
+                    st.session_state.cols_to_show = list(dict.fromkeys((st.session_state.get("cols_to_show") or []) + hits["column"].tolist()))
+                    RERUN()
+
+                src = st.session_state.get("source", {})
+                col_sets = load_column_sets(src.get("site"), src.get("endpoint"))
+                c1, c2 = st.columns(2)
+                with c1:
+                    set_name = st.selectbox("Saved column sets", options=[""] + sorted(col_sets), key="col_set_pick")
+                    if set_name and st.button("Apply set"):
+                        st.session_state.cols_to_show = [c for c in col_sets[set_name] if c in all_cols]
+                        RERUN()
+                    if set_name and st.button("Delete set"):
+                        delete_column_set(src.get("site"), src.get("endpoint"), set_name)
+                        st.session_state.pop("col_set_pick", None)
+                        RERUN()
+                with c2:
+                    new_name = st.text_input("Save current columns as", key="col_set_name")
+                    if new_name and st.button("Save set"):
+                        save_column_set(src.get("site"), src.get("endpoint"), new_name, st.session_state.get("cols_to_show") or [])
+                        st.success(f"Saved column set '{new_name}'")
+
+            # Keep the widget small on wide schemas: selection plus search hits only
+            if len(all_cols) > COLUMN_OPTIONS_LIMIT:
+                selected = [c for c in st.session_state.get("cols_to_show") or [] if c in all_cols]
+                col_options = list(dict.fromkeys(selected + hits["column"].tolist()))
+
+        # Columns added by detail enrichment become visible (set before the widget exists)
+        if "detail_show" in st.session_state:
+            shown = st.session_state.get("cols_to_show") or []
+            st.session_state.cols_to_show = list(dict.fromkeys(shown + st.session_state.pop("detail_show")))
+            col_options = list(dict.fromkeys(col_options + st.session_state.cols_to_show))
+
         cols_to_show = st.multiselect(
             "Choose cols to show",
-            options=all_cols,
+            options=col_options,
             key="cols_to_show",
             help="Controls which columns are visible and downloaded below."
         )
@@ -468,14 +1261,80 @@ with tab_view:
         if cols_to_show:
             st.session_state.last_nonempty_cols = cols_to_show
 
-        # DuckDB projection
-        con = ensure_duck(df_filt)
-        sql = f"SELECT {', '.join(quote_ident(c) for c in cols_render)} FROM api_data" if cols_render else "SELECT * FROM api_data"
-        df_show = con.execute(sql).fetchdf()
+        # Filters + DuckDB projection, memoized per view state
+        if "view_cache" not in st.session_state:
+            # An unfiltered view is the base frame itself; only its own frames count
+            st.session_state.view_cache = LRUCache(
+                max_items=16, max_bytes=128 * 1024 * 1024,
+                sizeof=lambda view: frame_nbytes(view, shared=(st.session_state.get("df"),)),
+            )
+        view_cache: LRUCache = st.session_state.view_cache
+        view_key = view_state_key(like_tokens, cols_render)
+        view = view_cache.get(view_key)
+        if view is None:
+            df_filt, missing = filter_view(df_base, ct_col, like_opts)
+            con = ensure_duck(df_filt)
+            sql = f"SELECT {', '.join(quote_ident(c) for c in cols_render)} FROM api_data" if cols_render else "SELECT * FROM api_data"
+            view = (df_filt, con.execute(sql).fetchdf(), missing)
+            view_cache.put(view_key, view)
+        df_filt, df_show, missing = view
+        if missing:
+            st.warning("Not found: " + ", ".join(missing))
 
         st.success(f"Rows: {len(df_filt)}  Cols: {len(df_filt.columns)}  |  Showing {len(df_show.columns)} columns")
         st.dataframe(df_show, use_container_width=True)
 
+        # Detail enrichment: GET /api/entity/subject/{id} for the filtered rows
+        src = st.session_state.get("source") or {}
+        id_col = case_insensitive_col(df_filt, "id")
+        if id_col and holds_entities_of(src.get("site")):
+            with st.expander("Subject detail", expanded=False):
+                detail_ids = df_filt[id_col].dropna().astype(str).tolist()
+                st.caption(
+                    f"Fetches each filtered subject's detail concurrently and adds fields the list leaves out as columns. "
+                    f"Details are cached for {DETAIL_TTL_SECONDS / 60:.0f} minutes."
+                )
+                c1, c2 = st.columns([1, 2])
+                with c1:
+                    detail_workers = st.number_input("Parallel requests", min_value=1, max_value=32, value=DETAIL_WORKERS)
+                with c2:
+                    enrich = st.button(f"Fetch detail for {len(detail_ids)} subjects", disabled=not detail_ids)
+                if enrich:
+                    if not user or not pwd:
+                        st.error("Please fill username and password in the sidebar.")
+                        st.stop()
+                    auth = requests.auth.HTTPBasicAuth(user, pwd)
+                    try:
+                        require_auth(src["site"], user, pwd)
+                    except requests.RequestException as e:
+                        st.error(f"Request failed: {e}")
+                        st.stop()
+                    bar = st.progress(0, text="Fetching detail")
+                    t0 = time.perf_counter()
+                    results = fetch_details(
+                        src["site"], auth, detail_ids, max_workers=int(detail_workers),
+                        on_progress=lambda done, total: bar.progress(done / total, text=f"Detail {done}/{total}"),
+                    )
+                    elapsed = time.perf_counter() - t0
+                    bar.empty()
+                    added = enrich_with_details([r["record"] for r in results if r["record"]])
+                    counts = pd.Series([r["result"] for r in results]).value_counts().to_dict()
+                    st.session_state.detail_results = {
+                        "summary": "  •  ".join(f"{k}: {v}" for k, v in counts.items()) + f"  •  {elapsed:.1f} s",
+                        "added": added,
+                        "failed": [{k: v for k, v in r.items() if k != "record"} for r in results if r["result"] == "failed"],
+                    }
+                    if added:
+                        st.session_state.detail_show = added
+                    RERUN()
+                report = st.session_state.get("detail_results")
+                if report:
+                    st.success(report["summary"])
+                    if report["added"]:
+                        st.caption("Added columns: " + ", ".join(report["added"]))
+                    if report["failed"]:
+                        st.dataframe(pd.DataFrame(report["failed"]), use_container_width=True, hide_index=True)
+
         # Downloads
         st.subheader("Downloads")
         c1, c2, c3 = st.columns(3)
@@ -484,7 +1343,91 @@ with tab_view:
         with c2:
             st.download_button("Download filtered full table CSV", df_filt.to_csv(index=False).encode("utf-8"), "api_data_filtered.csv", "text/csv")
         with c3:
-            st.download_button("Download raw JSON", json.dumps(st.session_state.data, indent=2).encode("utf-8"), "api_raw.json", "application/json")
+            if st.session_state.get("data") is not None:
+                st.download_button("Download raw JSON", dumps_bytes(st.session_state.data, indent=True), "api_raw.json", "application/json")
+
+        # Snapshot history
+        src = st.session_state.get("source", {})
+        with st.expander("Snapshot history", expanded=False):
+            if st.button("Save snapshot now"):
+                save_snapshot(st.session_state.df, src.get("site"), src.get("endpoint"))
+            snaps = list_snapshots(src.get("site"), src.get("endpoint"))
+            if len(snaps) < 2:
+                st.info("Need at least two snapshots of this client and endpoint to compare")
+            else:
+                labels = [label for label, _ in snaps]
+                paths = dict(snaps)
+                c1, c2 = st.columns(2)
+                with c1:
+                    older = st.selectbox("Older snapshot", options=labels, index=1, key="snap_old")
+                with c2:
+                    newer = st.selectbox("Newer snapshot", options=labels, index=0, key="snap_new")
+                try:
+                    diff = diff_snapshots(paths[older], paths[newer])
+                except Exception as e:
+                    st.error(f"Cannot diff snapshots: {e}")
+                else:
+                    st.write(f"**Added** {len(diff['added'])}  •  **Removed** {len(diff['removed'])}  •  **Changed fields** {len(diff['changed'])}")
+                    t_add, t_rem, t_chg = st.tabs(["Added", "Removed", "Changed"])
+                    with t_add:
+                        st.dataframe(diff["added"], use_container_width=True)
+                    with t_rem:
+                        st.dataframe(diff["removed"], use_container_width=True)
+                    with t_chg:
+                        st.dataframe(diff["changed"], use_container_width=True)
+    else:
+        st.info("Fetch data on the VIEW tab using the sidebar")
+
+# ---------- Tab: SQL console ----------
+with tab_sql:
+    if "df" in st.session_state:
+        tables = ["api_data"] + sorted(st.session_state.get("related", {}))
+        st.caption("Read-only DuckDB SQL over: " + ", ".join(tables))
+        sql_text = st.text_area("SQL", key="sql_text", height=140,
+                                placeholder='SELECT contactType, count(*) FROM api_data GROUP BY 1')
+        c1, c2, c3 = st.columns([1, 1, 2])
+        with c1:
+            row_limit = st.number_input("Row limit", min_value=10, max_value=1_000_000, value=1000, step=100)
+        with c2:
+            profile = st.checkbox("EXPLAIN ANALYZE", value=False)
+        with c3:
+            run_sql = st.button("Run query", type="primary")
+
+        if run_sql:
+            st.session_state.sql_run = sql_text
+        sql_run = st.session_state.get("sql_run") or ""
+        if sql_run.strip():
+            if "sql_cache" not in st.session_state:
+                st.session_state.sql_cache = LRUCache(max_items=32, max_bytes=256 * 1024 * 1024)
+            cache: LRUCache = st.session_state.sql_cache
+            key = (st.session_state.get("df_version"), normalize_sql(sql_run), int(row_limit))
+            try:
+                con_sql = sql_console_con()
+                hit = cache.get(key)
+                if hit is None:
+                    hit = run_query(con_sql, sql_run, int(row_limit))
+                    cache.put(key, hit)
+                    source = "computed"
+                else:
+                    source = "cache hit"
+                res, truncated, secs = hit
+                st.success(f"{len(res)} rows{' (truncated)' if truncated else ''}  |  {secs * 1000:.1f} ms  |  {source}  |  cache {len(cache)} entries, {cache.nbytes / 1e6:.1f} MB")
+                st.dataframe(res, use_container_width=True)
+                if profile:
+                    plan_key = key[:2] + ("explain",)
+                    plan = cache.get(plan_key)
+                    if plan is None:
+                        plan = explain_analyze(con_sql, sql_run)
+                        cache.put(plan_key, plan)
+                    st.code(plan, language="text")
+                if truncated and st.checkbox("Prepare full result CSV (ignores row limit)", value=False):
+                    # Streamed to disk by DuckDB; the button holds the file only while this box is ticked
+                    with open(csv_export(con_sql, sql_run), "rb") as f:
+                        st.download_button("Download full result CSV", f, "api_query.csv", "text/csv")
+                else:
+                    st.download_button("Download result CSV", res.to_csv(index=False).encode("utf-8"), "api_query.csv", "text/csv")
+            except Exception as e:
+                st.error(f"Query failed: {e}")
     else:
         st.info("Fetch data on the VIEW tab using the sidebar")
 
@@ -550,7 +1493,7 @@ with tab_write:
                 "profile": {"customID": None},
                 "groupIds": [g.strip() for g in group_ids_raw.split(",") if g.strip()],
             })
-            st.code(json.dumps(preview_payload, indent=2), language="json")
+            st.code(dumps(preview_payload, indent=True), language="json")
 
         c3, c4 = st.columns([1,2])
         with c3:
@@ -571,49 +1514,168 @@ with tab_write:
             st.stop()
 
         payload = preview_payload  # from above box
-        auth = requests.auth.HTTPBasicAuth(user, pwd)
 
         # Duplicate check against current df (if available)
-        dupes = find_duplicates(df_ctx, first, last, dob)
+        dupes = find_duplicates(df_ctx, first, last, dob, get_dup_index(df_ctx) if not df_ctx.empty else None)
         if not dupes.empty:
             st.warning(f"Possible duplicate found: {len(dupes)} match in current data.")
 
         if dry_run:
             st.info("Test mode is ON. No write performed.")
-            st.code(json.dumps(payload, indent=2), language="json")
+            st.code(dumps(payload, indent=True), language="json")
         else:
             if not confirm:
                 st.warning("Please tick the confirmation to proceed.")
                 st.stop()
 
-            with st.status("Creating player...", expanded=False) as status:
+            # Same payload, same key: a double submit or a resubmit after a timeout never creates twice
+            digest = hashlib.sha256(f"{host_of(base_site)}|{user}|{dumps(payload)}".encode("utf-8")).hexdigest()
+            create_keys = st.session_state.setdefault("create_keys", {})
+            key = create_keys.setdefault(digest, new_key())
+            try:
+                verdict = require_auth(base_site, user, pwd)["ok"]
+            except AuthRejected as e:
+                st.error(str(e))
+                st.stop()
+            except requests.RequestException:
+                verdict = None  # host unreachable: queue anyway, the worker retries
+            # Matches already in the loaded roster; without one the worker reads it before sending
+            id_col = case_insensitive_col(dupes, "id")
+            baseline = dupes[id_col].astype(str).tolist() if holds_entities_of(base_site) and id_col else None
+            hand_over_credentials(base_site, verdict)
+            enqueue_create(base_site, user, payload, key=key, baseline=baseline)
+            outbox_worker().wake()
+            st.session_state.setdefault("outbox_keys", [])
+            if key not in st.session_state.outbox_keys:
+                st.session_state.outbox_keys.append(key)
+            row = get_write(key)
+            if row["status"] == "done":
+                st.info(f"Already created as {row['result_id']} (same payload); not sent again.")
+            else:
+                st.info(f"Queued as {key[:8]}; it is sent in the background and shown under Outbox.")
+
+    outbox_panel(base_site)
+
+# ---------- Tab: Bulk update ----------
+with tab_bulk:
+    if not holds_entities_of(site):
+        st.info("Fetch api/entity/ (or a composite fetch) for this site on the VIEW tab first")
+    else:
+        id_col = case_insensitive_col(df_filt, "id")
+        sel_ids = df_filt[id_col].astype(str).tolist() if id_col else []
+        st.caption(f"Update: {build_url(site, '/api/entity/subject/{id}')}  |  Selection from VIEW filters: {len(sel_ids)} subjects")
+        related = st.session_state.get("related", {})
+        group_lookup = dict(zip(related["groups"]["name"], related["groups"]["id"])) if "groups" in related else {}
+
+        with st.form("bulk_update_form", clear_on_submit=False):
+            c1, c2 = st.columns(2)
+            with c1:
+                add_names = st.multiselect("Add to groups", options=sorted(group_lookup)) if group_lookup else []
+                remove_names = st.multiselect("Remove from groups", options=sorted(group_lookup)) if group_lookup else []
+                add_raw = st.text_area("Add group IDs (comma separated GUIDs, optional)", "")
+            with c2:
+                ct_new = st.selectbox("Set contact type", ["(unchanged)", "Player", "Staff"], index=0)
+                set_field = st.text_input("Set field (optional)", "", placeholder="title")
+                set_value = st.text_input("to value (JSON allowed)", "", placeholder="Mr")
+            preview_clicked = st.form_submit_button("Preview changes")
+
+        if preview_clicked:
+            patch = {"set": {}, "add_groupIds": [], "remove_groupIds": []}
+            if ct_new != "(unchanged)":
+                patch["set"]["contactType"] = 1 if ct_new == "Player" else 2
+            if set_field.strip():
                 try:
-                    r = post_create_subject(base_site, auth, payload, timeout=45)
-                except requests.RequestException as e:
-                    status.update(state="error")
-                    st.error(f"Request failed: {e}")
+                    patch["set"][set_field.strip()] = loads(set_value)
+                except ValueError:
+                    patch["set"][set_field.strip()] = set_value
+            patch["add_groupIds"] = [group_lookup[n] for n in add_names] + [g.strip() for g in add_raw.split(",") if g.strip()]
+            patch["remove_groupIds"] = [group_lookup[n] for n in remove_names]
+            st.session_state.bulk_patch = patch
+            st.session_state.bulk_ids = sel_ids
+            st.session_state.pop("bulk_results", None)
+
+        patch = st.session_state.get("bulk_patch")
+        bulk_ids = st.session_state.get("bulk_ids") or []
+        if patch:
+            fields = list(patch["set"]) + (["groupIds"] if patch["add_groupIds"] or patch["remove_groupIds"] else [])
+            diff = patch_diff(local_records(st.session_state.df, bulk_ids, fields), patch)
+            changing = diff["id"].nunique() if not diff.empty else 0
+            st.write(f"**Preview**  {changing} of {len(bulk_ids)} subjects change (based on local data; each subject is re-read before writing)")
+            st.dataframe(diff, use_container_width=True, hide_index=True)
+
+            c3, c4, c5 = st.columns([1, 1, 2])
+            with c3:
+                workers = st.number_input("Parallel workers", min_value=1, max_value=16, value=4)
+            with c4:
+                confirm_bulk = st.checkbox("I understand this writes to production", value=False, key="bulk_confirm")
+            with c5:
+                apply_clicked = st.button(f"Apply to {len(bulk_ids)} subjects", type="primary", disabled=not bulk_ids)
+
+            if apply_clicked:
+                if not user or not pwd:
+                    st.error("Please fill username and password in the sidebar.")
                     st.stop()
-
-                st.write("Status:", r.status_code)
-                if not r.ok:
-                    status.update(label=f"HTTP {r.status_code}", state="error")
-                    try:
-                        st.error(json.dumps(r.json(), indent=2))
-                    except Exception:
-                        st.error(r.text)
+                if not confirm_bulk:
+                    st.warning("Please tick the confirmation to proceed.")
                     st.stop()
-
-                created = r.json()
-                status.update(label="Created", state="complete")
-                st.success(f"Created subject id: {created.get('id')}")
-                st.code(json.dumps(created, indent=2), language="json")
-
-                # Optional read back
                 try:
-                    read_url = build_url(base_site, f"/api/entity/subject/{created.get('id')}")
-                    rr = requests.get(read_url, auth=auth, headers={"Accept": "application/json"}, timeout=30)
-                    if rr.ok:
-                        st.caption("Read back")
-                        st.code(json.dumps(rr.json(), indent=2), language="json")
-                except requests.RequestException:
-                    pass
+                    require_auth(site, user, pwd)
+                except requests.RequestException as e:
+                    st.error(f"Request failed: {e}")
+                    st.stop()
+                bar = st.progress(0, text="Updating")
+                auth = requests.auth.HTTPBasicAuth(user, pwd)
+                results = bulk_update(
+                    site, auth, bulk_ids, patch, max_workers=int(workers),
+                    on_progress=lambda done, total: bar.progress(done / total, text=f"Updated {done}/{total}"),
+                )
+                bar.empty()
+                # Write-through so VIEW reflects the updates without a refetch
+                updated = [res["record"] for res in results if res["result"] == "updated" and res["record"]]
+                if updated:
+                    upsert_records(updated)
+                    index_records(updated, site)
+                for record in updated:
+                    # Keep the detail cache from serving pre-update values
+                    remember_detail(site, auth, record)
+                st.session_state.bulk_results = [{k: v for k, v in r.items() if k != "record"} for r in results]
+                RERUN()
+
+        if st.session_state.get("bulk_results"):
+            report = pd.DataFrame(st.session_state.bulk_results)
+            counts = report["result"].value_counts().to_dict()
+            st.success("  •  ".join(f"{k}: {v}" for k, v in counts.items()))
+            st.dataframe(report, use_container_width=True, hide_index=True)
+            st.download_button("Download update report CSV", report.to_csv(index=False).encode("utf-8"), "bulk_update_report.csv", "text/csv")
+
+# ---------- Tab: Global search ----------
+with tab_search:
+    st.caption("Search people across every indexed client by name, id or date of birth (YYYY-MM-DD or DD/MM/YYYY).")
+    query = st.text_input("Search all clients", key="global_query", placeholder="rolando smith 2001-02-03")
+    try:
+        hosts = indexed_hosts()
+        if query:
+            hits, ms = search_people(query)
+            st.write(f"**{len(hits)}** matches across {hits['host'].nunique() if len(hits) else 0} clients in {ms:.1f} ms")
+            st.dataframe(hits, use_container_width=True, hide_index=True)
+    except duckdb.Error as e:
+        hosts = None
+        st.error(f"Search index unavailable: {e}")
+
+    with st.expander(f"Index ({0 if hosts is None else len(hosts)} clients)", expanded=hosts is not None and hosts.empty):
+        st.caption("Each api/entity/ or composite fetch re-indexes that client; creates and bulk updates are added as they happen.")
+        if hosts is not None:
+            st.dataframe(hosts, use_container_width=True, hide_index=True)
+        if st.button(f"Refresh all {len(CLIENTS)} known clients"):
+            if not user or not pwd:
+                st.error("Please fill username and password in the sidebar.")
+                st.stop()
+            bar = st.progress(0, text="Fetching clients")
+            indexed, errors = refresh_hosts(
+                CLIENTS, requests.auth.HTTPBasicAuth(user, pwd),
+                on_progress=lambda done, total: bar.progress(done / total, text=f"Indexed {done}/{total} clients"),
+            )
+            bar.empty()
+            st.success(f"Indexed {sum(indexed.values())} people from {len(indexed)} clients")
+            for host, err in errors.items():
+                st.warning(f"{host}: {err}")
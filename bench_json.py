@@ -0,0 +1,94 @@
+# bench_json.py
+"""Compare JSON codecs on our payload shapes.
+
+    python bench_json.py --entities 50000 --repeat 5
+
+Times parse, compact serialize and indented serialize for the entity list,
+the template list and a single create payload, per available codec, and
+checks that every codec produces identical output.
+"""
+import argparse
+import datetime as dt
+import json
+import statistics
+import time
+
+import pandas as pd
+
+import e10_json
+import mock_api
+
+
+def payloads(n_entities: int) -> dict:
+    data = mock_api.seed_data(n_entities, n_templates=200)
+    for i, e in enumerate(data["entities"][:50]):
+        e["firstName"] = ["Zoë", "Łukasz", "Søren", "Dániel", "Jürgen"][i % 5]
+    subject = {
+        "contactType": 1, "dateOfBirth": dt.datetime(2001, 1, 1).isoformat(timespec="seconds"),
+        "firstName": "Zoë", "lastName": "Ødegaard", "gender": "female",
+        "groupIds": [g["id"] for g in data["groups"][:2]], "profile": {"customID": None},
+    }
+    return {"entities": data["entities"], "templates": data["templates"], "create payload": subject}
+
+
+def codecs() -> dict:
+    """name -> (loads, compact dumps, indented dumps), all bytes based."""
+    out = {
+        "stdlib": (
+            json.loads,
+            lambda o: json.dumps(o, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+            lambda o: json.dumps(o, ensure_ascii=False, indent=2).encode("utf-8"),
+        ),
+    }
+    if e10_json.orjson:
+        out["orjson"] = (
+            e10_json.orjson.loads,
+            e10_json.orjson.dumps,
+            lambda o: e10_json.orjson.dumps(o, option=e10_json.orjson.OPT_INDENT_2),
+        )
+    out[f"e10_json ({e10_json.CODEC})"] = (
+        e10_json.loads,
+        e10_json.dumps_bytes,
+        lambda o: e10_json.dumps_bytes(o, indent=True),
+    )
+    return out
+
+
+def best_ms(fn, arg, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(arg)
+        times.append((time.perf_counter() - t0) * 1000)
+    return min(times) if repeat < 3 else statistics.median(times)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="JSON codec benchmark on viewer payload shapes")
+    ap.add_argument("--entities", type=int, default=20000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    rows = []
+    for shape, obj in payloads(args.entities).items():
+        raw = json.dumps(obj).encode("utf-8")
+        outputs = {}
+        for name, (loads, dumps, dumps_indent) in codecs().items():
+            parse_ms = best_ms(loads, raw, args.repeat)
+            rows.append({
+                "payload": shape, "codec": name, "MB": round(len(raw) / 1e6, 2),
+                "parse ms": parse_ms,
+                "parse MB/s": len(raw) / 1e6 / (parse_ms / 1000) if parse_ms else float("nan"),
+                "dumps ms": best_ms(dumps, obj, args.repeat),
+                "dumps indent ms": best_ms(dumps_indent, obj, args.repeat),
+            })
+            outputs[name] = (dumps(obj), dumps_indent(obj))
+        if len(set(outputs.values())) > 1:
+            print(f"WARNING: codecs disagree on {shape}")
+
+    print(f"Active codec: {e10_json.CODEC} (E10_JSON_CODEC={e10_json.CODEC_SETTING})\n")
+    print(pd.DataFrame(rows).round(2).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# e10_api.py
+import hashlib
+import os
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin, urlsplit
+
+import pandas as pd
+import requests
+
+from e10_json import loads
+from e10_resilience import send
+
+try:
+    import brotli  # optional: enables "br"
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard  # optional: enables "zstd"
+except ImportError:
+    zstandard = None
+
+# ---------- Endpoints ----------
+# Related endpoints loaded together by the composite fetch
+COMPOSITE_ENDPOINTS = {
+    "entities": "api/entity/",
+    "groups": "api/entity/groups",
+    "templates": "api/template",
+}
+
+JSON_HEADERS = {"Accept": "application/json"}
+
+ACCEPT_ENCODING = ", ".join(
+    ["gzip", "deflate"] + (["br"] if brotli else []) + (["zstd"] if zstandard else [])
+)
+
+# Largest decoded body accepted; guards against decompression bombs
+MAX_RESPONSE_BYTES = int(float(os.environ.get("E10_MAX_RESPONSE_MB", "1024")) * 1024 * 1024)
+
+
+class ResponseTooLarge(requests.RequestException):
+    """The decoded body grew past max_bytes; the transfer was abandoned."""
+
+
+# ---------- Helpers ----------
+def build_url(site: str, endpoint: str) -> str:
+    site = (site or "").strip().rstrip("/")
+    if not site.startswith("http"):
+        site = "https://" + site
+    return urljoin(site + "/", endpoint.lstrip("/"))
+
+
+# ---------- Compression-aware transport ----------
+class _Deflate:
+    """deflate is zlib-wrapped per the RFC, but some servers send raw deflate."""
+
+    def __init__(self):
+        self._d = zlib.decompressobj()
+        self._first = True
+
+    @property
+    def unconsumed_tail(self) -> bytes:
+        return self._d.unconsumed_tail
+
+    def decompress(self, chunk: bytes, max_length: int = 0) -> bytes:
+        if self._first:
+            self._first = False
+            try:
+                return self._d.decompress(chunk, max_length)
+            except zlib.error:
+                self._d = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._d.decompress(chunk, max_length)
+
+    def flush(self) -> bytes:
+        return self._d.flush()
+
+
+class _Brotli:
+    def __init__(self):
+        self._d = brotli.Decompressor()
+
+    def decompress(self, chunk: bytes) -> bytes:
+        return self._d.process(chunk)
+
+    def flush(self) -> bytes:
+        return b""
+
+
+class _Identity:
+    def decompress(self, chunk: bytes) -> bytes:
+        return chunk
+
+    def flush(self) -> bytes:
+        return b""
+
+
+def _decoder(encoding: str):
+    if encoding in ("", "identity"):
+        return _Identity()
+    if encoding in ("gzip", "x-gzip"):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return _Deflate()
+    if encoding == "br" and brotli:
+        return _Brotli()
+    if encoding == "zstd" and zstandard:
+        return zstandard.ZstdDecompressor().decompressobj()
+    raise ValueError(f"Unsupported Content-Encoding: {encoding}")
+
+
+def get_raw(url: str, auth: requests.auth.AuthBase, timeout=(15, 180),
+            headers: dict | None = None, max_bytes: int = MAX_RESPONSE_BYTES) -> tuple[requests.Response, bytes, dict]:
+    """GET with negotiated compression.
+
+    The body is read undecoded and decompressed chunk by chunk so the wire size
+    and decode time can be recorded; it is still parsed in one go afterwards
+    (loads() needs the whole document). Raises ResponseTooLarge once more than
+    `max_bytes` have been decoded. Returns (response, decoded body, stats).
+    """
+    hdrs = {**JSON_HEADERS, "Accept-Encoding": ACCEPT_ENCODING, **(headers or {})}
+    t0 = time.perf_counter()
+    with send("GET", url, auth=auth, headers=hdrs, timeout=timeout, stream=True) as r:
+        encoding = r.headers.get("Content-Encoding", "").strip().lower()
+        dec = _decoder(encoding)
+        body = bytearray()
+        wire = 0
+        decode_s = 0.0
+        for chunk in r.raw.stream(64 * 1024, decode_content=False):
+            wire += len(chunk)
+            t = time.perf_counter()
+            # zlib decoders stop at the remaining room, so a small chunk can't expand without limit
+            room = max_bytes - len(body) + 1
+            body += dec.decompress(chunk, room) if hasattr(dec, "unconsumed_tail") else dec.decompress(chunk)
+            decode_s += time.perf_counter() - t
+            if len(body) > max_bytes or getattr(dec, "unconsumed_tail", b""):
+                raise ResponseTooLarge(f"{url}: decoded body exceeds {max_bytes / 1024 / 1024:g} MB", response=r)
+        body += dec.flush()
+    stats = {
+        "host": urlsplit(url).hostname,
+        "url": url,
+        "status": r.status_code,
+        "encoding": encoding or "identity",
+        "wire_bytes": wire,
+        "decoded_bytes": len(body),
+        "digest": hashlib.blake2b(body, digest_size=16).hexdigest(),
+        "decode_ms": round(decode_s * 1000, 2),
+        "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1),
+        "at": time.time(),
+    }
+    return r, bytes(body), stats
+
+
+def transfer_summary(log) -> pd.DataFrame:
+    """Wire vs decoded bytes per host across the given get_raw() stats."""
+    log = pd.DataFrame(list(log))
+    if log.empty:
+        return log
+    out = log.groupby("host").agg(
+        requests=("url", "size"),
+        wire_mb=("wire_bytes", lambda s: s.sum() / 1e6),
+        decoded_mb=("decoded_bytes", lambda s: s.sum() / 1e6),
+        decode_ms=("decode_ms", "sum"),
+        encodings=("encoding", lambda s: ", ".join(sorted(set(s)))),
+    )
+    out["saved_pct"] = (1 - out["wire_mb"] / out["decoded_mb"].where(out["decoded_mb"] > 0)) * 100
+    return out.round(3).reset_index()
+
+
+def get_json(site: str, endpoint: str, auth: requests.auth.AuthBase, timeout=(15, 180)):
+    """GET one endpoint and return (parsed JSON, transfer stats); raises on HTTP errors."""
+    r, body, stats = get_raw(build_url(site, endpoint), auth, timeout)
+    if r.status_code >= 400:
+        raise requests.HTTPError(f"HTTP {r.status_code}: {body[:500].decode('utf-8', 'replace')}", response=r)
+    return loads(body), stats
+
+
+def fetch_many(site: str, endpoints: dict[str, str], auth: requests.auth.AuthBase,
+               max_workers: int = 4, timeout=(15, 180)) -> tuple[dict, dict, dict]:
+    """Fetch several endpoints in parallel.
+
+    Returns (payloads, errors, stats), all keyed by the names in `endpoints`.
+    """
+    payloads, errors, stats = {}, {}, {}
+    if not endpoints:
+        return payloads, errors, stats
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(endpoints))) as pool:
+        futures = {
+            pool.submit(get_json, site, ep, auth, timeout): name
+            for name, ep in endpoints.items()
+        }
+        for fut in as_completed(futures):
+            name = futures[fut]
+            try:
+                payloads[name], stats[name] = fut.result()
+            except Exception as e:
+                errors[name] = e
+    return payloads, errors, stats
@@ -0,0 +1,88 @@
+# e10_auth.py
+import hashlib
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+from e10_api import JSON_HEADERS, build_url
+from e10_resilience import send
+
+# ---------- Settings (env overridable) ----------
+AUTH_TTL_SECONDS = float(os.environ.get("E10_AUTH_TTL_SECONDS", "600"))            # how long accepted credentials are trusted
+AUTH_REJECT_TTL_SECONDS = float(os.environ.get("E10_AUTH_REJECT_TTL_SECONDS", "30"))  # re-probe rejected ones after this
+
+# Small list most users that can read entities can read; only the status line is used
+PROBE_ENDPOINT = os.environ.get("E10_AUTH_PROBE_ENDPOINT", "api/entity/groups")
+# Only 401 means bad credentials; a 403 just says this user may not read the probe endpoint
+REJECT_STATUSES = (401,)
+
+_cache: dict[tuple, dict] = {}
+_cache_lock = threading.Lock()
+
+
+class AuthRejected(requests.HTTPError):
+    """The host refused the credentials (raised before any large request is sent)."""
+
+
+def _key(site: str, user: str, pwd: str) -> tuple:
+    # The password is only kept as a digest, so a changed password is a new key
+    host = urlsplit(build_url(site, "")).netloc.lower()
+    return host, user, hashlib.sha256(pwd.encode("utf-8")).hexdigest()
+
+
+# ---------- Probe ----------
+def probe(site: str, user: str, pwd: str, timeout=(5, 10), use_cache: bool = True) -> dict:
+    """Check credentials with one small request; the body is never read.
+
+    Returns {"ok", "status", "ms", "cached"}: ok is True (accepted), False
+    (401) or None (inconclusive, e.g. a 403 or a missing probe endpoint;
+    the real request then decides).
+    Accepted and rejected results are cached per (host, user, password).
+    """
+    key = _key(site, user, pwd)
+    if use_cache:
+        with _cache_lock:
+            hit = _cache.get(key)
+        if hit and hit["expires"] > time.monotonic():
+            return {**hit["result"], "cached": True}
+
+    t0 = time.perf_counter()
+    with send("GET", build_url(site, PROBE_ENDPOINT), retries=1, auth=requests.auth.HTTPBasicAuth(user, pwd),
+              headers=JSON_HEADERS, timeout=timeout, stream=True) as r:
+        status = r.status_code
+    ok = False if status in REJECT_STATUSES else True if status < 400 else None
+    result = {"ok": ok, "status": status, "ms": round((time.perf_counter() - t0) * 1000, 1), "cached": False}
+    if ok is not None:
+        ttl = AUTH_TTL_SECONDS if ok else AUTH_REJECT_TTL_SECONDS
+        with _cache_lock:
+            _cache[key] = {"result": result, "expires": time.monotonic() + ttl}
+    return result
+
+
+def require_auth(site: str, user: str, pwd: str, timeout=(5, 10)) -> dict:
+    """probe(), raising AuthRejected when the host refuses the credentials."""
+    result = probe(site, user, pwd, timeout)
+    if result["ok"] is False:
+        took = "cached" if result["cached"] else f"{result['ms']:.0f} ms"
+        raise AuthRejected(
+            f"HTTP {result['status']}: credentials rejected by {urlsplit(build_url(site, '')).netloc} ({took})"
+        )
+    return result
+
+
+def cached_auth(site: str, user: str, pwd: str) -> bool | None:
+    """Cached verdict for these credentials without any request (None if unknown or expired)."""
+    with _cache_lock:
+        hit = _cache.get(_key(site, user, pwd))
+    if hit and hit["expires"] > time.monotonic():
+        return hit["result"]["ok"]
+    return None
+
+
+def forget_auth(site: str, user: str, pwd: str):
+    """Drop a cached verdict, e.g. after a real request came back 401."""
+    with _cache_lock:
+        _cache.pop(_key(site, user, pwd), None)
@@ -0,0 +1,107 @@
+# e10_bulk.py
+import copy
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+import requests
+
+from e10_api import JSON_HEADERS, build_url
+from e10_json import dumps_bytes, response_json
+from e10_resilience import send
+
+# The subject detail is read, patched and written back to the same resource
+SUBJECT_PATH = "/api/entity/subject/{id}"
+
+
+# ---------- Patches ----------
+def apply_patch(record: dict, patch: dict) -> dict:
+    """Return a patched copy of `record`.
+
+    patch = {"set": {field: value}, "add_groupIds": [...], "remove_groupIds": [...]}
+    """
+    out = copy.deepcopy(record)
+    for field, value in (patch.get("set") or {}).items():
+        out[field] = value
+    add = [g for g in patch.get("add_groupIds") or [] if g]
+    remove = set(patch.get("remove_groupIds") or [])
+    if add or remove:
+        groups = [g for g in out.get("groupIds") or [] if g not in remove]
+        groups += [g for g in add if g not in groups]
+        out["groupIds"] = groups
+    return out
+
+
+def _show(value) -> str:
+    if value is None:
+        return ""
+    return json.dumps(value) if isinstance(value, (dict, list)) else str(value)
+
+
+def patch_diff(records: list[dict], patch: dict, id_field: str = "id") -> pd.DataFrame:
+    """One row per (id, field) that the patch would change."""
+    rows = []
+    for rec in records:
+        new = apply_patch(rec, patch)
+        for field in new:
+            if new.get(field) != rec.get(field):
+                rows.append((rec.get(id_field), field, _show(rec.get(field)), _show(new.get(field))))
+    return pd.DataFrame(rows, columns=[id_field, "field", "old_value", "new_value"])
+
+
+# ---------- Apply ----------
+def update_subject(site: str, auth: requests.auth.AuthBase, subject_id: str, patch: dict,
+                   timeout=30) -> dict:
+    """GET the subject, apply the patch and PUT it back. Returns a result row."""
+    url = build_url(site, SUBJECT_PATH.format(id=subject_id))
+    result = {"id": subject_id, "status": None, "result": "", "message": "", "record": None}
+    try:
+        r = send("GET", url, auth=auth, headers=JSON_HEADERS, timeout=timeout)
+        if not r.ok:
+            result.update(status=r.status_code, result="failed", message=f"read: {r.text[:200]}")
+            return result
+        result["status"] = r.status_code
+        try:
+            current = response_json(r)
+        except ValueError as e:
+            result.update(result="failed", message=f"read: not JSON ({e})")
+            return result
+        if not isinstance(current, dict):
+            result.update(result="failed", message=f"read: expected an object, got {type(current).__name__}")
+            return result
+        new = apply_patch(current, patch)
+        if new == current:
+            result.update(status=r.status_code, result="unchanged", record=current)
+            return result
+        w = send("PUT", url, auth=auth, timeout=timeout,
+                 headers={**JSON_HEADERS, "Content-Type": "application/json"}, data=dumps_bytes(new))
+        result["status"] = w.status_code
+        if w.ok:
+            try:
+                body = response_json(w)
+            except ValueError:
+                body = None
+            result.update(result="updated", record=body if isinstance(body, dict) and body.get("id") else new)
+        else:
+            result.update(result="failed", message=w.text[:200])
+    except requests.RequestException as e:
+        result.update(result="failed", message=str(e))
+    return result
+
+
+def bulk_update(site: str, auth: requests.auth.AuthBase, ids: list[str], patch: dict,
+                max_workers: int = 4, on_progress=None) -> list[dict]:
+    """Update many subjects concurrently; per-host limits come from send().
+
+    `on_progress(done, total)` is called from the calling thread.
+    """
+    results = []
+    if not ids:
+        return results
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(ids)))) as pool:
+        futures = [pool.submit(update_subject, site, auth, sid, patch) for sid in ids]
+        for fut in as_completed(futures):
+            results.append(fut.result())
+            if on_progress:
+                on_progress(len(results), len(ids))
+    return results
@@ -0,0 +1,83 @@
+# e10_cache.py
+import sys
+from collections import OrderedDict
+
+import pandas as pd
+
+
+# Object cells sampled per column when estimating their size
+SAMPLE_CELLS = 100
+
+
+def _object_nbytes(s: pd.Series) -> int:
+    """Python objects behind an object column, extrapolated from an evenly spaced sample."""
+    if s.empty:
+        return 0
+    sample = s.iloc[:: max(1, len(s) // SAMPLE_CELLS)].head(SAMPLE_CELLS)
+    return int(sum(sys.getsizeof(v) for v in sample) * len(s) / len(sample))
+
+
+def frame_nbytes(value, shared=()) -> int:
+    """Approximate in-memory size of a cached value.
+
+    Frames are measured shallowly, with object columns estimated from a sample,
+    so wide frames cost O(columns) rather than O(cells). Frames in `shared`
+    (e.g. the session's base frame returned unfiltered) are owned elsewhere and
+    count as 0.
+    """
+    if isinstance(value, pd.DataFrame):
+        if any(value is f for f in shared):
+            return 0
+        total = int(value.memory_usage(index=True, deep=False).sum())
+        return total + sum(_object_nbytes(value[c]) for c in value.columns[value.dtypes == object])
+    if isinstance(value, tuple):
+        return sum(frame_nbytes(v, shared) for v in value)
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    return 64
+
+
+class LRUCache:
+    """Least-recently-used cache bounded by entry count and total bytes."""
+
+    def __init__(self, max_items: int = 32, max_bytes: int | None = None, sizeof=frame_nbytes):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict = OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key, default=None):
+        if key not in self._items:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._items.move_to_end(key)
+        return self._items[key][0]
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return  # would evict everything else and still not fit
+        if key in self._items:
+            self.nbytes -= self._items.pop(key)[1]
+        self._items[key] = (value, size)
+        self.nbytes += size
+        while self._items and (
+            len(self._items) > self.max_items
+            or (self.max_bytes is not None and self.nbytes > self.max_bytes)
+        ):
+            _, (_, old_size) = self._items.popitem(last=False)
+            self.nbytes -= old_size
+
+    def clear(self):
+        self._items.clear()
+        self.nbytes = 0
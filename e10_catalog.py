@@ -0,0 +1,131 @@
+# e10_catalog.py
+import duckdb
+import pandas as pd
+
+from e10_store import data_path, read_json, write_json
+from e10_tables import quote_ident
+
+CATALOG_COLS = ["column", "group", "depth", "dtype", "null_ratio", "distinct"]
+
+
+# ---------- Catalog ----------
+def build_catalog(df: pd.DataFrame, lazy_paths=None) -> pd.DataFrame:
+    """One row per column: path group/depth, dtype, null ratio and distinct count.
+
+    Columns that are only known from lazy paths are listed with dtype "lazy".
+    """
+    rows = []
+    nulls = df.isna().mean() if len(df) else pd.Series(dtype=float)
+    for c in df.columns:
+        try:
+            distinct = int(df[c].nunique())
+        except TypeError:
+            distinct = int(df[c].astype(str).nunique())
+        rows.append((c, str(df[c].dtype), float(nulls.get(c, 0.0)), distinct))
+    for c in lazy_paths or ():
+        if c not in df.columns:
+            rows.append((c, "lazy", None, None))
+    return pd.DataFrame(
+        [(c, c.split(".", 1)[0], c.count(".") + 1, t, n, d) for c, t, n, d in rows],
+        columns=CATALOG_COLS,
+    )
+
+
+def update_catalog(catalog: pd.DataFrame, df: pd.DataFrame) -> pd.DataFrame:
+    """Replace the catalog rows of the columns in `df` (e.g. after lazy materialization)."""
+    fresh = build_catalog(df)
+    kept = catalog[~catalog["column"].isin(fresh["column"])]
+    order = {c: i for i, c in enumerate(catalog["column"])}
+    out = pd.concat([kept, fresh], ignore_index=True)
+    return out.sort_values("column", key=lambda s: s.map(order).fillna(len(order))).reset_index(drop=True)
+
+
+def search_catalog(catalog: pd.DataFrame, query: str, limit: int = 200) -> pd.DataFrame:
+    """Case-insensitive search: prefix matches first, then substring matches."""
+    q = (query or "").strip().lower()
+    if not q:
+        return catalog.head(limit)
+    names = catalog["column"].str.lower()
+    prefix = catalog[names.str.startswith(q)]
+    contains = catalog[names.str.contains(q, regex=False) & ~names.str.startswith(q)]
+    return pd.concat([prefix, contains]).head(limit)
+
+
+# ---------- Saved column sets ----------
+def _sets_path() -> str:
+    return data_path("column_sets.json")
+
+
+def _sets_key(client: str, endpoint: str) -> str:
+    return f"{(client or '').strip().lower()}|{(endpoint or '').strip().strip('/').lower()}"
+
+
+def load_column_sets(client: str, endpoint: str) -> dict[str, list[str]]:
+    return read_json(_sets_path(), {}).get(_sets_key(client, endpoint), {})
+
+
+def save_column_set(client: str, endpoint: str, name: str, cols: list[str]):
+    sets = read_json(_sets_path(), {})
+    sets.setdefault(_sets_key(client, endpoint), {})[name] = list(cols)
+    write_json(_sets_path(), sets)
+
+
+def delete_column_set(client: str, endpoint: str, name: str):
+    sets = read_json(_sets_path(), {})
+    sets.get(_sets_key(client, endpoint), {}).pop(name, None)
+    write_json(_sets_path(), sets)
+
+
+# ---------- Profiling ----------
+PROFILE_COLS = [
+    "column", "type", "rows", "nulls", "null_pct", "blank", "distinct",
+    "min", "max", "len_min", "len_max", "len_avg",
+]
+
+
+def _is_scalar(duck_type: str) -> bool:
+    return not any(t in duck_type for t in ("STRUCT", "MAP", "UNION", "[]", "LIST"))
+
+
+def profile_table(con: duckdb.DuckDBPyConnection, table: str = "api_data") -> pd.DataFrame:
+    """Per-column statistics computed in one aggregate query (a single columnar scan).
+
+    Null and blank counts, approximate distinct count, min/max and string
+    length stats; nested types only get null counts.
+    """
+    cols = [(r[0], r[1]) for r in con.execute(f"DESCRIBE {quote_ident(table)}").fetchall()]
+    exprs = ["count(*)"]
+    layout = []  # (column, type, [stat names in query order])
+    for name, typ in cols:
+        q = quote_ident(name)
+        stats = ["nonnull"]
+        exprs.append(f"count({q})")
+        if _is_scalar(typ):
+            stats += ["distinct", "min", "max"]
+            exprs += [f"approx_count_distinct({q})", f"CAST(min({q}) AS VARCHAR)", f"CAST(max({q}) AS VARCHAR)"]
+        if typ == "VARCHAR":
+            stats += ["blank", "len_min", "len_max", "len_avg"]
+            exprs += [
+                f"count(*) FILTER (WHERE trim({q}) = '')",
+                f"min(length({q}))", f"max(length({q}))", f"round(avg(length({q})), 1)",
+            ]
+        layout.append((name, typ, stats))
+    row = iter(con.execute(f"SELECT {', '.join(exprs)} FROM {quote_ident(table)}").fetchone())
+    n_rows = next(row)
+    out = []
+    for name, typ, stats in layout:
+        rec = {"column": name, "type": typ, "rows": n_rows}
+        rec.update(zip(stats, row))
+        rec["nulls"] = n_rows - rec.pop("nonnull")
+        rec["null_pct"] = round(100 * rec["nulls"] / n_rows, 1) if n_rows else 0.0
+        out.append(rec)
+    return pd.DataFrame(out, columns=PROFILE_COLS)
+
+
+def top_values(con: duckdb.DuckDBPyConnection, column: str, table: str = "api_data", k: int = 20) -> pd.DataFrame:
+    """Most frequent values of one column (nulls included)."""
+    q = quote_ident(column)
+    return con.execute(
+        f"SELECT CAST({q} AS VARCHAR) AS value, count(*) AS rows FROM {quote_ident(table)} "
+        f"GROUP BY 1 ORDER BY 2 DESC, 1 LIMIT {int(k)}"
+    ).fetchdf()
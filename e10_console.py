@@ -0,0 +1,81 @@
+# e10_console.py
+import csv
+import os
+import re
+import time
+
+import duckdb
+import pandas as pd
+
+from e10_store import duck_config
+
+# Statement types the console accepts; everything else (DDL, DML, COPY, SET...) is refused
+READ_ONLY_TYPES = {duckdb.StatementType.SELECT, duckdb.StatementType.EXPLAIN}
+
+
+def console_connection() -> duckdb.DuckDBPyConnection:
+    """Connection for user SQL: no file or network access, only registered frames.
+
+    Memory limit, threads and spill directory come from duck_config(); they
+    are applied before external access is switched off, which freezes the
+    temp directory, and the configuration is then locked.
+    """
+    con = duckdb.connect(config=duck_config())
+    con.execute("SET enable_external_access = false")
+    con.execute("SET lock_configuration = true")
+    return con
+
+
+def normalize_sql(sql: str) -> str:
+    """Whitespace-collapsed SQL without trailing semicolons (used as a cache key)."""
+    return re.sub(r"\s+", " ", (sql or "").strip()).rstrip("; ")
+
+
+def check_read_only(sql: str) -> str:
+    """Return the single statement in `sql`, or raise ValueError if it is not a read."""
+    statements = duckdb.extract_statements(sql)
+    if len(statements) != 1:
+        raise ValueError("Run exactly one statement at a time")
+    if statements[0].type not in READ_ONLY_TYPES:
+        raise ValueError(f"Only SELECT queries are allowed (got {statements[0].type.name})")
+    return normalize_sql(sql)
+
+
+def run_query(con: duckdb.DuckDBPyConnection, sql: str, limit: int) -> tuple[pd.DataFrame, bool, float]:
+    """Run a read-only query capped at `limit` rows; returns (df, truncated, seconds)."""
+    sql = check_read_only(sql)
+    t0 = time.perf_counter()
+    cur = con.execute(sql)
+    rows = cur.fetchmany(limit + 1)
+    cols = [d[0] for d in cur.description]
+    elapsed = time.perf_counter() - t0
+    return pd.DataFrame(rows[:limit], columns=cols), len(rows) > limit, elapsed
+
+
+def explain_analyze(con: duckdb.DuckDBPyConnection, sql: str) -> str:
+    sql = check_read_only(sql)
+    if sql.lower().startswith("explain"):
+        raise ValueError("Query is already an EXPLAIN")
+    rows = con.execute(f"EXPLAIN ANALYZE {sql}").fetchall()
+    return "\n".join(str(r[-1]) for r in rows)
+
+
+def export_csv(con: duckdb.DuckDBPyConnection, sql: str, path: str, chunk_rows: int = 50_000) -> int:
+    """Write the full result to `path` as CSV, pulled from DuckDB in chunks; returns the row count.
+
+    Rows go straight to disk, so the export never sits in memory as a whole.
+    """
+    cur = con.execute(check_read_only(sql))
+    tmp = path + ".tmp"
+    n = 0
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow([d[0] for d in cur.description])
+        while True:
+            rows = cur.fetchmany(chunk_rows)
+            if not rows:
+                break
+            w.writerows(rows)
+            n += len(rows)
+    os.replace(tmp, path)
+    return n
@@ -0,0 +1,139 @@
+# e10_detail.py
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+import pandas as pd
+import requests
+
+from e10_api import JSON_HEADERS, build_url
+from e10_bulk import SUBJECT_PATH
+from e10_cache import LRUCache
+from e10_json import response_json
+from e10_resilience import send
+from e10_tables import case_insensitive_col
+
+# ---------- Settings (env overridable) ----------
+DETAIL_TTL_SECONDS = float(os.environ.get("E10_DETAIL_TTL_SECONDS", "900"))
+DETAIL_WORKERS = int(os.environ.get("E10_DETAIL_WORKERS", "8"))
+DETAIL_CACHE_ITEMS = int(os.environ.get("E10_DETAIL_CACHE_ITEMS", "20000"))
+
+# (host, user, id) -> (record, expires); shared by every session in the process
+_cache = LRUCache(max_items=DETAIL_CACHE_ITEMS, sizeof=lambda value: 0)
+_cache_lock = threading.Lock()
+
+
+def _key(site: str, auth: requests.auth.AuthBase, subject_id: str) -> tuple:
+    # Per user, so one login never reads details cached under another
+    return urlsplit(build_url(site, "")).netloc.lower(), getattr(auth, "username", None), str(subject_id)
+
+
+def cached_detail(site: str, auth: requests.auth.AuthBase, subject_id: str) -> dict | None:
+    with _cache_lock:
+        hit = _cache.get(_key(site, auth, subject_id))
+    if hit and hit[1] > time.monotonic():
+        return hit[0]
+    return None
+
+
+def remember_detail(site: str, auth: requests.auth.AuthBase, record: dict, ttl: float = DETAIL_TTL_SECONDS):
+    """Cache a subject detail we already hold (e.g. a create read-back or bulk update result)."""
+    if isinstance(record, dict) and record.get("id"):
+        with _cache_lock:
+            _cache.put(_key(site, auth, record["id"]), (record, time.monotonic() + ttl))
+
+
+# ---------- Fetch ----------
+def fetch_detail(site: str, auth: requests.auth.AuthBase, subject_id: str, timeout=30,
+                 ttl: float = DETAIL_TTL_SECONDS) -> dict:
+    """GET one subject's detail (cache first). Returns a result row like update_subject's."""
+    result = {"id": subject_id, "status": None, "result": "", "message": "", "record": None}
+    record = cached_detail(site, auth, subject_id)
+    if record is not None:
+        result.update(result="cached", record=record)
+        return result
+    try:
+        r = send("GET", build_url(site, SUBJECT_PATH.format(id=subject_id)), auth=auth,
+                 headers=JSON_HEADERS, timeout=timeout)
+        result["status"] = r.status_code
+        if not r.ok:
+            result.update(result="failed", message=r.text[:200])
+            return result
+        record = response_json(r)
+        remember_detail(site, auth, record, ttl)
+        result.update(result="fetched", record=record)
+    except (requests.RequestException, ValueError) as e:
+        result.update(result="failed", message=str(e))
+    return result
+
+
+def fetch_details(site: str, auth: requests.auth.AuthBase, ids: list[str], max_workers: int = DETAIL_WORKERS,
+                  ttl: float = DETAIL_TTL_SECONDS, on_progress=None) -> list[dict]:
+    """Details for many subjects on a bounded thread pool; per-host limits come from send().
+
+    Cached ids are answered without a request. `on_progress(done, total)` is
+    called from the calling thread.
+    """
+    results = []
+    todo = []
+    for sid in dict.fromkeys(str(i) for i in ids):
+        record = cached_detail(site, auth, sid)
+        if record is not None:
+            results.append({"id": sid, "status": None, "result": "cached", "message": "", "record": record})
+        else:
+            todo.append(sid)
+    total = len(results) + len(todo)
+    if on_progress and results:
+        on_progress(len(results), total)
+    if not todo:
+        return results
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(todo)))) as pool:
+        futures = [pool.submit(fetch_detail, site, auth, sid, 30, ttl) for sid in todo]
+        for fut in as_completed(futures):
+            results.append(fut.result())
+            if on_progress:
+                on_progress(len(results), total)
+    return results
+
+
+# ---------- Merge ----------
+def detail_frame(records: list[dict], id_col: str, skip=()) -> pd.DataFrame:
+    """Flattened detail fields keyed by `id_col`, minus the columns in `skip`.
+
+    List-valued fields are left out; the list fetch already splits those
+    into child tables.
+    """
+    if not records:
+        return pd.DataFrame()
+    flat = pd.json_normalize(records)
+    flat_id = case_insensitive_col(flat, "id")
+    if not flat_id:
+        return pd.DataFrame()
+    skip = {c.lower() for c in skip}
+    extra = [
+        c for c in flat.columns
+        if c != flat_id and c.lower() not in skip
+        and not flat[c].map(lambda v: isinstance(v, (list, dict))).any()
+    ]
+    out = flat[[flat_id] + extra].rename(columns={flat_id: id_col})
+    out[id_col] = out[id_col].astype(str)
+    return out.drop_duplicates(subset=[id_col], keep="last")
+
+
+def merge_details(df: pd.DataFrame, details: pd.DataFrame) -> pd.DataFrame:
+    """Left-join detail columns onto `df` by id; rows without detail get nulls.
+
+    Columns already merged by an earlier enrichment are filled in, not duplicated.
+    """
+    id_col = case_insensitive_col(df, "id")
+    if details.empty or not id_col:
+        return df
+    keys = df[id_col].astype(str)
+    lookup = details.set_index(id_col)
+    out = df.copy()
+    for col in lookup.columns:
+        values = keys.map(lookup[col])
+        out[col] = values.combine_first(out[col]) if col in out.columns else values
+    return out
@@ -0,0 +1,253 @@
+# e10_governor.py
+import os
+import pickle
+import sys
+import threading
+import time
+
+from e10_cache import frame_nbytes
+from e10_store import DATA_DIR, data_path, live_datasets
+
+# ---------- Settings (env overridable) ----------
+IDLE_SECONDS = float(os.environ.get("E10_SESSION_IDLE_SECONDS", "1800"))   # evict after this long without a rerun
+BUDGET_MB = float(os.environ.get("E10_SESSION_BUDGET_MB", "2048"))         # all sessions together
+MIN_IDLE_SECONDS = float(os.environ.get("E10_SESSION_MIN_IDLE", "60"))    # budget eviction spares recently active tabs
+SWEEP_SECONDS = float(os.environ.get("E10_SESSION_SWEEP_SECONDS", "60"))
+SPILL_TTL_SECONDS = float(os.environ.get("E10_SPILL_TTL_SECONDS", str(24 * 3600)))
+
+# Spilled to disk and restored as-is
+SPILL_KEYS = ("data", "df", "related", "lazy", "catalog")
+# Derived state; rebuilt on demand after a restore
+DROP_KEYS = ("view_cache", "facets", "dup_index", "profile", "sql_cache", "sql_con_version")
+# Closed before they are dropped
+CONNECTION_KEYS = ("duck", "sql_con")
+
+
+# ---------- Footprint ----------
+def json_nbytes(obj, sample: int = 200) -> int:
+    """Rough in-memory size of parsed JSON; long lists are extrapolated from a sample."""
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(sys.getsizeof(k) + json_nbytes(v, sample) for k, v in obj.items())
+    if isinstance(obj, list):
+        if not obj:
+            return sys.getsizeof(obj)
+        head = obj[:sample]
+        return sys.getsizeof(obj) + sum(json_nbytes(v, sample) for v in head) * len(obj) // len(head)
+    return sys.getsizeof(obj)
+
+
+def footprint(state) -> int:
+    """Bytes held by a session's dataset and caches (raw records shared with `data` count once).
+
+    Frames shared through the store are not charged to any one session:
+    evicting it would not free them.
+    """
+    total = 0
+    if "data" in state:
+        total += json_nbytes(state["data"])
+    shared = tuple(live_datasets())
+    for key in ("df", "catalog"):
+        if key in state:
+            total += frame_nbytes(state[key], shared)
+    if "related" in state:
+        total += sum(frame_nbytes(v) for v in state["related"].values())
+    for key in ("view_cache", "sql_cache"):
+        if key in state:
+            total += state[key].nbytes
+    return total
+
+
+def close_connections(state):
+    for key in CONNECTION_KEYS:
+        if key in state:
+            try:
+                state[key].close()
+            except Exception:
+                pass
+            del state[key]
+
+
+# ---------- Spill files ----------
+def spill_path(session_id: str) -> str:
+    return data_path("spill", f"{session_id}.pkl")
+
+
+def spill(session_id: str, state) -> str:
+    """Write the session's dataset to disk (temp file + rename)."""
+    path = spill_path(session_id)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump({k: state[k] for k in SPILL_KEYS if k in state}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    return path
+
+
+def unspill(session_id: str) -> dict | None:
+    """Read back and delete a session's spill file (None if it is gone)."""
+    path = spill_path(session_id)
+    try:
+        with open(path, "rb") as f:
+            values = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    os.remove(path)
+    return values
+
+
+def discard_spill(session_id: str):
+    try:
+        os.remove(spill_path(session_id))
+    except OSError:
+        pass
+
+
+def prune_spills(ttl: float = SPILL_TTL_SECONDS):
+    """Remove spill files of sessions that never came back."""
+    folder = os.path.join(DATA_DIR, "spill")
+    if not os.path.isdir(folder):
+        return
+    cutoff = time.time() - ttl
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+# ---------- Governor ----------
+class SessionGovernor:
+    """Tracks per-session footprint and evicts idle sessions to disk.
+
+    A session is evicted when it has been idle for `idle_seconds`, or (least
+    recently used first) when all sessions together exceed `budget_bytes`.
+    Eviction spills the dataset, closes connections, drops caches and leaves
+    an "evicted" marker so the session restores itself on its next rerun.
+
+    A session is only evicted while its script is not running: touch()
+    records the script thread, a running script is skipped until a later
+    sweep, and a rerun that starts mid-eviction waits for it in touch().
+    `is_active(session_id)`, when given, reports whether the session is still
+    connected; sweeps unregister the ones that are not.
+    """
+
+    def __init__(self, idle_seconds: float = IDLE_SECONDS, budget_bytes: int = int(BUDGET_MB * 1024 * 1024),
+                 min_idle_seconds: float = MIN_IDLE_SECONDS, is_active=None):
+        self.idle_seconds = idle_seconds
+        self.budget_bytes = budget_bytes
+        self.min_idle_seconds = min_idle_seconds
+        self.is_active = is_active
+        self.evictions = 0
+        self._sessions: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def touch(self, session_id: str, state, version=None):
+        """Record a rerun from the session's script thread; footprint is re-measured when the dataset version changes."""
+        with self._lock:
+            entry = self._sessions.setdefault(
+                session_id, {"version": object(), "nbytes": 0, "script_lock": threading.Lock()})
+        # Waits out an eviction of this session that is already in progress
+        with entry["script_lock"]:
+            entry["thread"] = threading.current_thread()
+        with self._lock:
+            entry["state"] = state
+            entry["last_seen"] = time.monotonic()
+            if entry["version"] != version:
+                entry["version"] = version
+                entry["nbytes"] = 0 if "evicted" in state else footprint(state)
+            over = self.total_bytes() - self.budget_bytes
+        if over > 0:
+            self.enforce_budget(exclude=session_id)
+
+    def total_bytes(self) -> int:
+        return sum(e["nbytes"] for e in self._sessions.values())
+
+    def evict(self, session_id: str, reason: str) -> bool:
+        """Spill an idle session; False if there is nothing to free or its script is running."""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None or entry["nbytes"] == 0:
+                return False
+        with entry["script_lock"]:
+            thread = entry.get("thread")
+            if thread is not None and thread.is_alive():
+                return False  # retried on a later sweep
+            state = entry["state"]
+            with self._lock:
+                entry["nbytes"] = 0
+            if "evicted" in state or "df" not in state:
+                return False
+            path = spill(session_id, state)
+            close_connections(state)
+            for key in SPILL_KEYS + DROP_KEYS:
+                if key in state:
+                    del state[key]
+            state["evicted"] = {"reason": reason, "spill": path, "at": time.time()}
+        self.evictions += 1
+        return True
+
+    def enforce_budget(self, exclude: str | None = None):
+        """Evict least recently used sessions until the total fits the budget."""
+        now = time.monotonic()
+        with self._lock:
+            order = sorted(
+                (sid for sid, e in self._sessions.items()
+                 if sid != exclude and e["nbytes"] and now - e["last_seen"] >= self.min_idle_seconds),
+                key=lambda sid: self._sessions[sid]["last_seen"],
+            )
+        for sid in order:
+            if self.total_bytes() <= self.budget_bytes:
+                break
+            self.evict(sid, "memory budget")
+
+    def sweep(self):
+        """Forget disconnected sessions and ones idle past the spill TTL, then evict idle ones."""
+        now = time.monotonic()
+        with self._lock:
+            sessions = list(self._sessions.items())
+        for sid, e in sessions:
+            if now - e["last_seen"] >= SPILL_TTL_SECONDS or (self.is_active and not self.is_active(sid)):
+                self.forget(sid)
+            elif now - e["last_seen"] >= self.idle_seconds:
+                self.evict(sid, "idle")
+        prune_spills()
+
+    def forget(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        discard_spill(session_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "resident_mb": self.total_bytes() / 1e6,
+                "budget_mb": self.budget_bytes / 1e6,
+                "evictions": self.evictions,
+            }
+
+    def _sweeper(self, every: float):
+        while True:
+            time.sleep(every)
+            try:
+                self.sweep()
+            except Exception:
+                pass
+
+    def start(self, every: float = SWEEP_SECONDS):
+        threading.Thread(target=self._sweeper, args=(every,), daemon=True, name="session-governor").start()
+
+
+_governor = None
+_governor_lock = threading.Lock()
+
+
+def session_governor(is_active=None) -> SessionGovernor:
+    """Process-wide governor with its idle sweeper running (`is_active` is set on first use)."""
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            _governor = SessionGovernor(is_active=is_active)
+            _governor.start()
+        return _governor
@@ -0,0 +1,79 @@
+# e10_json.py
+import datetime as dt
+import json
+import math
+import os
+
+try:
+    import orjson  # optional: several times faster parse and serialize
+except ImportError:
+    orjson = None
+
+# "auto" picks orjson when installed; "stdlib" forces the json module
+CODEC_SETTING = os.environ.get("E10_JSON_CODEC", "auto").strip().lower()
+CODEC = "orjson" if orjson and CODEC_SETTING in ("auto", "orjson") else "stdlib"
+
+
+# ---------- Shared conventions ----------
+# Both codecs: UTF-8 output with non-ASCII kept as-is, dates as ISO 8601,
+# NaN/inf as null, compact separators or a 2-space indent.
+def _default(obj):
+    """Values neither codec handles natively: dates (incl. pandas Timestamps) and numpy scalars."""
+    if isinstance(obj, (dt.datetime, dt.date, dt.time)):
+        return obj.isoformat()
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    if hasattr(obj, "item"):
+        return obj.item()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _finite(obj):
+    """Copy with NaN/inf floats as None (stdlib would write invalid JSON)."""
+    if isinstance(obj, float) and not math.isfinite(obj):
+        return None
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    return obj
+
+
+# ---------- Codec ----------
+def loads(data: bytes | str):
+    """Parse JSON; input orjson rejects (e.g. NaN literals) falls back to stdlib.
+
+    orjson reads integers outside the 64-bit range as floats rather than
+    rejecting them, so with orjson such ids lose precision; set
+    E10_JSON_CODEC=stdlib where they must round-trip exactly.
+    """
+    if CODEC == "orjson":
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def dumps_bytes(obj, indent: bool = False) -> bytes:
+    if CODEC == "orjson":
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if indent else 0)
+        try:
+            return orjson.dumps(obj, default=_default, option=option)
+        except (orjson.JSONEncodeError, TypeError):
+            pass  # e.g. integers beyond 64 bits; stdlib writes them exactly
+    kwargs = {"indent": 2} if indent else {"separators": (",", ":")}
+    try:
+        text = json.dumps(obj, default=_default, ensure_ascii=False, allow_nan=False, **kwargs)
+    except ValueError:
+        text = json.dumps(_finite(obj), default=_default, ensure_ascii=False, **kwargs)
+    return text.encode("utf-8")
+
+
+def dumps(obj, indent: bool = False) -> str:
+    return dumps_bytes(obj, indent).decode("utf-8")
+
+
+def response_json(r):
+    """Drop-in for `r.json()` that goes through the active codec."""
+    return loads(r.content)
@@ -0,0 +1,171 @@
+# e10_normalize.py
+import os
+import pickle
+import queue
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from e10_tables import add_player_name_col
+
+# ---------- Settings (env overridable) ----------
+NORMALIZE_WORKERS = int(os.environ.get("E10_NORMALIZE_WORKERS", "") or os.cpu_count() or 1)
+PARALLEL_MIN_RECORDS = int(os.environ.get("E10_PARALLEL_MIN_RECORDS", "20000"))  # smaller payloads stay serial
+MIN_CHUNK = 2000
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+_idle: queue.Queue | None = None   # idle _Worker processes, shared by every session
+_workers: list = []
+_pool_lock = threading.Lock()
+
+
+class WorkerFailed(RuntimeError):
+    """A worker process died or could not be started."""
+
+
+def normalize_chunk(records: list) -> pd.DataFrame:
+    """Flatten one chunk of records and add "Player Name" (runs in a worker process)."""
+    return add_player_name_col(pd.json_normalize(records))
+
+
+def _chunks(records: list, workers: int) -> list[list]:
+    # A few chunks per worker keeps the pool busy when record widths vary
+    size = max(MIN_CHUNK, -(-len(records) // (workers * 4)))
+    return [records[i:i + size] for i in range(0, len(records), size)]
+
+
+# ---------- Worker processes ----------
+class _Worker:
+    """One `python -m e10_normalize` child; chunks go in on stdin and frames come back on stdout.
+
+    Started from this module rather than through multiprocessing, whose
+    spawned children re-run __main__ (under Streamlit, the app script).
+    """
+
+    def __init__(self):
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "e10_normalize"], cwd=HERE,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        )
+
+    def run(self, records: list) -> pd.DataFrame:
+        try:
+            pickle.dump(records, self.proc.stdin, protocol=pickle.HIGHEST_PROTOCOL)
+            self.proc.stdin.flush()
+            status, value = pickle.load(self.proc.stdout)
+        except (OSError, EOFError, pickle.UnpicklingError) as e:
+            raise WorkerFailed(f"normalize worker {self.proc.pid} exited ({e})") from e
+        if status != "ok":
+            raise WorkerFailed(value)
+        return value
+
+    def close(self):
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+def _worker_pool(workers: int) -> queue.Queue:
+    """Process-wide idle queue of worker processes, started on first use."""
+    global _idle
+    with _pool_lock:
+        if _idle is None:
+            try:
+                _workers[:] = [_Worker() for _ in range(workers)]
+            except OSError as e:
+                for w in _workers:
+                    w.close()
+                _workers.clear()
+                raise WorkerFailed(str(e)) from e
+            _idle = queue.Queue()
+            for w in _workers:
+                _idle.put(w)
+        return _idle
+
+
+def _drop_pool():
+    global _idle
+    with _pool_lock:
+        for w in _workers:
+            w.close()
+        _workers.clear()
+        _idle = None
+
+
+def _run_on(idle: queue.Queue, records: list) -> pd.DataFrame:
+    worker = idle.get()
+    try:
+        return worker.run(records)
+    finally:
+        idle.put(worker)
+
+
+def _serve():
+    """Worker loop: unpickle a chunk from stdin, answer ("ok", frame) or ("error", text) on stdout."""
+    stdin, stdout = sys.stdin.buffer, sys.stdout.buffer
+    sys.stdout = sys.stderr  # nothing else may write to the result pipe
+    while True:
+        try:
+            records = pickle.load(stdin)
+        except EOFError:
+            return
+        try:
+            reply = ("ok", normalize_chunk(records))
+        except Exception as e:
+            reply = ("error", f"{type(e).__name__}: {e}")
+        pickle.dump(reply, stdout, protocol=pickle.HIGHEST_PROTOCOL)
+        stdout.flush()
+
+
+# ---------- Merge ----------
+def union_concat(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate chunk frames over the union of their columns, in first-seen order.
+
+    A column whose dtype differs between chunks (e.g. all-None in one chunk,
+    float in another) is re-inferred over the whole column, as one
+    json_normalize over every record would have done.
+    """
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    columns = list(dict.fromkeys(c for f in frames for c in f.columns))
+    out = pd.concat(frames, ignore_index=True, sort=False)[columns]
+    mixed = [
+        c for c in columns
+        if len({str(f[c].dtype) for f in frames if c in f.columns}) > 1
+        or any(c not in f.columns for f in frames)
+    ]
+    if mixed:
+        out[mixed] = out[mixed].infer_objects()
+    if "Player Name" in out.columns:
+        out = out[["Player Name"] + [c for c in columns if c != "Player Name"]]
+    return out
+
+
+def normalize_records(records: list, workers: int | None = None) -> pd.DataFrame:
+    """json_normalize + "Player Name", split across worker processes for large record lists."""
+    workers = workers or NORMALIZE_WORKERS
+    if workers <= 1 or len(records) < PARALLEL_MIN_RECORDS:
+        return normalize_chunk(records)
+    chunks = _chunks(records, workers)
+    try:
+        idle = _worker_pool(workers)
+        with ThreadPoolExecutor(max_workers=min(workers, len(chunks))) as feeders:
+            frames = list(feeders.map(lambda chunk: _run_on(idle, chunk), chunks))
+    except WorkerFailed:
+        _drop_pool()
+        return normalize_chunk(records)
+    return union_concat(frames)
+
+
+if __name__ == "__main__":
+    _serve()
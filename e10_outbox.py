@@ -0,0 +1,403 @@
+# e10_outbox.py
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit
+
+import requests
+
+from e10_api import JSON_HEADERS, build_url, get_json
+from e10_bulk import SUBJECT_PATH
+from e10_json import dumps, dumps_bytes, loads, response_json
+from e10_resilience import BACKOFF_BASE, BACKOFF_CAP, CircuitOpenError, _never_sent, send
+from e10_store import data_path
+from e10_tables import records_of
+
+OUTBOX_FILE = "outbox.sqlite"
+CREATE_PATH = "/api/entity/subject"
+ROSTER_ENDPOINT = "api/entity/"
+
+log = logging.getLogger(__name__)
+
+# ---------- Settings (env overridable) ----------
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("E10_OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_POLL_SECONDS = float(os.environ.get("E10_OUTBOX_POLL_SECONDS", "2"))
+OUTBOX_LEASE_SECONDS = float(os.environ.get("E10_OUTBOX_LEASE_SECONDS", "600"))  # "sending" longer than this was interrupted
+
+# pending -> sending -> done | failed | review; cancelled by hand
+TERMINAL = ("done", "failed", "review", "cancelled")
+
+# (host, user) -> password; kept in memory only, so pending writes wait for a login after a restart
+_credentials: dict[tuple[str, str], str] = {}
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def host_of(site: str) -> str:
+    return urlsplit(build_url(site, "")).netloc.lower()
+
+
+def set_credentials(site: str, user: str, pwd: str, replace: bool = True):
+    """Let the worker send this login's queued writes for `site`.
+
+    With replace=False (a login the host has not confirmed) credentials
+    already held for this user are kept.
+    """
+    key = (host_of(site), user)
+    if replace or key not in _credentials:
+        _credentials[key] = pwd
+
+
+# ---------- Storage ----------
+def _connect() -> sqlite3.Connection:
+    """Short-lived autocommit connection; the viewer and writedata.py may share the file."""
+    global _schema_ready
+    con = sqlite3.connect(data_path(OUTBOX_FILE), timeout=30, isolation_level=None)
+    con.row_factory = sqlite3.Row
+    if not _schema_ready:
+        with _schema_lock:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS writes (
+                    key TEXT PRIMARY KEY, host TEXT, site TEXT, user TEXT, payload TEXT,
+                    baseline TEXT, status TEXT, attempts INTEGER DEFAULT 0, ambiguous INTEGER DEFAULT 0,
+                    last_error TEXT, result_id TEXT, response TEXT,
+                    created_at REAL, updated_at REAL, next_attempt REAL
+                )
+            """)
+            con.execute("CREATE INDEX IF NOT EXISTS writes_due ON writes (status, next_attempt)")
+            _schema_ready = True
+    return con
+
+
+def _row(r: sqlite3.Row | None) -> dict | None:
+    if r is None:
+        return None
+    out = dict(r)
+    for col in ("payload", "baseline", "response"):
+        out[col] = loads(out[col]) if out[col] else None
+    return out
+
+
+def _update(key: str, **fields):
+    fields["updated_at"] = time.time()
+    con = _connect()
+    try:
+        con.execute(f"UPDATE writes SET {', '.join(f'{k} = ?' for k in fields)} WHERE key = ?", [*fields.values(), key])
+    finally:
+        con.close()
+
+
+def new_key() -> str:
+    return str(uuid.uuid4())
+
+
+def enqueue_create(site: str, user: str, payload: dict, key: str | None = None,
+                   baseline: list[str] | None = None) -> str:
+    """Record a create before anything is sent; returns its idempotency key.
+
+    Re-enqueuing an existing key is a no-op. `baseline` lists ids of matching
+    subjects that existed beforehand; reconciliation ignores them. If None,
+    deliver() reads it from the roster before the first send.
+    """
+    key = key or new_key()
+    now = time.time()
+    con = _connect()
+    try:
+        con.execute(
+            "INSERT OR IGNORE INTO writes (key, host, site, user, payload, baseline, status, created_at, updated_at, next_attempt) "
+            "VALUES (?, ?, ?, ?, ?, ?, 'pending', ?, ?, ?)",
+            [key, host_of(site), site, user, dumps(payload), None if baseline is None else dumps(baseline), now, now, now],
+        )
+    finally:
+        con.close()
+    if _worker is not None:
+        _worker.wake()
+    return key
+
+
+def get_write(key: str) -> dict | None:
+    con = _connect()
+    try:
+        return _row(con.execute("SELECT * FROM writes WHERE key = ?", [key]).fetchone())
+    finally:
+        con.close()
+
+
+def list_writes(site: str | None = None, user: str | None = None, limit: int = 100) -> list[dict]:
+    """Newest first, optionally for one host and/or user."""
+    where, params = [], []
+    if site:
+        where.append("host = ?")
+        params.append(host_of(site))
+    if user:
+        where.append("user = ?")
+        params.append(user)
+    sql = "SELECT * FROM writes" + (f" WHERE {' AND '.join(where)}" if where else "")
+    con = _connect()
+    try:
+        rows = con.execute(sql + f" ORDER BY created_at DESC LIMIT {int(limit)}", params).fetchall()
+    finally:
+        con.close()
+    return [_row(r) for r in rows]
+
+
+def retry_now(key: str, skip_reconcile: bool = False):
+    """Queue a failed, held or waiting write for an immediate attempt.
+
+    `skip_reconcile` sends it even if an earlier attempt may have reached the
+    server (used after a person checked a "review" write).
+    """
+    fields = {"status": "pending", "next_attempt": time.time(), "attempts": 0}
+    if skip_reconcile:
+        fields["ambiguous"] = 0
+    con = _connect()
+    try:
+        con.execute(
+            f"UPDATE writes SET {', '.join(f'{k} = ?' for k in fields)}, updated_at = ? "
+            "WHERE key = ? AND status IN ('pending', 'failed', 'review')",
+            [*fields.values(), time.time(), key],
+        )
+    finally:
+        con.close()
+    if _worker is not None:
+        _worker.wake()
+
+
+def cancel(key: str):
+    con = _connect()
+    try:
+        con.execute(
+            "UPDATE writes SET status = 'cancelled', updated_at = ? WHERE key = ? AND status IN ('pending', 'failed', 'review')",
+            [time.time(), key],
+        )
+    finally:
+        con.close()
+
+
+def _claim(key: str) -> dict | None:
+    """pending -> sending, atomically, so two processes never send the same write."""
+    con = _connect()
+    try:
+        cur = con.execute(
+            "UPDATE writes SET status = 'sending', updated_at = ? WHERE key = ? AND status = 'pending'",
+            [time.time(), key],
+        )
+        if cur.rowcount != 1:
+            return None
+        return _row(con.execute("SELECT * FROM writes WHERE key = ?", [key]).fetchone())
+    finally:
+        con.close()
+
+
+def release_stale(lease: float = OUTBOX_LEASE_SECONDS):
+    """Writes left "sending" by a crashed process go back to pending, flagged for reconciliation."""
+    con = _connect()
+    try:
+        con.execute(
+            "UPDATE writes SET status = 'pending', ambiguous = 1, updated_at = ? WHERE status = 'sending' AND updated_at < ?",
+            [time.time(), time.time() - lease],
+        )
+    finally:
+        con.close()
+
+
+def due_keys(site: str | None = None, user: str | None = None) -> list[str]:
+    where, params = ["status = 'pending'", "next_attempt <= ?"], [time.time()]
+    if site:
+        where.append("host = ?")
+        params.append(host_of(site))
+    if user:
+        where.append("user = ?")
+        params.append(user)
+    con = _connect()
+    try:
+        return [r[0] for r in con.execute(
+            f"SELECT key FROM writes WHERE {' AND '.join(where)} ORDER BY created_at", params
+        ).fetchall()]
+    finally:
+        con.close()
+
+
+# ---------- Delivery ----------
+def _same_person(record: dict, payload: dict) -> bool:
+    def norm(v):
+        return str(v or "").strip().lower()
+    return (
+        norm(record.get("firstName")) == norm(payload.get("firstName"))
+        and norm(record.get("lastName")) == norm(payload.get("lastName"))
+        and norm(record.get("dateOfBirth"))[:10] == norm(payload.get("dateOfBirth"))[:10]
+    )
+
+
+def find_created(site: str, auth: requests.auth.AuthBase, payload: dict) -> list[dict]:
+    """Subjects on the server matching the payload's name and date of birth."""
+    roster, _ = get_json(site, ROSTER_ENDPOINT, auth)
+    return [r for r in records_of(roster) if isinstance(r, dict) and _same_person(r, payload)]
+
+
+def baseline_for(site: str, auth: requests.auth.AuthBase, payload: dict) -> list[str] | None:
+    """Ids of subjects already matching the payload, taken before it is queued (None if the roster can't be read)."""
+    try:
+        return [str(m.get("id")) for m in find_created(site, auth, payload)]
+    except (requests.RequestException, ValueError):
+        return None
+
+
+def _reschedule(row: dict, error: str, ambiguous: bool):
+    attempts = row["attempts"] + 1
+    if attempts >= OUTBOX_MAX_ATTEMPTS:
+        _update(row["key"], status="failed", attempts=attempts, last_error=error, ambiguous=int(ambiguous or row["ambiguous"]))
+        return
+    delay = min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempts))
+    _update(row["key"], status="pending", attempts=attempts, last_error=error,
+            ambiguous=int(ambiguous or row["ambiguous"]), next_attempt=time.time() + delay)
+
+
+def _read_back(site: str, auth: requests.auth.AuthBase, created: dict) -> dict:
+    try:
+        r = send("GET", build_url(site, SUBJECT_PATH.format(id=created.get("id"))), auth=auth,
+                 headers=JSON_HEADERS, timeout=30)
+        if r.ok:
+            return {**created, **response_json(r)}
+    except (requests.RequestException, ValueError):
+        pass
+    return created
+
+
+def deliver(key: str, pwd: str, timeout=45) -> dict | None:
+    """One delivery attempt for a pending write; returns the updated row (None if not claimable).
+
+    An attempt that may have reached the server (read timeout, dropped
+    connection, 5xx) marks the write ambiguous. Before an ambiguous write is
+    sent again the roster is searched for it: a match that is not in the
+    baseline completes it; a match with no baseline to compare is held for
+    review instead of risking a second create.
+
+    A write queued without a baseline gets one here, before anything of it
+    can have reached the server, so the caller never waits on the roster.
+    """
+    row = _claim(key)
+    if row is None:
+        return get_write(key)
+    site, payload = row["site"], row["payload"]
+    auth = requests.auth.HTTPBasicAuth(row["user"], pwd)
+
+    if row["baseline"] is None and not row["ambiguous"]:
+        row["baseline"] = baseline_for(site, auth, payload)
+        if row["baseline"] is not None:
+            _update(key, baseline=dumps(row["baseline"]))
+
+    if row["ambiguous"]:
+        try:
+            matches = find_created(site, auth, payload)
+        except Exception as e:
+            _reschedule(row, f"reconcile: {e}", True)
+            return get_write(key)
+        baseline = set(row["baseline"]) if row["baseline"] is not None else None
+        fresh = [m for m in matches if baseline is not None and str(m.get("id")) not in baseline]
+        if fresh:
+            _update(key, status="done", result_id=str(fresh[0].get("id")), response=dumps(fresh[0]),
+                    last_error="reconciled: created by an earlier attempt")
+            return get_write(key)
+        if matches and baseline is None:
+            ids = ", ".join(str(m.get("id")) for m in matches[:3])
+            _update(key, status="review", last_error=f"may already exist ({ids}); not re-sent")
+            return get_write(key)
+
+    headers = {**JSON_HEADERS, "Content-Type": "application/json", "Idempotency-Key": key}
+    try:
+        r = send("POST", build_url(site, CREATE_PATH), retries=0, auth=auth, headers=headers,
+                 data=dumps_bytes(payload), timeout=timeout)
+    except CircuitOpenError as e:
+        _reschedule(row, str(e), False)
+        return get_write(key)
+    except requests.RequestException as e:
+        _reschedule(row, str(e), not _never_sent(e))
+        return get_write(key)
+    except Exception as e:
+        # Unknown whether anything went out, so reconcile before the next send
+        _reschedule(row, f"{type(e).__name__}: {e}", True)
+        return get_write(key)
+
+    if r.ok:
+        try:
+            created = response_json(r)
+        except ValueError:
+            created = {}
+        record = _read_back(site, auth, created) if created.get("id") else created
+        _update(key, status="done", attempts=row["attempts"] + 1, result_id=str(created.get("id") or ""),
+                response=dumps(record), last_error=None)
+    elif r.status_code == 429 or r.status_code >= 500:
+        _reschedule(row, f"HTTP {r.status_code}: {r.text[:200]}", r.status_code >= 500)
+    else:
+        # 4xx: the server refused this payload or login; retrying cannot help
+        _update(key, status="failed", attempts=row["attempts"] + 1, last_error=f"HTTP {r.status_code}: {r.text[:300]}")
+    return get_write(key)
+
+
+def drain(keys: list[str], pwd: str, on_update=None) -> list[dict]:
+    """Deliver `keys` in the foreground until each is done, failed or held (for scripts)."""
+    while True:
+        release_stale()
+        rows = {k: get_write(k) for k in keys}
+        open_rows = [r for r in rows.values() if r and r["status"] not in TERMINAL]
+        if not open_rows:
+            return list(rows.values())
+        due = [r for r in open_rows if r["status"] == "pending" and r["next_attempt"] <= time.time()]
+        for r in due:
+            row = deliver(r["key"], pwd)
+            if on_update and row:
+                on_update(row)
+        if not due:
+            wake = min((r["next_attempt"] for r in open_rows if r["status"] == "pending"), default=time.time() + 1)
+            time.sleep(max(0.05, min(OUTBOX_POLL_SECONDS, wake - time.time())))
+
+
+# ---------- Worker ----------
+class OutboxWorker:
+    """Background thread that delivers due writes for every login it has credentials for."""
+
+    def __init__(self, poll_seconds: float = OUTBOX_POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self._event = threading.Event()
+
+    def wake(self):
+        self._event.set()
+
+    def run_once(self):
+        release_stale()
+        for key in due_keys():
+            row = get_write(key)
+            pwd = _credentials.get((row["host"], row["user"])) if row else None
+            if pwd is not None:
+                deliver(key, pwd)
+
+    def _loop(self):
+        while True:
+            self._event.wait(self.poll_seconds)
+            self._event.clear()
+            try:
+                self.run_once()
+            except Exception:
+                log.exception("outbox worker pass failed")
+
+    def start(self):
+        threading.Thread(target=self._loop, daemon=True, name="write-outbox").start()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def outbox_worker() -> OutboxWorker:
+    """Process-wide outbox worker, started on first use."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = OutboxWorker()
+            _worker.start()
+        return _worker
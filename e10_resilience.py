@@ -0,0 +1,174 @@
+# e10_resilience.py
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+# ---------- Settings (env overridable) ----------
+RATE_PER_SEC = float(os.environ.get("E10_RATE_PER_SEC", "5"))     # sustained requests per host
+RATE_BURST = int(os.environ.get("E10_RATE_BURST", "10"))          # bucket size
+MAX_RETRIES = int(os.environ.get("E10_MAX_RETRIES", "3"))
+BACKOFF_BASE = float(os.environ.get("E10_BACKOFF_BASE", "0.5"))   # seconds, doubled per attempt
+BACKOFF_CAP = float(os.environ.get("E10_BACKOFF_CAP", "30"))
+BREAKER_THRESHOLD = int(os.environ.get("E10_BREAKER_THRESHOLD", "5"))  # consecutive failures
+BREAKER_COOLDOWN = float(os.environ.get("E10_BREAKER_COOLDOWN", "30"))  # seconds open
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without touching the network while a host's breaker is open."""
+
+
+# ---------- Per-host state ----------
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """closed -> open after N consecutive failures -> half-open after a cooldown."""
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.trial_running:
+                self.trial_running = True  # let a single probe through
+                return True
+            return False
+
+    def record(self, ok: bool):
+        with self.lock:
+            self.trial_running = False
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+            else:
+                self.failures += 1
+                if self.failures >= self.threshold or self.opened_at is not None:
+                    self.opened_at = time.monotonic()
+
+
+_hosts: dict[str, tuple[TokenBucket, CircuitBreaker]] = {}
+_hosts_lock = threading.Lock()
+
+
+def host_state(host: str) -> tuple[TokenBucket, CircuitBreaker]:
+    with _hosts_lock:
+        if host not in _hosts:
+            _hosts[host] = (TokenBucket(RATE_PER_SEC, RATE_BURST), CircuitBreaker(BREAKER_THRESHOLD, BREAKER_COOLDOWN))
+        return _hosts[host]
+
+
+def breaker_states() -> dict[str, str]:
+    with _hosts_lock:
+        return {h: b.state for h, (_, b) in _hosts.items()}
+
+
+# ---------- Retry ----------
+def _retry_after(r: requests.Response) -> float | None:
+    value = r.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _never_sent(e: requests.RequestException) -> bool:
+    """True when the request provably never reached the server."""
+    if isinstance(e, requests.ConnectTimeout):
+        return True
+    reason = getattr(e.args[0], "reason", None) if e.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def _backoff(attempt: int) -> float:
+    """Full jitter: uniform in [0, base * 2^attempt], capped."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+
+def send(method: str, url: str, idempotent: bool | None = None, retries: int = MAX_RETRIES,
+         session: requests.Session | None = None, **kwargs) -> requests.Response:
+    """requests.request with per-host rate limiting, retries and a circuit breaker.
+
+    Idempotent requests retry on connection errors, timeouts, 429 and 5xx.
+    Non-idempotent ones (POST by default) only retry when the server cannot
+    have acted on them: connect failures and 429.
+    """
+    method = method.upper()
+    if idempotent is None:
+        idempotent = method in IDEMPOTENT_METHODS
+    host = urlsplit(url).netloc
+    bucket, breaker = host_state(host)
+    do = (session or requests).request
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {host}; too many recent failures")
+        bucket.acquire()
+        try:
+            r = do(method, url, **kwargs)
+        except requests.RequestException as e:
+            breaker.record(False)
+            if attempt >= retries or not (idempotent or _never_sent(e)):
+                raise
+            time.sleep(_backoff(attempt))
+            attempt += 1
+            continue
+
+        failed = r.status_code in RETRY_STATUSES
+        breaker.record(not failed or r.status_code == 429)
+        retryable = r.status_code == 429 or (failed and idempotent)
+        if not retryable or attempt >= retries:
+            return r
+        wait = _retry_after(r)
+        r.close()
+        time.sleep(min(BACKOFF_CAP, wait) if wait is not None else _backoff(attempt))
+        attempt += 1
@@ -0,0 +1,162 @@
+# e10_schema.py
+import re
+import threading
+
+import pandas as pd
+
+from e10_store import data_path, read_json, write_json
+
+# Column dtypes the registry can declare; "string" means "leave as text"
+DTYPES = ("datetime", "int", "float", "bool", "string")
+
+ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}([T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?)?$")
+
+TZ_SUFFIX = r"(Z|[+-]\d{2}:?\d{2})$"
+
+# Where ARMS sites usually publish their API description
+SWAGGER_PATHS = ("swagger/v1/swagger.json", "swagger/docs/v1")
+
+# OpenAPI (type, format) -> registry dtype
+SWAGGER_TYPES = {
+    ("string", "date-time"): "datetime",
+    ("string", "date"): "datetime",
+    ("integer", None): "int",
+    ("number", None): "float",
+    ("boolean", None): "bool",
+}
+
+
+def schema_key(endpoint: str) -> str:
+    return (endpoint or "").strip().strip("/").lower()
+
+
+# ---------- Registry ----------
+def _registry_path() -> str:
+    return data_path("schemas.json")
+
+
+def load_schema(endpoint: str) -> dict[str, str]:
+    return read_json(_registry_path(), {}).get(schema_key(endpoint), {})
+
+
+# Serializes read-modify-write of the registry file; write_json replaces it atomically
+_registry_lock = threading.Lock()
+
+
+def save_schema(endpoint: str, schema: dict[str, str]):
+    with _registry_lock:
+        reg = read_json(_registry_path(), {})
+        reg[schema_key(endpoint)] = dict(sorted(schema.items()))
+        write_json(_registry_path(), reg)
+
+
+def register_schema(endpoint: str, schema: dict[str, str]) -> dict[str, str]:
+    """Add columns the endpoint has not registered yet (existing entries win); returns the result."""
+    with _registry_lock:
+        reg = read_json(_registry_path(), {})
+        current = reg.get(schema_key(endpoint), {})
+        merged = {**schema, **current}
+        if merged != current:
+            reg[schema_key(endpoint)] = dict(sorted(merged.items()))
+            write_json(_registry_path(), reg)
+        return merged
+
+
+# ---------- Inference ----------
+def infer_dtype(s: pd.Series, sample: int = 500) -> str:
+    if pd.api.types.is_bool_dtype(s):
+        return "bool"
+    if pd.api.types.is_integer_dtype(s):
+        return "int"
+    if pd.api.types.is_float_dtype(s):
+        vals = s.dropna()
+        return "int" if len(vals) and (vals % 1 == 0).all() else "float"
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return "datetime"
+    head = s.dropna().head(sample)
+    if len(head) and head.map(lambda v: isinstance(v, str) and bool(ISO_DATE.match(v))).all():
+        return "datetime"
+    return "string"
+
+
+def infer_schema(df: pd.DataFrame) -> dict[str, str]:
+    return {c: infer_dtype(df[c]) for c in df.columns}
+
+
+def schema_from_swagger(doc: dict) -> dict[str, str]:
+    """Property name -> dtype across all swagger/OpenAPI schemas.
+
+    Names declared with conflicting types are left out.
+    """
+    schemas = (doc.get("components") or {}).get("schemas") or doc.get("definitions") or {}
+    found: dict[str, str | None] = {}
+    for spec in schemas.values():
+        for prop, p in (spec.get("properties") or {}).items():
+            dtype = SWAGGER_TYPES.get((p.get("type"), p.get("format"))) or SWAGGER_TYPES.get((p.get("type"), None))
+            if not dtype:
+                continue
+            if prop in found and found[prop] != dtype:
+                found[prop] = None
+            else:
+                found.setdefault(prop, dtype)
+    return {k: v for k, v in found.items() if v}
+
+
+# ---------- Ingestion ----------
+def _convert(s: pd.Series, dtype: str) -> pd.Series:
+    if dtype == "datetime":
+        if pd.api.types.is_datetime64_any_dtype(s):
+            return s
+        if not pd.api.types.is_object_dtype(s) and not pd.api.types.is_string_dtype(s) and s.notna().any():
+            return s  # numbers are not dates; leave them for the user to see
+        # Keep the wall-clock value; converting offsets to UTC would shift dates of birth
+        text = s.astype(str).where(s.notna()).str.replace(TZ_SUFFIX, "", regex=True)
+        return pd.to_datetime(text, errors="coerce", format="ISO8601")
+    if dtype == "int":
+        if pd.api.types.is_integer_dtype(s) and s.dtype.name == "Int64":
+            return s
+        num = pd.to_numeric(s, errors="coerce")
+        return num.astype("Int64") if (num.dropna() % 1 == 0).all() else num
+    if dtype == "float":
+        return pd.to_numeric(s, errors="coerce").astype("float64")
+    if dtype == "bool":
+        return s.astype("boolean")
+    return s
+
+
+def apply_schema(df: pd.DataFrame, schema: dict[str, str]) -> pd.DataFrame:
+    """Parse declared columns once; undeclared or unparsable columns are left as-is."""
+    out = df
+    for col, dtype in schema.items():
+        if col not in df.columns or dtype == "string":
+            continue
+        try:
+            converted = _convert(df[col], dtype)
+        except (TypeError, ValueError):
+            continue
+        if converted is not df[col]:
+            if out is df:
+                out = df.copy()
+            out[col] = converted
+    return out
+
+
+def ingest(df: pd.DataFrame, endpoint: str, register: bool = True) -> tuple[pd.DataFrame, dict[str, str]]:
+    """Apply the endpoint's registered schema, inferring columns it does not declare yet.
+
+    Only full fetches should `register` what they infer. A few rows (a
+    created record, a detail batch) are typed provisionally: nothing is
+    saved and integral floats are not narrowed to int. All-null columns
+    carry no evidence and are never registered.
+    """
+    schema = load_schema(endpoint)
+    new_cols = [c for c in df.columns if c not in schema]
+    if new_cols:
+        inferred = infer_schema(df[new_cols])
+        if register:
+            schema = register_schema(endpoint, {c: d for c, d in inferred.items() if df[c].notna().any()})
+        else:
+            inferred = {c: d for c, d in inferred.items()
+                        if not (d == "int" and pd.api.types.is_float_dtype(df[c]))}
+        schema = {**inferred, **schema}
+    return apply_schema(df, schema), schema
@@ -0,0 +1,190 @@
+# e10_search.py
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+import requests
+
+from e10_api import get_json
+from e10_auth import require_auth
+from e10_store import DuckEngine, data_path
+from e10_tables import case_insensitive_col, records_of
+
+INDEX_FILE = "search_index.duckdb"
+
+DATE_TOKEN = re.compile(r"^(\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{4})$")
+
+_index = None
+_index_lock = threading.Lock()
+
+
+# ---------- Index file ----------
+def search_index() -> DuckEngine:
+    """Process-wide engine over the on-disk people index (created on first use)."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = DuckEngine(data_path(INDEX_FILE))
+            cur = _index.cursor()
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS people (
+                    host VARCHAR, id VARCHAR, first_name VARCHAR, last_name VARCHAR,
+                    full_name VARCHAR, name_lc VARCHAR, dob DATE, contact_type INTEGER,
+                    indexed_at TIMESTAMP, PRIMARY KEY (host, id)
+                )
+            """)
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS hosts (
+                    host VARCHAR PRIMARY KEY, rows INTEGER, endpoint VARCHAR, indexed_at TIMESTAMP
+                )
+            """)
+        return _index
+
+
+def host_key(site: str) -> str:
+    """Site as typed or picked (with or without scheme) -> bare lower-case host."""
+    s = (site or "").strip().lower()
+    s = re.sub(r"^https?://", "", s)
+    return s.split("/")[0]
+
+
+# ---------- Build / refresh ----------
+def people_frame(df: pd.DataFrame, host: str) -> pd.DataFrame:
+    """Index rows (host, id, names, dob, contact type) from an entity frame."""
+    id_col = case_insensitive_col(df, "id")
+    if not id_col or df.empty:
+        return pd.DataFrame()
+    def col(name):
+        c = case_insensitive_col(df, name)
+        return df[c] if c else pd.Series(None, index=df.index, dtype="object")
+    first = col("firstName").fillna("").astype(str).str.strip()
+    last = col("lastName").fillna("").astype(str).str.strip()
+    full = (first + " " + last).str.strip()
+    dob = col("dateOfBirth")
+    if not pd.api.types.is_datetime64_any_dtype(dob):
+        dob = pd.to_datetime(dob.astype("string").str.slice(0, 10), errors="coerce", format="%Y-%m-%d")
+    return pd.DataFrame({
+        "host": host_key(host),
+        "id": df[id_col].astype(str),
+        "first_name": first,
+        "last_name": last,
+        "full_name": full,
+        "name_lc": full.str.lower(),
+        "dob": dob.dt.date,
+        "contact_type": pd.to_numeric(col("contactType"), errors="coerce").astype("Int64"),
+    }).drop_duplicates(subset=["id"], keep="last")
+
+
+def index_people(df: pd.DataFrame, host: str, endpoint: str = "api/entity/") -> int:
+    """Replace `host`'s rows in the index with the people in `df` (a full entity fetch)."""
+    rows = people_frame(df, host)
+    if rows.empty:
+        return 0
+    with search_index().writing() as cur:
+        cur.register("_incoming", rows)
+        try:
+            cur.execute("BEGIN")
+            cur.execute("DELETE FROM people WHERE host = ?", [host_key(host)])
+            cur.execute("INSERT INTO people SELECT *, now() FROM _incoming")
+            cur.execute(
+                "INSERT OR REPLACE INTO hosts VALUES (?, ?, ?, now())",
+                [host_key(host), len(rows), endpoint],
+            )
+            cur.execute("COMMIT")
+        except Exception:
+            cur.execute("ROLLBACK")
+            raise
+        finally:
+            cur.unregister("_incoming")
+    return len(rows)
+
+
+def upsert_people(df: pd.DataFrame, host: str) -> int:
+    """Add or update individual people (e.g. a created subject) without touching the rest."""
+    rows = people_frame(df, host)
+    if rows.empty:
+        return 0
+    with search_index().writing() as cur:
+        cur.register("_incoming", rows)
+        try:
+            cur.execute("INSERT OR REPLACE INTO people SELECT *, now() FROM _incoming")
+        finally:
+            cur.unregister("_incoming")
+    return len(rows)
+
+
+def refresh_hosts(hosts: list[str], auth: requests.auth.AuthBase, endpoint: str = "api/entity/",
+                  max_workers: int = 6, on_progress=None) -> tuple[dict[str, int], dict[str, Exception]]:
+    """Fetch `endpoint` from every host in parallel and re-index each; returns (rows, errors) per host."""
+    indexed, errors = {}, {}
+    if not hosts:
+        return indexed, errors
+
+    def fetch(host):
+        # Hosts that refuse the credentials fail on the probe instead of a full roster transfer
+        if isinstance(auth, requests.auth.HTTPBasicAuth):
+            require_auth(host, auth.username, auth.password)
+        return get_json(host, endpoint, auth)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(hosts))) as pool:
+        futures = {pool.submit(fetch, h): h for h in hosts}
+        for done, fut in enumerate(as_completed(futures), 1):
+            host = futures[fut]
+            try:
+                payload, _ = fut.result()
+                indexed[host] = index_people(pd.json_normalize(records_of(payload)), host, endpoint)
+            except Exception as e:
+                errors[host] = e
+            if on_progress:
+                on_progress(done, len(hosts))
+    return indexed, errors
+
+
+# ---------- Query ----------
+def _as_date(token: str):
+    fmt = "%Y-%m-%d" if "-" in token else "%d/%m/%Y"
+    try:
+        return pd.to_datetime(token, format=fmt).date()
+    except ValueError:
+        return None
+
+
+def search_people(query: str, limit: int = 200) -> tuple[pd.DataFrame, float]:
+    """Match every token against names, id prefixes or an exact date of birth.
+
+    Returns (matches, milliseconds); exact and prefix name matches rank first.
+    """
+    tokens = [t for t in re.split(r"[\s,]+", (query or "").strip().lower()) if t]
+    if not tokens:
+        return pd.DataFrame(), 0.0
+    where, params = [], []
+    for t in tokens:
+        d = _as_date(t) if DATE_TOKEN.match(t) else None
+        if d:
+            where.append("dob = ?")
+            params.append(d)
+        else:
+            where.append("(name_lc LIKE ? OR lower(id) LIKE ?)")
+            params += [f"%{t}%", f"{t}%"]
+    text = " ".join(t for t in tokens if not DATE_TOKEN.match(t))
+    sql = f"""
+        SELECT host, full_name AS name, dob AS "date of birth", contact_type AS "contactType", id,
+               indexed_at AS "indexed at"
+        FROM people
+        WHERE {' AND '.join(where)}
+        ORDER BY (name_lc = ?) DESC, (name_lc LIKE ? OR lower(last_name) LIKE ?) DESC,
+                 last_name, first_name, host
+        LIMIT {int(limit)}
+    """
+    params += [text, f"{text}%", f"{text}%"]
+    t0 = time.perf_counter()
+    out = search_index().cursor().execute(sql, params).fetchdf()
+    return out, (time.perf_counter() - t0) * 1000
+
+
+def indexed_hosts() -> pd.DataFrame:
+    return search_index().cursor().execute(
+        "SELECT host, rows, endpoint, indexed_at AS \"indexed at\" FROM hosts ORDER BY host"
+    ).fetchdf()
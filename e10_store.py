@@ -0,0 +1,349 @@
+# e10_store.py
+import datetime as dt
+import json
+import os
+import re
+import tempfile
+import threading
+import weakref
+from contextlib import contextmanager
+
+import duckdb
+import pandas as pd
+
+from e10_tables import quote_ident
+
+# Local state (saved column sets, snapshots, ...) lives under one directory
+DATA_DIR = os.environ.get("ARMS_VIEWER_DATA", ".viewer_data")
+
+
+# ---------- DuckDB settings (env overridable) ----------
+DUCKDB_PATH = os.environ.get("E10_DUCKDB_PATH", "")                 # empty = one shared in-memory engine
+DUCKDB_MEMORY_LIMIT = os.environ.get("E10_DUCKDB_MEMORY_LIMIT", "")  # e.g. "2GB"
+DUCKDB_THREADS = os.environ.get("E10_DUCKDB_THREADS", "")
+DUCKDB_MAX_QUERIES = int(os.environ.get("E10_DUCKDB_MAX_QUERIES", "") or os.cpu_count() or 4)  # concurrent queries
+DUCKDB_TEMP_DIR = os.environ.get("E10_DUCKDB_TEMP_DIR", "") or os.path.join(DATA_DIR, "duck_tmp")
+
+
+def data_path(*parts: str) -> str:
+    """Path under DATA_DIR; parent folders are created on demand."""
+    path = os.path.join(DATA_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def read_json(path: str, default=None):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def write_json(path: str, obj):
+    """Write via a temp file so a crash never leaves half a file behind."""
+    # Unique temp name, so concurrent writers never share one
+    fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(obj, f, indent=2)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+# ---------- Snapshots ----------
+def _slug(s: str) -> str:
+    return re.sub(r"\W+", "_", (s or "").strip().lower()).strip("_") or "_"
+
+
+def _sql_str(s: str) -> str:
+    return s.replace("'", "''")
+
+
+def snapshot_dir(client: str, endpoint: str) -> str:
+    return os.path.join(DATA_DIR, "snapshots", _slug(client), _slug(endpoint))
+
+
+def _parquet_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """Nested values that are still in object cells are stored as JSON text."""
+    out = df.copy()
+    for c in out.columns[out.dtypes == object]:
+        if out[c].map(lambda v: isinstance(v, (dict, list))).any():
+            out[c] = out[c].map(lambda v: json.dumps(v) if isinstance(v, (dict, list)) else v)
+    return out
+
+
+# Microseconds keep two saves within the same second apart; older files have none
+SNAPSHOT_STAMP = "%Y%m%dT%H%M%S_%f"
+LEGACY_SNAPSHOT_STAMP = "%Y%m%dT%H%M%S"
+
+
+def _snapshot_time(name: str) -> dt.datetime:
+    try:
+        return dt.datetime.strptime(name, SNAPSHOT_STAMP)
+    except ValueError:
+        return dt.datetime.strptime(name, LEGACY_SNAPSHOT_STAMP)
+
+
+def save_snapshot(df: pd.DataFrame, client: str, endpoint: str) -> str:
+    """Store `df` as a zstd-compressed Parquet file named by timestamp."""
+    stamp = dt.datetime.now().strftime(SNAPSHOT_STAMP)
+    path = data_path("snapshots", _slug(client), _slug(endpoint), f"{stamp}.parquet")
+    con = duckdb.connect(config=duck_config())
+    try:
+        con.register("snap", _parquet_safe(df))
+        con.execute(f"COPY snap TO '{_sql_str(path)}' (FORMAT PARQUET, COMPRESSION ZSTD)")
+    finally:
+        con.close()
+    return path
+
+
+def list_snapshots(client: str, endpoint: str) -> list[tuple[str, str]]:
+    """(timestamp label, path) pairs, newest first."""
+    folder = snapshot_dir(client, endpoint)
+    if not os.path.isdir(folder):
+        return []
+    out = []
+    for name in sorted(os.listdir(folder), reverse=True):
+        if name.endswith(".parquet"):
+            stamp = _snapshot_time(name[:-8])
+            out.append((stamp.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3], os.path.join(folder, name)))
+    return out
+
+
+def load_snapshot(path: str) -> pd.DataFrame:
+    con = duckdb.connect(config=duck_config())
+    try:
+        return con.execute(f"SELECT * FROM read_parquet('{_sql_str(path)}')").fetchdf()
+    finally:
+        con.close()
+
+
+def diff_snapshots(old_path: str, new_path: str, key: str = "id") -> dict[str, pd.DataFrame]:
+    """Added, removed and changed rows between two snapshots, joined on `key`.
+
+    `changed` is long format: one row per (key, field) whose value differs.
+    """
+    con = duckdb.connect(config=duck_config())
+    try:
+        con.execute(f"CREATE VIEW old AS SELECT * FROM read_parquet('{_sql_str(old_path)}')")
+        con.execute(f"CREATE VIEW new AS SELECT * FROM read_parquet('{_sql_str(new_path)}')")
+        old_cols = [r[0] for r in con.execute("DESCRIBE old").fetchall()]
+        new_cols = [r[0] for r in con.execute("DESCRIBE new").fetchall()]
+        k = next((c for c in new_cols if c.lower() == key.lower()), None)
+        if k is None or k not in old_cols:
+            raise ValueError(f"Both snapshots need a '{key}' column to diff")
+        qk = quote_ident(k)
+        added = con.execute(f"SELECT n.* FROM new n ANTI JOIN old o ON n.{qk} = o.{qk}").fetchdf()
+        removed = con.execute(f"SELECT o.* FROM old o ANTI JOIN new n ON n.{qk} = o.{qk}").fetchdf()
+        common = [c for c in new_cols if c in old_cols and c != k]
+        if common:
+            # One join on the key; the compared columns are unpivoted into (field, old, new)
+            pairs = ", ".join(
+                f"CAST(o.{quote_ident(c)} AS VARCHAR) AS o{i}, CAST(n.{quote_ident(c)} AS VARCHAR) AS n{i}"
+                for i, c in enumerate(common)
+            )
+            fields = ", ".join(f"(o{i}, n{i}) AS {quote_ident(c)}" for i, c in enumerate(common))
+            changed = con.execute(f"""
+                WITH j AS (
+                    SELECT CAST(n.{qk} AS VARCHAR) AS {qk}, {pairs}
+                    FROM new n JOIN old o ON n.{qk} = o.{qk}
+                )
+                SELECT * FROM j
+                UNPIVOT INCLUDE NULLS ((old_value, new_value) FOR field IN ({fields}))
+                WHERE old_value IS DISTINCT FROM new_value
+                ORDER BY 1, 2
+            """).fetchdf()
+        else:
+            changed = pd.DataFrame(columns=[k, "field", "old_value", "new_value"])
+    finally:
+        con.close()
+    return {"added": added, "removed": removed, "changed": changed}
+
+
+# ---------- Shared DuckDB engine ----------
+# Result methods that fetch and convert rows; that work counts against the limit too
+FETCH_METHODS = frozenset({
+    "fetchone", "fetchmany", "fetchall", "fetchdf", "fetch_df", "df", "fetchnumpy", "arrow",
+    "fetch_arrow_table", "pl",
+})
+
+
+class EngineCursor:
+    """A cursor whose queries (execution and fetch) count against the engine's concurrency limit."""
+
+    def __init__(self, cursor: duckdb.DuckDBPyConnection, engine: "DuckEngine"):
+        self._cursor = cursor
+        self._engine = engine
+
+    def execute(self, *args, **kwargs):
+        with self._engine.slot():
+            self._cursor.execute(*args, **kwargs)
+        return self
+
+    def __getattr__(self, name):
+        attr = getattr(self._cursor, name)
+        if name not in FETCH_METHODS:
+            return attr
+
+        def guarded(*args, **kwargs):
+            with self._engine.slot():
+                return attr(*args, **kwargs)
+        return guarded
+
+
+class DuckEngine:
+    """One DuckDB database per process, shared through cursors.
+
+    Readers run concurrently on their own cursors (at most `max_queries`
+    queries at a time); writes to shared tables go through a single writer.
+    Cursors are not thread-safe: use `cursor()` (one per thread) or own a
+    `session_cursor()` that only one thread uses at a time.
+    """
+
+    def __init__(self, path: str = "", config: dict | None = None, max_queries: int | None = None):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_queries = max_queries or DUCKDB_MAX_QUERIES
+        self._db = duckdb.connect(path or ":memory:", config=config if config is not None else duck_config())
+        self.threads = int(self._db.execute("SELECT current_setting('threads')").fetchone()[0])
+        self._slots = threading.BoundedSemaphore(self.max_queries)
+        self._running = 0
+        self._lock = threading.Lock()  # guards cursor creation and the running count
+        self._writer = threading.Lock()
+        self._local = threading.local()
+
+    def cursor(self) -> EngineCursor:
+        """This thread's cursor (created on first use)."""
+        cur = getattr(self._local, "cursor", None)
+        if cur is None:
+            cur = self._local.cursor = self.session_cursor()
+        return cur
+
+    def session_cursor(self) -> EngineCursor:
+        """A new cursor owned by the caller (registered frames and temp tables stay private to it)."""
+        with self._lock:
+            return EngineCursor(self._db.cursor(), self)
+
+    @contextmanager
+    def slot(self):
+        """Wait for one of the `max_queries` query slots."""
+        with self._slots:
+            with self._lock:
+                self._running += 1
+            try:
+                yield
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+    @contextmanager
+    def writing(self):
+        """The single writer: serializes changes to shared tables."""
+        with self._writer:
+            yield self.cursor()
+
+    def stats(self) -> dict:
+        return {
+            "threads": self.threads,
+            "max_queries": self.max_queries,
+            "running": self._running,
+            "writer_busy": self._writer.locked(),
+        }
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def duck_config() -> dict:
+    """Memory limit, threads and spill directory shared by every DuckDB connection we open."""
+    os.makedirs(DUCKDB_TEMP_DIR, exist_ok=True)
+    cfg = {"temp_directory": DUCKDB_TEMP_DIR}
+    if DUCKDB_MEMORY_LIMIT:
+        cfg["memory_limit"] = DUCKDB_MEMORY_LIMIT
+    if DUCKDB_THREADS:
+        cfg["threads"] = int(DUCKDB_THREADS)
+    return cfg
+
+
+def engine() -> DuckEngine:
+    """Process-wide engine: file-backed at E10_DUCKDB_PATH, otherwise in memory.
+
+    Sessions take cursors from it, so they share one memory-limited buffer
+    pool that spills to DUCKDB_TEMP_DIR instead of each holding a database.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = DuckEngine(DUCKDB_PATH)
+        return _engine
+
+
+def shared_store() -> DuckEngine | None:
+    """The engine when it is file-backed (datasets persist there), else None."""
+    return engine() if DUCKDB_PATH else None
+
+
+def dataset_table(client: str, endpoint: str) -> str:
+    return f"ds_{_slug(client)}__{_slug(endpoint)}"
+
+
+# Per table, the frame last stored while any session still holds it, and its payload digest
+_live: "weakref.WeakValueDictionary[str, pd.DataFrame]" = weakref.WeakValueDictionary()
+_digests: dict[str, str | None] = {}
+_live_lock = threading.Lock()
+
+
+def store_dataset(df: pd.DataFrame, client: str, endpoint: str, digest: str | None = None) -> pd.DataFrame:
+    """Persist the latest fetch of (client, endpoint) once in the shared store.
+
+    Returns the frame the session should hold: when another session already
+    stored the same payload (same `digest`) and still holds that frame, that
+    frame is returned so sessions share one copy; otherwise `df`.
+    """
+    store = shared_store()
+    if store is None:
+        return df
+    name = dataset_table(client, endpoint)
+    with store.writing() as cur:
+        with _live_lock:
+            live = _live.get(name)
+            if digest and live is not None and _digests.get(name) == digest:
+                return live
+        cur.register("_incoming", _parquet_safe(df))
+        try:
+            cur.execute(f"CREATE OR REPLACE TABLE {quote_ident(name)} AS SELECT * FROM _incoming")
+        finally:
+            cur.unregister("_incoming")
+        with _live_lock:
+            _live[name] = df
+            _digests[name] = digest
+    return df
+
+
+def stored_table(df: pd.DataFrame) -> str | None:
+    """The store table `df` is the current copy of, if any (sessions can query it instead)."""
+    with _live_lock:
+        return next((name for name, live in _live.items() if live is df), None)
+
+
+def live_datasets() -> list[pd.DataFrame]:
+    """Stored frames sessions currently share."""
+    with _live_lock:
+        return list(_live.values())
+
+
+def load_dataset(client: str, endpoint: str) -> pd.DataFrame | None:
+    """Read a stored dataset back, or None if the store has no copy."""
+    store = shared_store()
+    if store is None:
+        return None
+    try:
+        return store.cursor().execute(f"SELECT * FROM {quote_ident(dataset_table(client, endpoint))}").fetchdf()
+    except duckdb.CatalogException:
+        return None
+
@@ -0,0 +1,255 @@
+# e10_tables.py
+import os
+import re
+
+import duckdb
+import pandas as pd
+
+RECORD_KEYS = ("data", "results", "items", "value", "Response")
+
+# ---------- Settings (env overridable) ----------
+PATH_SAMPLE = int(os.environ.get("E10_LAZY_PATH_SAMPLE", "1000"))  # records walked to list lazy columns
+
+
+def quote_ident(col: str) -> str:
+    return '"' + col.replace('"', '""') + '"'
+
+
+def case_insensitive_col(df: pd.DataFrame, name: str):
+    return next((c for c in df.columns if c.lower() == name.lower()), None)
+
+
+def records_of(payload) -> list:
+    """Return the record list of a payload (bare list or wrapped in a known key)."""
+    if isinstance(payload, list):
+        return payload
+    if isinstance(payload, dict):
+        for k in RECORD_KEYS:
+            v = payload.get(k)
+            if isinstance(v, list):
+                return v
+        return [payload]
+    return []
+
+
+def add_player_name_col(df: pd.DataFrame) -> pd.DataFrame:
+    """Insert "Player Name" (first + last, whitespace collapsed) as the first column."""
+    f = next((c for c in df.columns if c.lower() == "firstname"), None)
+    l = next((c for c in df.columns if c.lower() == "lastname"), None)
+    if f and l:
+        pn = (
+            df[f].astype(str).fillna("").str.strip()
+            + " "
+            + df[l].astype(str).fillna("").str.strip()
+        ).str.replace(r"\s+", " ", regex=True).str.strip()
+        if "Player Name" in df.columns:
+            df = df.drop(columns=["Player Name"])
+        df.insert(0, "Player Name", pn)
+    return df
+
+
+# ---------- Lazy columns ----------
+# Always flattened in lazy mode: ids, names and the fields filters rely on
+LAZY_KEY_COLS = ("id", "firstName", "lastName", "contactType", "dateOfBirth", "groupIds")
+
+
+def column_paths(records: list, sample: int | None = None) -> dict[str, tuple]:
+    """Dotted column name -> key path for every leaf, in json_normalize order.
+
+    With `sample`, only that many evenly spaced records are walked, so the
+    cost no longer grows with the record count; fields seen only in the
+    skipped records are missing until a full walk.
+    """
+    if sample and len(records) > sample:
+        records = records[::-(-len(records) // sample)]
+    paths = {}
+
+    def walk(obj: dict, prefix: tuple):
+        for k, v in obj.items():
+            path = prefix + (str(k),)
+            if isinstance(v, dict) and v:
+                walk(v, path)
+            else:
+                paths.setdefault(".".join(path), path)
+
+    for rec in records:
+        if isinstance(rec, dict):
+            walk(rec, ())
+    return paths
+
+
+def lazy_columns(paths: dict[str, tuple], selected: list[str] | None, n_default: int = 8) -> list[str]:
+    """Key columns plus the selection (or the first few columns when nothing is selected)."""
+    lower = {p.lower(): p for p in paths}
+    wanted = [lower[k.lower()] for k in LAZY_KEY_COLS if k.lower() in lower]
+    wanted += [c for c in selected or [] if c in paths] or list(paths)[:n_default]
+    return list(dict.fromkeys(wanted))
+
+
+def records_frame(records: list, paths: dict[str, tuple], cols: list[str]) -> pd.DataFrame:
+    """Flatten only `cols` out of the raw records."""
+    def get(rec, path):
+        for p in path:
+            if not isinstance(rec, dict):
+                return None
+            rec = rec.get(p)
+        return rec
+
+    return pd.DataFrame({c: [get(r, paths[c]) for r in records] for c in cols if c in paths})
+
+
+# ---------- Nested fields ----------
+CHILD_PREFIX = "list_"
+
+
+def child_table_name(col: str) -> str:
+    return CHILD_PREFIX + re.sub(r"\W+", "_", col).strip("_")
+
+
+def is_list_col(s: pd.Series, sample: int = 200) -> bool:
+    if s.dtype != object:
+        return False
+    head = s.dropna().head(sample)
+    return bool(head.map(lambda v: isinstance(v, list)).any())
+
+
+def explode_nested(df: pd.DataFrame, id_col: str | None) -> tuple[pd.DataFrame, dict[str, pd.DataFrame]]:
+    """Move list-valued columns out of `df` into child tables keyed by entity id.
+
+    Lists of scalars become (entityId, ordinal, value) and the parent cell keeps a
+    comma separated copy for display. Lists of objects are flattened into
+    (entityId, ordinal, <fields>) and the parent cell keeps the item count.
+    """
+    children = {}
+    if not id_col or df.empty:
+        return df, children
+    out = df.copy()
+    keys = df[id_col].astype(str)
+    for col in [c for c in df.columns if is_list_col(df[c])]:
+        lists = df[col].map(lambda v: v if isinstance(v, list) else [])
+        long = pd.DataFrame({"entityId": keys, "item": lists}).explode("item")
+        long = long[long["item"].notna()]
+        long.insert(1, "ordinal", long.groupby(level=0).cumcount())
+        long = long.reset_index(drop=True)
+        if not long.empty and long["item"].map(lambda v: isinstance(v, dict)).all():
+            child = pd.concat([long[["entityId", "ordinal"]], pd.json_normalize(long["item"].tolist())], axis=1)
+            out[col] = lists.str.len()
+        else:
+            child = long.rename(columns={"item": "value"})
+            child["value"] = child["value"].astype(str)
+            out[col] = lists.map(lambda v: ", ".join(map(str, v)))
+        children[child_table_name(col)] = child
+    return out, children
+
+
+def entity_ids_matching(con: duckdb.DuckDBPyConnection, table: str, col: str, values: list[str]) -> set[str]:
+    """Ids of entities with at least one child row whose `col` is in `values`."""
+    if not values:
+        return set()
+    rows = con.execute(
+        f"SELECT DISTINCT entityId FROM {quote_ident(table)} "
+        f"WHERE list_contains(?::VARCHAR[], CAST({quote_ident(col)} AS VARCHAR))",
+        [list(values)],
+    ).fetchall()
+    return {r[0] for r in rows}
+
+
+# ---------- Write-through ----------
+def upsert_rows(df: pd.DataFrame, new: pd.DataFrame, id_col: str) -> pd.DataFrame:
+    """Replace rows whose id appears in `new` and append the rest.
+
+    Pure appends keep the existing row labels, so label-based indexes stay valid.
+    """
+    ids = set(new[id_col].astype(str))
+    replaced = df[id_col].astype(str).isin(ids)
+    if replaced.any():
+        out = pd.concat([df[~replaced], new], ignore_index=True)
+    else:
+        out = pd.concat([df, new.set_axis(range(len(df), len(df) + len(new)))])
+    return out[list(dict.fromkeys(list(df.columns) + list(new.columns)))]
+
+
+def upsert_raw_records(records: list, new: list, id_key: str) -> list:
+    """Raw-record counterpart of upsert_rows, in the same row order.
+
+    Lazy columns are flattened from the raw records by position, so they must
+    line up with the frame upsert_rows returns.
+    """
+    ids = {str(r.get(id_key)) for r in new if isinstance(r, dict)}
+    kept = [r for r in records if not (isinstance(r, dict) and str(r.get(id_key)) in ids)]
+    return kept + list(new)
+
+
+def upsert_children(children: dict[str, pd.DataFrame], new: dict[str, pd.DataFrame],
+                    ids: set[str]) -> dict[str, pd.DataFrame]:
+    """Child tables with the rows of `ids` replaced by those in `new`."""
+    out = {}
+    for name in set(children) | set(new):
+        old = children.get(name)
+        if old is not None and not old.empty:
+            old = old[~old["entityId"].isin(ids)]
+        parts = [f for f in (old, new.get(name)) if f is not None and not f.empty]
+        out[name] = pd.concat(parts, ignore_index=True) if parts else (old if old is not None else new[name])
+    return out
+
+
+# ---------- Related tables ----------
+def build_related(entities: pd.DataFrame, children: dict[str, pd.DataFrame],
+                  groups: pd.DataFrame | None = None,
+                  templates: pd.DataFrame | None = None) -> dict[str, pd.DataFrame]:
+    """Build the DuckDB tables that sit next to api_data.
+
+    Always includes the nested child tables; `entity_groups` is the
+    entity -> group relationship taken from the `groupIds` child table.
+    """
+    related = dict(children)
+    gid_col = case_insensitive_col(entities, "groupIds")
+    if groups is not None and not groups.empty:
+        g = groups.copy()
+        g_id = case_insensitive_col(g, "id")
+        g_name = case_insensitive_col(g, "name")
+        if g_id and g_name:
+            g = g.rename(columns={g_id: "id", g_name: "name"})
+            g["id"] = g["id"].astype(str)
+            related["groups"] = g
+    if gid_col and child_table_name(gid_col) in children:
+        links = children[child_table_name(gid_col)]
+        related["entity_groups"] = links.rename(columns={"value": "groupId"})[["entityId", "groupId"]]
+    if templates is not None and not templates.empty:
+        related["templates"] = templates
+    return related
+
+
+def materialize_tables(con: duckdb.DuckDBPyConnection, tables: dict[str, pd.DataFrame]):
+    """Create (or replace) one connection-local DuckDB table per DataFrame.
+
+    TEMP tables keep session data private when sessions share a database
+    through cursors, and spill to the temp directory under memory pressure.
+    """
+    for name, frame in tables.items():
+        con.register("_incoming", frame)
+        try:
+            con.execute(f"CREATE OR REPLACE TEMP TABLE {quote_ident(name)} AS SELECT * FROM _incoming")
+        finally:
+            con.unregister("_incoming")
+
+
+def group_names_by_entity(con: duckdb.DuckDBPyConnection) -> pd.DataFrame:
+    """entityId -> comma separated group names, via the link table."""
+    return con.execute("""
+        SELECT eg.entityId, string_agg(g.name, ', ' ORDER BY g.name) AS "Groups"
+        FROM entity_groups eg JOIN groups g ON g.id = eg.groupId
+        GROUP BY eg.entityId
+    """).fetchdf()
+
+
+def entity_ids_in_groups(con: duckdb.DuckDBPyConnection, group_names: list[str]) -> set[str]:
+    """Ids of entities that belong to any of the named groups."""
+    if not group_names:
+        return set()
+    rows = con.execute("""
+        SELECT DISTINCT eg.entityId
+        FROM entity_groups eg JOIN groups g ON g.id = eg.groupId
+        WHERE list_contains(?::VARCHAR[], g.name)
+    """, [list(group_names)]).fetchall()
+    return {r[0] for r in rows}
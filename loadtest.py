@@ -0,0 +1,297 @@
+# loadtest.py
+"""Drive many concurrent viewer sessions against one running Streamlit server.
+
+    python loadtest.py --app appv2.py --sessions 1,5,10 --iterations 3
+    python loadtest.py --url http://127.0.0.1:8501 --sessions 5   # an app that is already running
+
+Starts the mock API and one `streamlit run` server (unless --url is given)
+and connects that many websocket clients to it at once, the way browser
+tabs would, so every session shares the server's process, GIL, DuckDB
+engine, caches and session governor. Each session fetches, filters, runs a
+LIKE search, changes columns and reruns the downloads. Reports rerun
+latency percentiles per step and the server's RSS for each level.
+
+The clients speak Streamlit's websocket protocol (BackMsg/ForwardMsg
+protobufs) through the websockets package, which recent Streamlit releases
+install; widget values are sent in their current wire format (selectbox and
+multiselect by option text).
+"""
+import argparse
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import pandas as pd
+import requests
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from websockets.sync.client import connect
+
+import mock_api
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+LIKE_LABEL = "Player contains (LIKE search). Example: Rol, dia"
+# Script runs that end the rerun a client asked for (not an st.rerun() restart)
+DONE = (ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_WITH_COMPILE_ERROR)
+
+
+# ---------- Websocket client ----------
+def open_stream(url: str):
+    """Websocket to the app's session stream (use as a context manager)."""
+    parts = urlsplit(url)
+    return connect(f"ws://{parts.netloc}{parts.path.rstrip('/')}/_stcore/stream",
+                   subprotocols=["streamlit"], max_size=None, open_timeout=30)
+
+
+class ViewerClient:
+    """One browser-like session on an open stream: keeps widget values and reruns the script with them."""
+
+    def __init__(self, ws, timeout: float = 120):
+        self.ws = ws
+        self.timeout = timeout
+        self.states: dict[str, WidgetState] = {}
+        self.widgets: dict[tuple[str, str], object] = {}
+        self.errors: list[str] = []
+
+    def run(self):
+        """Rerun with the current widget values; returns once the script run has finished."""
+        msg = BackMsg()
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+        # Button clicks only count for the run they were sent with
+        self.states = {k: v for k, v in self.states.items() if not v.HasField("trigger_value")}
+        self.widgets, self.errors = {}, []
+        self.ws.send(msg.SerializeToString())
+        deadline = time.monotonic() + self.timeout
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(self.ws.recv(timeout=max(0.1, deadline - time.monotonic())))
+            kind = fwd.WhichOneof("type")
+            if kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                self._element(fwd.delta.new_element)
+            elif kind == "script_finished" and fwd.script_finished in DONE:
+                return
+
+    def _element(self, elt):
+        kind = elt.WhichOneof("type")
+        proto = getattr(elt, kind)
+        if kind == "exception":
+            self.errors.append(f"{proto.type}: {proto.message}")
+        elif getattr(proto, "id", "") and getattr(proto, "label", ""):
+            self.widgets[(kind, proto.label)] = proto
+
+    def widget(self, kind: str, label: str):
+        try:
+            return self.widgets[(kind, label)]
+        except KeyError:
+            raise RuntimeError(f"no {kind} labelled {label!r} in the last run") from None
+
+    def set(self, kind: str, label: str, value):
+        proto = self.widget(kind, label)
+        state = WidgetState(id=proto.id)
+        if kind == "button":
+            state.trigger_value = True
+        elif kind == "multiselect":
+            state.string_array_value.data[:] = value
+        elif kind == "checkbox":
+            state.bool_value = value
+        else:  # text_input, selectbox
+            state.string_value = value
+        self.states[proto.id] = state
+
+
+# ---------- Session script ----------
+def _step(client: ViewerClient, name: str, timings: list, action):
+    """Apply a widget action, rerun and record the rerun time."""
+    action(client)
+    t0 = time.perf_counter()
+    client.run()
+    timings.append({"step": name, "ms": (time.perf_counter() - t0) * 1000})
+    if client.errors:
+        raise RuntimeError(f"{name}: {client.errors[0]}")
+
+
+def run_session(url: str, site: str, user: str, pwd: str, iterations: int, seed: int) -> list[dict]:
+    rnd = random.Random(seed)
+    timings = []
+    with open_stream(url) as ws:
+        client = ViewerClient(ws)
+        _step(client, "load", timings, lambda c: None)
+        client.set("selectbox", "Client", "Other (enter below)")
+        client.run()
+        client.set("text_input", "Site name", site)
+        client.set("text_input", "Username", user)
+        client.set("text_input", "Password", pwd)
+        _step(client, "fetch", timings, lambda c: c.set("button", "Fetch", True))
+
+        for _ in range(iterations):
+            options = list(client.widget("multiselect", "contactType").options)
+            _step(client, "filter", timings, lambda c: c.set("multiselect", "contactType", rnd.sample(options, k=1)))
+            token = rnd.choice(mock_api.FIRST_NAMES + mock_api.LAST_NAMES)[:3]
+            _step(client, "like", timings, lambda c: c.set("text_input", LIKE_LABEL, token))
+            cols = list(client.widget("multiselect", "Choose cols to show").options)
+            picked = rnd.sample(cols, k=min(len(cols), rnd.randint(3, 8)))
+            _step(client, "columns", timings, lambda c: c.set("multiselect", "Choose cols to show", picked))
+            # Download payloads are built on every rerun, so a bare rerun times them
+            _step(client, "download", timings, lambda c: None)
+            _step(client, "clear", timings, lambda c: (
+                c.set("multiselect", "contactType", []),
+                c.set("text_input", LIKE_LABEL, ""),
+            ))
+    return timings
+
+
+# ---------- Server ----------
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(app: str, port: int) -> subprocess.Popen:
+    """`streamlit run` the app headless and wait until it answers its health check."""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", os.path.join(HERE, app), "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=HERE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"streamlit exited with {proc.returncode}")
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/_stcore/health", timeout=2).ok:
+                return proc
+        except requests.RequestException:
+            pass
+        time.sleep(0.3)
+    proc.kill()
+    raise RuntimeError("streamlit did not start within 60 s")
+
+
+def rss_mb(pid: int | None) -> float:
+    """Resident memory of `pid` in MB (Linux /proc; NaN elsewhere or for an external server)."""
+    if pid is None:
+        return float("nan")
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            kb = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+    except (OSError, StopIteration, ValueError):
+        return float("nan")
+    return kb / 1024
+
+
+# ---------- Report ----------
+def percentiles(timings: pd.DataFrame) -> pd.DataFrame:
+    g = timings.groupby("step", sort=False)["ms"]
+    out = pd.DataFrame({
+        "n": g.size(),
+        "p50": g.quantile(0.5),
+        "p90": g.quantile(0.9),
+        "p95": g.quantile(0.95),
+        "p99": g.quantile(0.99),
+        "max": g.max(),
+    })
+    return out.round(1)
+
+
+def run_level(args, url: str, site: str, n_sessions: int, pid: int | None) -> dict:
+    results, errors = [], []
+    rss_before = rss_mb(pid)
+    peak = [rss_before]
+    stop = threading.Event()
+
+    def sample():
+        while not stop.wait(0.2):
+            peak[0] = max(peak[0], rss_mb(pid))
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    t0 = time.perf_counter()
+    # Client threads only wait on their sockets; the scripts all run in the one server
+    with ThreadPoolExecutor(max_workers=n_sessions) as pool:
+        futures = [pool.submit(run_session, url, site, args.user, args.password, args.iterations, i)
+                   for i in range(n_sessions)]
+        for i, fut in enumerate(futures):
+            try:
+                results.append(fut.result())
+            except Exception as e:
+                errors.append(f"session {i}: {e}")
+    wall = time.perf_counter() - t0
+    stop.set()
+    sampler.join()
+
+    timings = pd.DataFrame([t for r in results for t in r], columns=["step", "ms"])
+    return {
+        "sessions": n_sessions,
+        "wall_s": wall,
+        "errors": errors,
+        "steps": percentiles(timings) if len(timings) else pd.DataFrame(),
+        "rerun_p95": timings.loc[timings["step"] != "load", "ms"].quantile(0.95) if len(timings) else float("nan"),
+        "server_rss_mb": peak[0],
+        "rss_mb_per_session": (peak[0] - rss_before) / n_sessions,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Concurrent session load test for the viewer")
+    ap.add_argument("--app", default="appv2.py", help="app.py or appv2.py")
+    ap.add_argument("--url", help="an already running viewer instead of starting --app")
+    ap.add_argument("--sessions", default="1,5,10", help="comma-separated concurrency levels")
+    ap.add_argument("--iterations", type=int, default=3, help="filter/LIKE/columns/download rounds per session")
+    ap.add_argument("--entities", type=int, default=2000, help="rows served by the mock API")
+    ap.add_argument("--site", help="use an already running API instead of starting the mock")
+    ap.add_argument("--user", default="mock")
+    ap.add_argument("--password", default="mock")
+    args = ap.parse_args()
+
+    # Keep snapshots, schemas and column sets out of the real data directory; the server inherits it
+    os.environ.setdefault("ARMS_VIEWER_DATA", tempfile.mkdtemp(prefix="viewer_load_"))
+    if args.site:
+        site = args.site
+    else:
+        mock = mock_api.serve(n_entities=args.entities, user=args.user, pwd=args.password)
+        site = f"http://127.0.0.1:{mock.server_port}"
+    proc = None
+    if args.url:
+        url = args.url
+    else:
+        port = free_port()
+        proc = start_app(args.app, port)
+        url = f"http://127.0.0.1:{port}"
+    # One throwaway session, so the first level does not pay for the server's imports
+    with open_stream(url) as ws:
+        ViewerClient(ws).run()
+
+    summary = []
+    try:
+        for n in [int(x) for x in args.sessions.split(",") if x.strip()]:
+            level = run_level(args, url, site, n, proc.pid if proc else None)
+            print(f"\n=== {args.url or args.app}: {n} concurrent sessions, {level['wall_s']:.1f}s wall ===")
+            if len(level["steps"]):
+                print(level["steps"].to_string())
+            print(f"server RSS: peak {level['server_rss_mb']:.0f} MB, "
+                  f"{level['rss_mb_per_session']:.1f} MB per session above the level's start")
+            for err in level["errors"]:
+                print("ERROR", err)
+            summary.append({k: level[k] for k in ("sessions", "wall_s", "rerun_p95", "server_rss_mb",
+                                                  "rss_mb_per_session")}
+                           | {"errors": len(level["errors"])})
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    print("\n=== Summary ===")
+    print(pd.DataFrame(summary).round(1).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# mock_api.py
+"""Local stand-in for the ARMS API, for load tests and offline development.
+
+    python mock_api.py --port 8765 --entities 2000
+
+Serves seeded fake data behind basic auth (default user/pass: mock/mock).
+"""
+import argparse
+import base64
+import gzip
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+GROUP_NAMES = ["First Team", "U23", "U21", "U18", "Academy", "Staff", "Loans", "Injured"]
+FIRST_NAMES = ["Roland", "Rolando", "Diana", "Dias", "Sam", "Alex", "Jo", "Chris", "Mo", "Lee", "Kai", "Nia"]
+LAST_NAMES = ["Smith", "Jones", "Diaz", "Brown", "Khan", "Lopez", "Ng", "Evans", "Okafor", "Silva"]
+POSITIONS = ["GK", "CB", "FB", "CM", "AM", "W", "ST"]
+NATIONALITIES = ["England", "Scotland", "Wales", "Ireland", "France", "Spain", "Nigeria", "Brazil"]
+
+SWAGGER = {
+    "openapi": "3.0.1",
+    "components": {"schemas": {"Subject": {"properties": {
+        "id": {"type": "string", "format": "uuid"},
+        "firstName": {"type": "string"},
+        "lastName": {"type": "string"},
+        "dateOfBirth": {"type": "string", "format": "date-time"},
+        "contactType": {"type": "integer"},
+        "height": {"type": "number"},
+    }}}},
+}
+
+
+# ---------- Data ----------
+def seed_data(n_entities: int = 500, n_templates: int = 20, seed: int = 1) -> dict:
+    rnd = random.Random(seed)
+    groups = [{"id": str(uuid.UUID(int=i + 1)), "name": n} for i, n in enumerate(GROUP_NAMES)]
+    entities = []
+    for i in range(n_entities):
+        entities.append({
+            "id": str(uuid.UUID(int=10_000 + i)),
+            "firstName": rnd.choice(FIRST_NAMES),
+            "lastName": rnd.choice(LAST_NAMES),
+            "dateOfBirth": f"{rnd.randint(1985, 2009)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}T00:00:00",
+            "contactType": rnd.choice([1, 1, 1, 2]),
+            "gender": rnd.choice(["male", "female", "unknown"]),
+            "emailAddress": rnd.choice(["", f"user{i}@example.com"]),
+            "groupIds": rnd.sample([g["id"] for g in groups], k=rnd.randint(0, 3)),
+            "profile": {
+                "customID": f"C{i:05d}" if i % 4 else None,
+                "positions": [{"code": p} for p in rnd.sample(POSITIONS, k=rnd.randint(0, 2))],
+            },
+        })
+    templates = [
+        {"id": i, "name": f"Template {i}", "fields": {f"f{j}": {"label": f"Field {j}", "type": "text"} for j in range(40)}}
+        for i in range(n_templates)
+    ]
+    return {"entities": entities, "groups": groups, "templates": templates}
+
+
+def subject_detail(subject: dict) -> dict:
+    """Detail view of a subject: the list fields plus ones the list endpoint leaves out."""
+    rnd = random.Random(subject["id"])
+    return {
+        **subject,
+        "height": round(rnd.uniform(160, 200), 1),
+        "weight": round(rnd.uniform(55, 95), 1),
+        "nationality": rnd.choice(NATIONALITIES),
+        "mobileNumber": f"07{rnd.randint(100000000, 999999999)}",
+        "address": {"line1": f"{rnd.randint(1, 200)} High Street", "postcode": f"NE{rnd.randint(1, 99)} {rnd.randint(1, 9)}AA"},
+    }
+
+
+# ---------- Server ----------
+def make_handler(data: dict, user: str, pwd: str, latency_ms: float = 0, flaky_creates: int = 0):
+    """`flaky_creates`: that many creates are stored but answered 502, like a gateway timeout after success."""
+    token = "Basic " + base64.b64encode(f"{user}:{pwd}".encode()).decode()
+    lock = threading.Lock()
+    flaky = [flaky_creates]
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, code: int, obj):
+            body = json.dumps(obj).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                body = gzip.compress(body, compresslevel=5)
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _body(self) -> dict:
+            n = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(n) or b"{}")
+
+        def _subject(self, sid: str) -> dict | None:
+            return next((e for e in data["entities"] if e["id"] == sid), None)
+
+        def _route(self, method: str):
+            if latency_ms:
+                time.sleep(latency_ms / 1000)
+            if self.headers.get("Authorization") != token:
+                return self._send(401, {"message": "Authorization has been denied for this request."})
+            path = self.path.split("?")[0].rstrip("/")
+            if method == "GET":
+                if path == "/api/entity":
+                    return self._send(200, data["entities"])
+                if path == "/api/entity/groups":
+                    return self._send(200, data["groups"])
+                if path == "/api/template":
+                    return self._send(200, data["templates"])
+                if path == "/swagger/v1/swagger.json":
+                    return self._send(200, SWAGGER)
+                if path.startswith("/api/entity/subject/"):
+                    subject = self._subject(path.rsplit("/", 1)[1])
+                    return self._send(200, subject_detail(subject)) if subject else self._send(404, {"message": "Not found"})
+            if method == "POST" and path == "/api/entity/subject":
+                subject = {**self._body(), "id": str(uuid.uuid4())}
+                with lock:
+                    data["entities"].append(subject)
+                    drop = flaky[0] > 0
+                    flaky[0] -= drop
+                if drop:
+                    return self._send(502, {"message": "Bad gateway"})
+                return self._send(200, subject)
+            if method == "PUT" and path.startswith("/api/entity/subject/"):
+                subject = self._subject(path.rsplit("/", 1)[1])
+                if not subject:
+                    return self._send(404, {"message": "Not found"})
+                with lock:
+                    subject.update(self._body())
+                return self._send(200, subject)
+            self._send(404, {"message": "Not found"})
+
+        def do_GET(self):
+            self._route("GET")
+
+        def do_POST(self):
+            self._route("POST")
+
+        def do_PUT(self):
+            self._route("PUT")
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(port: int = 0, n_entities: int = 500, user: str = "mock", pwd: str = "mock",
+          latency_ms: float = 0, flaky_creates: int = 0) -> ThreadingHTTPServer:
+    """Start the mock API on a background thread; port 0 picks a free port."""
+    server = ThreadingHTTPServer(("127.0.0.1", port),
+                                 make_handler(seed_data(n_entities), user, pwd, latency_ms, flaky_creates))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Local mock of the ARMS API")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--entities", type=int, default=500)
+    ap.add_argument("--user", default="mock")
+    ap.add_argument("--password", default="mock")
+    ap.add_argument("--latency-ms", type=float, default=0, help="Added to every response")
+    ap.add_argument("--flaky-creates", type=int, default=0, help="Store the first N creates but answer 502")
+    args = ap.parse_args()
+    server = serve(args.port, args.entities, args.user, args.password, args.latency_ms, args.flaky_creates)
+    print(f"Mock ARMS API on http://127.0.0.1:{args.port} ({args.entities} entities, user {args.user})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
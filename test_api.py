@@ -4,6 +4,8 @@ import datetime as dt
 import requests
 from requests.auth import HTTPBasicAuth
 
+from e10_auth import probe
+
 BASE_URL = "https://newcastleunited7703.edge10online.co.uk"
 
 USERNAME = "edge10"
@@ -26,10 +28,11 @@ def clean(d: dict) -> dict:
     return {k: v for k, v in d.items() if v not in ("", None, {}, [])}
 
 def test_auth():
-    r = requests.get(f"{BASE_URL}/api/entity/", auth=AUTH, headers={"Accept":"application/json"}, timeout=30)
-    print("Auth test:", r.status_code)
-    if not r.ok:
-        print(r.text)
+    # Status-only probe; does not download the entity list
+    res = probe(BASE_URL, USERNAME, PASSWORD, use_cache=False)
+    print("Auth test:", res["status"], f"({res['ms']:.0f} ms)")
+    if res["ok"] is False:
+        print("Credentials rejected")
 
 def create_subject(payload: dict):
     url = f"{BASE_URL}/api/entity/subject"
@@ -0,0 +1,44 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+
+# Modules read their settings at import, so point local state at a scratch dir first
+os.environ.setdefault("ARMS_VIEWER_DATA", tempfile.mkdtemp(prefix="viewer_data_"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import e10_store
+import mock_api
+
+
+@pytest.fixture
+def mock_site():
+    """A local mock API (user/pass u/p) for the duration of one test."""
+    server = mock_api.serve(n_entities=50, user="u", pwd="p")
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture
+def make_site():
+    """Start mock APIs with custom options (e.g. flaky_creates); all are shut down after the test."""
+    servers = []
+
+    def start(**kwargs) -> str:
+        servers.append(mock_api.serve(**{"n_entities": 50, "user": "u", "pwd": "p", **kwargs}))
+        return f"http://127.0.0.1:{servers[-1].server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+@pytest.fixture
+def file_store(tmp_path, monkeypatch):
+    """A file-backed engine, as with E10_DUCKDB_PATH set."""
+    path = str(tmp_path / "store.duckdb")
+    monkeypatch.setattr(e10_store, "DUCKDB_PATH", path)
+    monkeypatch.setattr(e10_store, "_engine", e10_store.DuckEngine(path))
+    return e10_store.engine()
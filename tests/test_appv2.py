@@ -0,0 +1,79 @@
+# tests/test_appv2.py
+import os
+
+from streamlit.testing.v1 import AppTest
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "appv2.py")
+
+
+def by(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+
+def fetch(site: str, lazy: bool = False) -> AppTest:
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.run()
+    by(at.selectbox, "Client").set_value("Other (enter below)").run()
+    by(at.text_input, "Site name").set_value(site)
+    by(at.text_input, "Username").set_value("u")
+    by(at.text_input, "Password").set_value("p")
+    by(at.toggle, "Lazy columns (wide endpoints)").set_value(lazy)
+    at.run()
+    by(at.button, "Fetch").click().run()
+    assert not at.exception and not at.error
+    return at
+
+
+def test_lazy_bulk_update_then_materialize(mock_site):
+    at = fetch(mock_site, lazy=True)
+    assert "profile.customID" not in at.session_state["df"].columns
+
+    # Bulk update replaces existing ids through the write-through path
+    by(at.text_input, "Set field (optional)").set_value("emailAddress")
+    by(at.text_input, "to value (JSON allowed)").set_value("new@example.com")
+    by(at.button, "Preview changes").click().run()
+    at.checkbox(key="bulk_confirm").check().run()
+    next(b for b in at.button if b.label.startswith("Apply to")).click().run()
+    assert not at.exception and not at.error
+    df = at.session_state["df"]
+    assert (df["emailAddress"] == "new@example.com").sum() > 0
+    assert len(at.session_state["lazy"]["records"]) == len(df)
+
+    at.session_state["cols_to_show"] = list(df.columns) + ["profile.customID"]
+    at.run()
+    assert not at.exception
+    df = at.session_state["df"]
+    raw = {r["id"]: r["profile"]["customID"] for r in at.session_state["lazy"]["records"]}
+    assert all(raw[i] == (v if isinstance(v, str) else None) for i, v in zip(df["id"], df["profile.customID"]))
+
+
+def test_bulk_update_writes_through_in_one_batch(mock_site):
+    at = fetch(mock_site)
+    before = at.session_state["df"]
+    version = at.session_state["df_version"]
+    by(at.text_input, "Set field (optional)").set_value("emailAddress")
+    by(at.text_input, "to value (JSON allowed)").set_value("new@example.com")
+    by(at.button, "Preview changes").click().run()
+    at.checkbox(key="bulk_confirm").check().run()
+    next(b for b in at.button if b.label.startswith("Apply to")).click().run()
+    assert not at.exception and not at.error
+
+    df = at.session_state["df"]
+    updated = {r["id"] for r in at.session_state["bulk_results"] if r["result"] == "updated"}
+    assert updated and len(df) == len(before)
+    assert set(df.loc[df["emailAddress"] == "new@example.com", "id"]) == updated
+    # The whole batch is one dataset version
+    assert at.session_state["df_version"] == version + 1
+
+
+def test_sessions_share_a_stored_dataset(mock_site, file_store):
+    first, second = fetch(mock_site), fetch(mock_site)
+    assert first.session_state["df"] is second.session_state["df"]
+    assert first.session_state["data"] is None
+
+    # Unfiltered, the VIEW tab reads the stored table rather than the pandas frame
+    second.session_state["ct_filter"] = []
+    second.run()
+    con = second.session_state["duck"]
+    (sql,) = con.execute("SELECT sql FROM duckdb_views() WHERE view_name = 'api_data'").fetchone()
+    assert "FROM ds_http_127_0_0_1_" in sql
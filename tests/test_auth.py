@@ -0,0 +1,43 @@
+# tests/test_auth.py
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from e10_auth import AuthRejected, cached_auth, probe, require_auth
+
+
+@pytest.fixture
+def forbidden_site():
+    """A host that answers every request with 403, like a user who may not read groups."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(403)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_accepts_and_caches(mock_site):
+    assert probe(mock_site, "u", "p")["ok"] is True
+    assert probe(mock_site, "u", "p")["cached"] is True
+    assert cached_auth(mock_site, "u", "p") is True
+
+
+def test_401_is_rejected(mock_site):
+    with pytest.raises(AuthRejected):
+        require_auth(mock_site, "u", "wrong")
+    assert cached_auth(mock_site, "u", "wrong") is False
+
+
+def test_403_is_inconclusive(forbidden_site):
+    result = require_auth(forbidden_site, "u", "p")
+    assert result["ok"] is None and result["status"] == 403
+    assert cached_auth(forbidden_site, "u", "p") is None
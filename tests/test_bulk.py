@@ -0,0 +1,29 @@
+# tests/test_bulk.py
+import requests
+
+import e10_bulk
+from e10_bulk import bulk_update
+
+AUTH = requests.auth.HTTPBasicAuth("u", "p")
+PATCH = {"set": {"position": "GK"}}
+
+
+class FakeResponse:
+    def __init__(self, body: bytes, status: int = 200):
+        self.content, self.status_code = body, status
+        self.ok, self.text = status < 400, body.decode()
+
+
+def test_bad_read_bodies_fail_only_their_row(monkeypatch):
+    bodies = {"1": b'{"id": "1", "position": "DF"}', "2": b"<html>maintenance</html>", "3": b'["not", "a", "record"]'}
+
+    def fake_send(method, url, **kwargs):
+        sid = url.rsplit("/", 1)[1]
+        return FakeResponse(bodies[sid] if method == "GET" else kwargs["data"])
+
+    monkeypatch.setattr(e10_bulk, "send", fake_send)
+    results = {r["id"]: r for r in bulk_update("http://x", AUTH, ["1", "2", "3"], PATCH)}
+    assert results["1"]["result"] == "updated" and results["1"]["record"]["position"] == "GK"
+    assert results["2"]["result"] == "failed" and "not JSON" in results["2"]["message"]
+    assert results["3"]["result"] == "failed" and "list" in results["3"]["message"]
+    assert results["2"]["status"] == 200
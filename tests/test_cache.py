@@ -0,0 +1,27 @@
+# tests/test_cache.py
+import pandas as pd
+
+from e10_cache import LRUCache, frame_nbytes
+
+
+def test_frame_nbytes_estimates_object_columns():
+    df = pd.DataFrame({"n": range(1000), "o": pd.Series([{"k": "v" * 20}] * 1000, dtype=object)})
+    shallow = int(df.memory_usage(index=True, deep=False).sum())
+    est = frame_nbytes(df)
+    assert shallow < est <= 2 * int(df.memory_usage(index=True, deep=True).sum())
+
+
+def test_frame_nbytes_skips_shared_frames():
+    base = pd.DataFrame({"n": range(1000)})
+    filt = base[base["n"] < 10]
+    view = (base, filt, [])
+    assert frame_nbytes(view, shared=(base,)) == frame_nbytes(filt) + 64
+    assert frame_nbytes(view) > frame_nbytes(view, shared=(base,))
+
+
+def test_lru_evicts_by_bytes():
+    cache = LRUCache(max_items=10, max_bytes=100, sizeof=len)
+    cache.put("a", b"x" * 60)
+    cache.put("b", b"y" * 60)
+    assert cache.get("a") is None
+    assert cache.get("b") == b"y" * 60
@@ -0,0 +1,56 @@
+# tests/test_catalog.py
+import uuid
+
+import duckdb
+import pandas as pd
+
+from e10_catalog import (
+    build_catalog, delete_column_set, load_column_sets, profile_table, save_column_set, search_catalog,
+    top_values, update_catalog,
+)
+
+
+def test_catalog_lists_loaded_and_lazy_columns():
+    df = pd.DataFrame({"id": ["1", "2"], "profile.customID": ["a", None]})
+    catalog = build_catalog(df, {"id": ("id",), "profile.customID": ("profile", "customID"), "p.q.r": ("p", "q", "r")})
+    rows = catalog.set_index("column")
+    assert list(catalog["column"]) == ["id", "profile.customID", "p.q.r"]
+    assert rows.loc["profile.customID", ["group", "depth", "null_ratio", "distinct"]].tolist() == ["profile", 2, 0.5, 1]
+    assert rows.loc["p.q.r", "dtype"] == "lazy"
+
+    updated = update_catalog(catalog, pd.DataFrame({"p.q.r": [1, 1]}))
+    assert list(updated["column"]) == list(catalog["column"])
+    assert updated.set_index("column").loc["p.q.r", "dtype"] == "int64"
+
+
+def test_search_puts_prefix_matches_first():
+    catalog = build_catalog(pd.DataFrame(columns=["name", "profile.name", "nameSuffix", "id"]))
+    assert search_catalog(catalog, "NAME")["column"].tolist() == ["name", "nameSuffix", "profile.name"]
+    assert len(search_catalog(catalog, "")) == 4
+    assert search_catalog(catalog, "zzz").empty
+
+
+def test_column_sets_are_per_client_and_endpoint():
+    client = f"club-{uuid.uuid4().hex[:6]}"
+    save_column_set(client, "api/entity/", "basic", ["id", "name"])
+    save_column_set(client, "api/template/", "other", ["x"])
+    assert load_column_sets(client.upper(), "/api/entity") == {"basic": ["id", "name"]}
+    delete_column_set(client, "api/entity/", "basic")
+    assert load_column_sets(client, "api/entity/") == {}
+    assert load_column_sets(client, "api/template/") == {"other": ["x"]}
+
+
+def test_profile_and_top_values():
+    con = duckdb.connect()
+    con.register("api_data", pd.DataFrame({
+        "name": ["a", " ", None, "abc"],
+        "n": [1, 5, 5, None],
+        "tags": [[1], None, [2, 3], []],
+    }))
+    prof = profile_table(con).set_index("column")
+    assert prof.loc["name", ["rows", "nulls", "blank", "len_min", "len_max"]].tolist() == [4, 1, 1, 1, 3]
+    assert prof.loc["n", ["nulls", "min", "max", "distinct"]].tolist() == [1, "1.0", "5.0", 2]
+    assert prof.loc["tags", "nulls"] == 1 and pd.isna(prof.loc["tags", "distinct"])
+
+    top = top_values(con, "n", k=2)
+    assert top.values.tolist() == [["5.0", 2], ["1.0", 1]]
@@ -0,0 +1,51 @@
+# tests/test_console.py
+import csv
+
+import pandas as pd
+import pytest
+
+import e10_store
+from e10_console import check_read_only, console_connection, export_csv, run_query
+
+
+@pytest.mark.parametrize("sql", [
+    "DROP TABLE api_data",
+    "INSERT INTO api_data VALUES (1)",
+    "COPY api_data TO 'x.csv'",
+    "SELECT 1; SELECT 2",
+])
+def test_check_read_only_refuses_non_reads(sql):
+    with pytest.raises(ValueError):
+        check_read_only(sql)
+
+
+def test_check_read_only_normalizes_select():
+    assert check_read_only("  SELECT *\n  FROM api_data ;") == "SELECT * FROM api_data"
+
+
+def test_console_connection_has_no_file_access(tmp_path):
+    con = console_connection()
+    with pytest.raises(Exception):
+        con.execute(f"SELECT * FROM read_csv('{tmp_path / 'nope.csv'}')")
+
+
+def test_console_connection_uses_duck_config(monkeypatch):
+    monkeypatch.setattr(e10_store, "DUCKDB_MEMORY_LIMIT", "512MB")
+    con = console_connection()
+    limit, = con.execute("SELECT current_setting('memory_limit')").fetchone()
+    assert limit.startswith("488.2")  # 512 MB in MiB
+    with pytest.raises(Exception):
+        con.execute("SET memory_limit = '64GB'")
+
+
+def test_run_query_truncates_and_export_writes_everything(tmp_path):
+    con = console_connection()
+    con.register("api_data", pd.DataFrame({"id": range(120), "name": [f"n{i}" for i in range(120)]}))
+    df, truncated, _ = run_query(con, "SELECT * FROM api_data ORDER BY id", limit=50)
+    assert len(df) == 50 and truncated
+
+    path = str(tmp_path / "out.csv")
+    assert export_csv(con, "SELECT * FROM api_data ORDER BY id", path, chunk_rows=7) == 120
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["id", "name"] and len(rows) == 121 and rows[-1] == ["119", "n119"]
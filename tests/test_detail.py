@@ -0,0 +1,82 @@
+# tests/test_detail.py
+import json
+
+import pandas as pd
+import pytest
+import requests
+
+import e10_detail
+from e10_cache import LRUCache
+from e10_detail import cached_detail, detail_frame, fetch_details, merge_details, remember_detail
+
+SITE = "https://club.example"
+AUTH = requests.auth.HTTPBasicAuth("u", "p")
+
+
+class FakeResponse:
+    def __init__(self, status: int, body):
+        self.status_code, self.ok = status, status < 400
+        self.content = json.dumps(body).encode() if not isinstance(body, bytes) else body
+        self.text = self.content.decode()
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    """Stubbed send(): id "bad" answers 500, "boom" drops the connection, others their record."""
+    monkeypatch.setattr(e10_detail, "_cache", LRUCache(max_items=100, sizeof=lambda value: 0))
+    calls = []
+
+    def fake_send(method, url, **kwargs):
+        sid = url.rsplit("/", 1)[1]
+        calls.append(sid)
+        if sid == "boom":
+            raise requests.ConnectionError("reset")
+        if sid == "bad":
+            return FakeResponse(500, {"message": "oops"})
+        return FakeResponse(200, {"id": sid, "position": f"P{sid}", "tags": ["a"]})
+
+    monkeypatch.setattr(e10_detail, "send", fake_send)
+    return calls
+
+
+def test_partial_failures_are_per_row(transport):
+    results = {r["id"]: r for r in fetch_details(SITE, AUTH, ["1", "bad", "boom", "2", "1"])}
+    assert sorted(results) == ["1", "2", "bad", "boom"]
+    assert results["1"]["result"] == results["2"]["result"] == "fetched"
+    assert results["bad"]["result"] == "failed" and results["bad"]["status"] == 500
+    assert results["boom"]["result"] == "failed" and "reset" in results["boom"]["message"]
+    assert sorted(transport) == ["1", "2", "bad", "boom"]
+
+
+def test_cached_details_skip_the_request(transport):
+    fetch_details(SITE, AUTH, ["1"])
+    results = fetch_details(SITE, AUTH, ["1", "2"])
+    assert {r["id"]: r["result"] for r in results} == {"1": "cached", "2": "fetched"}
+    assert transport == ["1", "2"]
+    # Cached per user
+    assert cached_detail(SITE, requests.auth.HTTPBasicAuth("other", "p"), "1") is None
+
+
+def test_expired_details_are_fetched_again(transport):
+    remember_detail(SITE, AUTH, {"id": "1", "position": "old"}, ttl=-1)
+    assert cached_detail(SITE, AUTH, "1") is None
+    [row] = fetch_details(SITE, AUTH, ["1"], ttl=60)
+    assert row["result"] == "fetched" and transport == ["1"]
+    assert cached_detail(SITE, AUTH, "1")["position"] == "P1"
+
+
+def test_merge_aligns_on_id():
+    df = pd.DataFrame({"id": [3, 1, 2], "name": ["c", "a", "b"], "position": ["own", "stale", None]})
+    details = detail_frame([
+        {"id": 2, "position": "DF", "tags": ["x"], "profile": {"customID": "c2"}},
+        {"id": 1, "position": "GK", "profile": {"customID": "c1"}},
+        {"id": 2, "position": "MF", "profile": {"customID": "c2b"}},
+    ], "id", skip=["name"])
+    assert "tags" not in details.columns
+
+    out = merge_details(df, details)
+    assert out["id"].tolist() == [3, 1, 2]
+    # Detail values win; rows without a detail keep what they had
+    assert out["position"].tolist() == ["own", "GK", "MF"]
+    assert out["profile.customID"].tolist()[1:] == ["c1", "c2b"]
+    assert pd.isna(out["profile.customID"].iloc[0])
@@ -0,0 +1,54 @@
+# tests/test_governor.py
+import os
+import threading
+
+import pandas as pd
+
+from e10_cache import LRUCache
+from e10_governor import SessionGovernor, spill_path
+
+
+def session_state() -> dict:
+    return {"df": pd.DataFrame({"id": range(100)}), "view_cache": LRUCache(max_items=4), "source": {"site": "s"}}
+
+
+def touch_from(gov: SessionGovernor, sid: str, state: dict, hold: threading.Event | None = None):
+    """touch() from a thread that stands in for the session's script run."""
+    def script():
+        gov.touch(sid, state, version=1)
+        if hold:
+            hold.wait()
+    t = threading.Thread(target=script)
+    t.start()
+    if hold is None:
+        t.join()
+    return t
+
+
+def test_running_script_is_not_evicted():
+    gov = SessionGovernor(idle_seconds=0)
+    state = session_state()
+    hold = threading.Event()
+    script = touch_from(gov, "running", state, hold)
+
+    assert gov.evict("running", "idle") is False
+    assert "df" in state
+
+    hold.set()
+    script.join()
+    assert gov.evict("running", "idle") is True
+    assert "df" not in state and "view_cache" not in state
+    assert state["evicted"]["reason"] == "idle"
+    os.remove(spill_path("running"))
+
+
+def test_sweep_unregisters_disconnected_sessions():
+    connected = {"a"}
+    gov = SessionGovernor(idle_seconds=3600, is_active=lambda sid: sid in connected)
+    touch_from(gov, "a", session_state())
+    touch_from(gov, "b", session_state())
+    assert gov.stats()["sessions"] == 2
+
+    gov.sweep()
+    assert gov.stats()["sessions"] == 1
+    assert gov.evict("b", "idle") is False
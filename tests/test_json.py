@@ -0,0 +1,42 @@
+# tests/test_json.py
+import json
+import math
+
+import pytest
+
+import e10_json
+from e10_json import dumps, dumps_bytes, loads
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def codec(request, monkeypatch):
+    if request.param == "orjson" and e10_json.orjson is None:
+        pytest.skip("orjson not installed")
+    monkeypatch.setattr(e10_json, "CODEC", request.param)
+    return request.param
+
+
+def test_big_int_dumps_exactly(codec):
+    assert json.loads(dumps({"a": 2 ** 70})) == {"a": 2 ** 70}
+
+
+def test_big_int_dumps_with_indent(codec):
+    assert json.loads(dumps_bytes([2 ** 70, "é"], indent=True)) == [2 ** 70, "é"]
+
+
+def test_nan_is_null(codec):
+    assert loads(dumps({"x": math.nan, "y": [math.inf]})) == {"x": None, "y": [None]}
+
+
+def test_nan_literal_parses(codec):
+    assert math.isnan(loads(b'{"x": NaN}')["x"])
+
+
+def test_stdlib_keeps_big_ints_exact(monkeypatch):
+    monkeypatch.setattr(e10_json, "CODEC", "stdlib")
+    assert loads(b'{"id": 1180591620717411303424}') == {"id": 2 ** 70}
+
+
+def test_unserializable_still_raises(codec):
+    with pytest.raises(TypeError):
+        dumps({"a": object()})
@@ -0,0 +1,56 @@
+# tests/test_normalize.py
+import sys
+
+import pandas as pd
+import pytest
+
+import e10_normalize
+from e10_normalize import normalize_chunk, normalize_records, union_concat
+
+
+def _records(n: int) -> list[dict]:
+    out = []
+    for i in range(n):
+        rec = {"id": str(i), "firstName": f"F{i}", "lastName": f"L{i}", "profile": {"team": None, "score": None}}
+        if i >= n // 2:
+            # Only the second half carries values, so early chunks see all-None columns
+            rec["profile"] = {"team": f"T{i % 3}", "score": i / 2}
+            rec["rank"] = i
+        out.append(rec)
+    return out
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(e10_normalize, "PARALLEL_MIN_RECORDS", 10)
+    monkeypatch.setattr(e10_normalize, "MIN_CHUNK", 10)
+    yield
+    e10_normalize._drop_pool()
+
+
+def test_union_concat_matches_serial_dtypes():
+    records = _records(40)
+    serial = normalize_chunk(records)
+    chunked = union_concat([normalize_chunk(records[i:i + 10]) for i in range(0, 40, 10)])
+    pd.testing.assert_frame_equal(chunked, serial)
+
+
+def test_parallel_matches_serial(small_chunks):
+    records = _records(80)
+    pd.testing.assert_frame_equal(normalize_records(records, workers=2), normalize_chunk(records))
+
+
+def test_parallel_leaves_main_module_alone(small_chunks):
+    main = sys.modules["__main__"]
+    normalize_records(_records(40), workers=2)
+    assert sys.modules["__main__"] is main
+
+
+def test_dead_worker_falls_back_to_serial(small_chunks):
+    records = _records(40)
+    normalize_records(records, workers=2)
+    for w in e10_normalize._workers:
+        w.proc.kill()
+        w.proc.wait()
+    pd.testing.assert_frame_equal(normalize_records(records, workers=2), normalize_chunk(records))
+    assert e10_normalize._idle is None
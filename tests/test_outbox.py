@@ -0,0 +1,128 @@
+# tests/test_outbox.py
+import logging
+import time
+import uuid
+
+import requests
+
+import e10_outbox
+from e10_outbox import (
+    OutboxWorker, _claim, _update, baseline_for, deliver, enqueue_create, find_created, get_write, host_of,
+    release_stale, set_credentials,
+)
+
+AUTH = requests.auth.HTTPBasicAuth("u", "p")
+
+
+def _payload() -> dict:
+    # A name no seeded subject has, so every match comes from the test itself
+    return {"firstName": f"T{uuid.uuid4().hex[:8]}", "lastName": "Outbox", "dateOfBirth": "2001-01-01T00:00:00"}
+
+
+def test_deliver_creates_once(mock_site):
+    payload = _payload()
+    key = enqueue_create(mock_site, "u", payload, baseline=baseline_for(mock_site, AUTH, payload))
+    row = deliver(key, "p")
+    assert row["status"] == "done" and row["attempts"] == 1
+    assert deliver(key, "p")["status"] == "done"
+    assert [m["id"] for m in find_created(mock_site, AUTH, payload)] == [row["result_id"]]
+
+
+def test_ambiguous_create_is_reconciled_not_resent(make_site):
+    site = make_site(flaky_creates=1)
+    payload = _payload()
+    baseline = baseline_for(site, AUTH, payload)
+    assert baseline == []
+    key = enqueue_create(site, "u", payload, baseline=baseline)
+
+    row = deliver(key, "p")
+    assert (row["status"], row["ambiguous"], row["attempts"]) == ("pending", 1, 1)
+
+    row = deliver(key, "p")
+    assert row["status"] == "done"
+    assert row["last_error"].startswith("reconciled")
+    assert [m["id"] for m in find_created(site, AUTH, payload)] == [row["result_id"]]
+
+
+def test_deliver_takes_baseline_before_first_send(make_site):
+    site = make_site(flaky_creates=1)
+    payload = _payload()
+    key = enqueue_create(site, "u", payload)
+
+    row = deliver(key, "p")
+    assert (row["status"], row["baseline"], row["ambiguous"]) == ("pending", [], 1)
+    row = deliver(key, "p")
+    assert row["status"] == "done" and row["last_error"].startswith("reconciled")
+    assert len(find_created(site, AUTH, payload)) == 1
+
+
+def test_ambiguous_without_baseline_is_held_for_review(mock_site):
+    payload = _payload()
+    deliver(enqueue_create(mock_site, "u", payload, baseline=[]), "p")
+    # Interrupted mid-send with nothing known beforehand
+    key = enqueue_create(mock_site, "u", payload)
+    _claim(key)
+    release_stale(lease=-1)
+    row = deliver(key, "p")
+    assert row["status"] == "review"
+    assert len(find_created(mock_site, AUTH, payload)) == 1
+
+
+def test_unconfirmed_login_keeps_stored_credentials(mock_site):
+    set_credentials(mock_site, "cred-user", "good")
+    set_credentials(mock_site, "cred-user", "typo", replace=False)
+    assert e10_outbox._credentials[(host_of(mock_site), "cred-user")] == "good"
+    set_credentials(mock_site, "cred-user", "new")
+    assert e10_outbox._credentials[(host_of(mock_site), "cred-user")] == "new"
+
+
+def test_baseline_match_does_not_complete_a_new_write(mock_site):
+    payload = _payload()
+    first = deliver(enqueue_create(mock_site, "u", payload, baseline=[]), "p")
+    baseline = baseline_for(mock_site, AUTH, payload)
+    assert baseline == [first["result_id"]]
+
+    key = enqueue_create(mock_site, "u", payload, baseline=baseline)
+    _update(key, ambiguous=1)
+    row = deliver(key, "p")
+    assert row["status"] == "done" and row["result_id"] != first["result_id"]
+    assert len(find_created(mock_site, AUTH, payload)) == 2
+
+
+def test_baseline_unknown_when_roster_unreadable(mock_site):
+    assert baseline_for(mock_site, requests.auth.HTTPBasicAuth("u", "wrong"), _payload()) is None
+
+
+def test_release_stale_flags_for_reconcile(mock_site):
+    key = enqueue_create(mock_site, "u", _payload(), baseline=[])
+    assert _claim(key)["status"] == "sending"
+    release_stale()
+    assert get_write(key)["status"] == "sending"
+    release_stale(lease=-1)
+    row = get_write(key)
+    assert (row["status"], row["ambiguous"]) == ("pending", 1)
+    assert deliver(key, "p")["status"] == "done"
+
+
+def test_unexpected_error_is_rescheduled(mock_site, monkeypatch):
+    def boom(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(e10_outbox, "send", boom)
+    key = enqueue_create(mock_site, "u", _payload(), baseline=[])
+    row = deliver(key, "p")
+    assert (row["status"], row["ambiguous"], row["attempts"]) == ("pending", 1, 1)
+    assert "RuntimeError: boom" in row["last_error"]
+
+
+def test_worker_logs_failed_pass(caplog):
+    worker = OutboxWorker(poll_seconds=3600)
+    worker.run_once = lambda: 1 / 0
+    with caplog.at_level(logging.ERROR, logger="e10_outbox"):
+        worker.start()
+        worker.wake()
+        deadline = time.monotonic() + 5
+        while not caplog.records and time.monotonic() < deadline:
+            time.sleep(0.01)
+    assert "outbox worker pass failed" in caplog.records[0].getMessage()
+    assert caplog.records[0].exc_info[0] is ZeroDivisionError
@@ -0,0 +1,58 @@
+# tests/test_resilience.py
+import socket
+
+import pytest
+import requests
+
+import e10_resilience
+from e10_resilience import CircuitOpenError, _backoff, host_state, send
+
+AUTH = requests.auth.HTTPBasicAuth("u", "p")
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff sleeps instead of waiting them out."""
+    waits = []
+    monkeypatch.setattr(e10_resilience.time, "sleep", waits.append)
+    return waits
+
+
+def closed_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_post_is_not_retried_after_the_server_saw_it(make_site, sleeps):
+    site = make_site(flaky_creates=1)
+    r = send("POST", f"{site}/api/entity/subject", auth=AUTH, json={"firstName": "A"})
+    assert r.status_code == 502
+    assert sleeps == []
+    assert send("POST", f"{site}/api/entity/subject", auth=AUTH, json={"firstName": "B"}).status_code == 200
+
+
+def test_idempotent_request_retries_5xx(make_site, sleeps):
+    site = make_site(flaky_creates=2)
+    r = send("POST", f"{site}/api/entity/subject", idempotent=True, auth=AUTH, json={"firstName": "A"})
+    assert r.status_code == 200
+    assert len(sleeps) == 2
+
+
+def test_connect_failures_retry_then_open_the_breaker(monkeypatch, sleeps):
+    monkeypatch.setattr(e10_resilience, "BREAKER_THRESHOLD", 3)
+    url = f"http://127.0.0.1:{closed_port()}/api/entity/subject"
+    # Never sent, so even a POST is retried
+    with pytest.raises(requests.ConnectionError):
+        send("POST", url, retries=2, timeout=2)
+    assert len(sleeps) == 2
+    assert host_state(url.split("/")[2])[1].state == "open"
+    with pytest.raises(CircuitOpenError):
+        send("GET", url, timeout=2)
+    assert len(sleeps) == 2
+
+
+def test_backoff_is_jittered_and_capped(monkeypatch):
+    monkeypatch.setattr(e10_resilience, "BACKOFF_CAP", 4.0)
+    assert all(0 <= _backoff(1) <= 2 * e10_resilience.BACKOFF_BASE for _ in range(50))
+    assert max(_backoff(20) for _ in range(50)) <= 4.0
@@ -0,0 +1,52 @@
+# tests/test_schema.py
+import threading
+
+import pandas as pd
+
+from e10_schema import apply_schema, ingest, load_schema, register_schema
+from e10_store import load_snapshot, save_snapshot
+
+
+def test_full_fetch_registers_but_skips_all_null_columns():
+    df = pd.DataFrame({"id": ["1", "2"], "dob": ["2001-02-03", None], "empty": [None, None]})
+    out, _ = ingest(df, "api/full")
+    assert load_schema("api/full") == {"dob": "datetime", "id": "string"}
+    assert pd.api.types.is_datetime64_any_dtype(out["dob"])
+
+
+def test_single_record_is_typed_provisionally():
+    one = pd.DataFrame({"id": ["1"], "height": [3.0], "seen": ["2024-01-01T10:00:00Z"]})
+    out, schema = ingest(one, "api/one", register=False)
+    assert load_schema("api/one") == {}
+    assert out["height"].dtype == "float64"
+    assert pd.api.types.is_datetime64_any_dtype(out["seen"])
+    assert schema["seen"] == "datetime"
+
+
+def test_registered_types_win_over_provisional_ones():
+    register_schema("api/mixed", {"height": "float"})
+    out, _ = ingest(pd.DataFrame({"height": ["180"]}), "api/mixed", register=False)
+    assert out["height"].tolist() == [180.0]
+
+
+def test_concurrent_registrations_keep_every_column():
+    threads = [threading.Thread(target=register_schema, args=("api/race", {f"c{i}": "int"})) for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert set(load_schema("api/race")) == {f"c{i}" for i in range(20)}
+
+
+def test_datetime_on_reloaded_all_null_column():
+    df = pd.DataFrame({"id": ["1", "2"], "dateOfBirth": [None, None]})
+    reloaded = load_snapshot(save_snapshot(df, "schema-test", "api/entity/"))
+    out = apply_schema(reloaded, {"dateOfBirth": "datetime"})
+    assert pd.api.types.is_datetime64_any_dtype(out["dateOfBirth"])
+    assert out["dateOfBirth"].isna().all()
+
+
+def test_datetime_leaves_numeric_column_alone():
+    df = pd.DataFrame({"dateOfBirth": [20010101, 19990505]})
+    out = apply_schema(df, {"dateOfBirth": "datetime"})
+    assert out["dateOfBirth"].tolist() == [20010101, 19990505]
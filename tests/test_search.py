@@ -0,0 +1,66 @@
+# tests/test_search.py
+import pandas as pd
+import pytest
+import requests
+
+import e10_search
+from e10_search import host_key, index_people, indexed_hosts, refresh_hosts, search_people, upsert_people
+
+AUTH = requests.auth.HTTPBasicAuth("u", "p")
+
+
+@pytest.fixture(autouse=True)
+def index(tmp_path, monkeypatch):
+    """A fresh on-disk index per test."""
+    monkeypatch.setattr(e10_search, "data_path", lambda name: str(tmp_path / name))
+    monkeypatch.setattr(e10_search, "_index", None)
+
+
+def _people(*rows) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=["id", "firstName", "lastName", "dateOfBirth", "contactType"])
+
+
+def test_index_replaces_a_hosts_rows():
+    index_people(_people(("1", "Ann", "Smith", "2001-01-01", 1), ("2", "Bob", "Jones", None, 2)), "https://a.example")
+    index_people(_people(("9", "Zoe", "Smith", "1999-05-05", 1)), "b.example")
+    assert index_people(_people(("3", "Cat", "Brown", None, 1)), "A.example/") == 1
+
+    assert search_people("bob")[0].empty
+    hosts = indexed_hosts()
+    assert dict(zip(hosts["host"], hosts["rows"])) == {"a.example": 1, "b.example": 1}
+
+
+def test_upsert_replaces_one_person():
+    index_people(_people(("1", "Ann", "Smith", None, 1), ("2", "Bob", "Jones", None, 2)), "a.example")
+    assert upsert_people(_people(("1", "Anne", "Smythe", "2001-01-01", 1)), "a.example") == 1
+
+    found, _ = search_people("smythe")
+    assert found[["id", "name"]].values.tolist() == [["1", "Anne Smythe"]]
+    assert search_people("ann smith")[0].empty
+    assert len(search_people("bob")[0]) == 1
+
+
+def test_search_ranks_exact_then_prefix_matches():
+    index_people(_people(
+        ("1", "Sam", "Adamson", None, 1),
+        ("2", "Adam", "Lee", "2000-02-03", 1),
+        ("3", "Adam", "Smith", None, 2),
+        ("4", "Ada", "Madams", None, 1),
+        ("5", "Adam", "Abbott-Smith", None, 1),
+    ), "a.example")
+    found, ms = search_people("adam")
+    # Name or surname starting with the text first, then by surname; "Madams" only contains it
+    assert found["id"].tolist() == ["5", "1", "2", "3", "4"] and ms >= 0
+    # An exact full name beats an alphabetically earlier partial match
+    assert search_people("adam smith")[0]["id"].tolist() == ["3", "5"]
+    assert search_people("adam lee")[0]["id"].tolist() == ["2"]
+    assert search_people("2000-02-03")[0]["id"].tolist() == ["2"]
+    assert search_people("03/02/2000")[0]["id"].tolist() == ["2"]
+
+
+def test_refresh_hosts_indexes_each_host(mock_site):
+    indexed, errors = refresh_hosts([mock_site, "http://127.0.0.1:9"], AUTH)
+    assert indexed == {mock_site: 50}
+    assert set(errors) == {"http://127.0.0.1:9"}
+    hosts = indexed_hosts()
+    assert hosts["host"].tolist() == [host_key(mock_site)]
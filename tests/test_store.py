@@ -0,0 +1,62 @@
+# tests/test_store.py
+import os
+from contextlib import contextmanager
+
+import pandas as pd
+
+import e10_store
+from e10_store import diff_snapshots, list_snapshots, load_dataset, save_snapshot, store_dataset, stored_table
+
+
+def test_diff_snapshots_added_removed_changed(tmp_path):
+    old = pd.DataFrame({"id": ["1", "2", "3"], "name": ["a", "b", "c"], "x": [1.0, None, 3.0]})
+    new = pd.DataFrame({"id": ["1", "2", "4"], "name": ["a", "B", "d"], "x": [2.0, 5.0, 4.0]})
+    old.to_parquet(tmp_path / "old.parquet")
+    new.to_parquet(tmp_path / "new.parquet")
+
+    diff = diff_snapshots(str(tmp_path / "old.parquet"), str(tmp_path / "new.parquet"))
+
+    assert diff["added"]["id"].tolist() == ["4"]
+    assert diff["removed"]["id"].tolist() == ["3"]
+    changed = diff["changed"].fillna("<null>").values.tolist()
+    assert changed == [["1", "x", "1.0", "2.0"], ["2", "name", "b", "B"], ["2", "x", "<null>", "5.0"]]
+
+
+def test_snapshots_in_the_same_second_do_not_overwrite():
+    df = pd.DataFrame({"id": ["1"], "name": ["a"]})
+    paths = {save_snapshot(df, "client", "api/entity/") for _ in range(3)}
+    assert len(paths) == 3 and all(os.path.exists(p) for p in paths)
+    assert len(list_snapshots("client", "api/entity/")) == 3
+
+
+def test_store_dataset_shares_one_frame_per_payload(file_store):
+    first = pd.DataFrame({"id": ["1", "2"], "x": [1.0, 2.0]})
+    again = first.copy()
+
+    assert store_dataset(first, "site", "api/entity/", digest="d1") is first
+    assert store_dataset(again, "site", "api/entity/", digest="d1") is first
+    assert stored_table(first) == "ds_site__api_entity"
+    assert stored_table(again) is None
+
+    changed = pd.DataFrame({"id": ["1"], "x": [5.0]})
+    assert store_dataset(changed, "site", "api/entity/", digest="d2") is changed
+    assert stored_table(first) is None
+    assert load_dataset("site", "api/entity/")["x"].tolist() == [5.0]
+
+
+def test_engine_cursor_fetch_holds_a_slot(monkeypatch):
+    eng = e10_store.DuckEngine(max_queries=1)
+    entered = []
+    slot = eng.slot
+
+    @contextmanager
+    def counting():
+        with slot():
+            entered.append(eng.stats()["running"])
+            yield
+
+    monkeypatch.setattr(eng, "slot", counting)
+    cur = eng.session_cursor()
+    assert cur.execute("SELECT 42 AS x").fetchdf()["x"].tolist() == [42]
+    assert cur.execute("SELECT 1").fetchall() == [(1,)]
+    assert entered == [1, 1, 1, 1]
@@ -0,0 +1,106 @@
+# tests/test_tables.py
+import duckdb
+import pandas as pd
+import requests
+
+from e10_api import get_json
+from e10_tables import (
+    build_related, column_paths, entity_ids_in_groups, explode_nested, group_names_by_entity, materialize_tables,
+    records_frame, upsert_raw_records, upsert_rows,
+)
+
+
+def frame(ids, names):
+    return pd.DataFrame({"id": ids, "name": names})
+
+
+def test_upsert_rows_appends_and_keeps_labels():
+    df = frame(["1", "2"], ["a", "b"]).set_axis([10, 11])
+    out = upsert_rows(df, frame(["3"], ["c"]), "id")
+    assert out.index.tolist() == [10, 11, 2]
+    assert out["name"].tolist() == ["a", "b", "c"]
+
+
+def test_upsert_rows_replaces_and_adds_columns():
+    df = frame(["1", "2", "3"], ["a", "b", "c"])
+    new = pd.DataFrame({"id": ["2"], "name": ["B"], "extra": [1]})
+    out = upsert_rows(df, new, "id")
+    assert out["id"].tolist() == ["1", "3", "2"]
+    assert out["name"].tolist() == ["a", "c", "B"]
+    assert list(out.columns) == ["id", "name", "extra"]
+    assert out.index.tolist() == [0, 1, 2]
+
+
+def test_raw_records_follow_upsert_rows_order():
+    records = [{"id": i, "p": {"x": f"x{i}"}} for i in (1, 2, 3)]
+    paths = column_paths(records)
+    df = records_frame(records, paths, ["id"]).astype({"id": str})
+    changed = {"id": 2, "p": {"x": "new"}}
+
+    merged = upsert_rows(df, records_frame([changed], paths, ["id"]).astype({"id": str}), "id")
+    raw = upsert_raw_records(records, [changed], "id")
+
+    assert len(raw) == len(merged)
+    # A lazily materialized column lines up with the merged frame's ids
+    lazy = records_frame(raw, paths, ["p.x"]).set_index(merged.index)
+    assert dict(zip(merged["id"], lazy["p.x"])) == {"1": "x1", "2": "new", "3": "x3"}
+
+
+def test_column_paths_sample_is_bounded():
+    records = [{"id": i, "p": {"x": i}} for i in range(1000)]
+    records[7]["rare"] = {"field": 1}
+    sampled = column_paths(records, sample=100)
+    assert list(sampled) == ["id", "p.x"]
+    assert "rare.field" in column_paths(records)
+    assert column_paths(records[:50], sample=100) == column_paths(records[:50])
+
+
+def test_explode_nested_scalar_and_object_lists():
+    df = pd.DataFrame({
+        "id": [1, 2, 3],
+        "tags": [["a", "b"], [], None],
+        "items": [[{"code": "GK"}], [{"code": "CB"}, {"code": "ST"}], []],
+    })
+    out, children = explode_nested(df, "id")
+
+    assert out["tags"].tolist() == ["a, b", "", ""]
+    assert out["items"].tolist() == [1, 2, 0]
+    assert children["list_tags"].values.tolist() == [["1", 0, "a"], ["1", 1, "b"]]
+    assert children["list_items"].values.tolist() == [["1", 0, "GK"], ["2", 0, "CB"], ["2", 1, "ST"]]
+
+
+def test_explode_nested_on_mock_payload(mock_site):
+    records, _ = get_json(mock_site, "api/entity/", requests.auth.HTTPBasicAuth("u", "p"))
+    out, children = explode_nested(pd.json_normalize(records), "id")
+
+    assert set(children) == {"list_groupIds", "list_profile_positions"}
+    groups = children["list_groupIds"]
+    assert len(groups) == sum(len(r["groupIds"]) for r in records)
+    assert groups.groupby("entityId")["ordinal"].max().lt(3).all()
+    positions = children["list_profile_positions"]
+    assert list(positions.columns) == ["entityId", "ordinal", "code"]
+    assert out["profile.positions"].sum() == len(positions)
+
+
+def test_related_tables_link_entities_to_group_names():
+    entities = pd.DataFrame({"id": [1, 2, 3], "groupIds": [[10, 20], [20], []]})
+    _, children = explode_nested(entities, "id")
+    groups = pd.DataFrame({"ID": [10, 20, 30], "Name": ["Seniors", "Juniors", "Vets"]})
+    related = build_related(entities, children, groups=groups, templates=pd.DataFrame())
+
+    assert set(related) == {"list_groupIds", "groups", "entity_groups"}
+    assert related["entity_groups"].values.tolist() == [["1", "10"], ["1", "20"], ["2", "20"]]
+
+    con = duckdb.connect()
+    materialize_tables(con, related)
+    names = group_names_by_entity(con).sort_values("entityId")
+    assert names.values.tolist() == [["1", "Juniors, Seniors"], ["2", "Juniors"]]
+    assert entity_ids_in_groups(con, ["Seniors"]) == {"1"}
+    assert entity_ids_in_groups(con, ["Juniors", "Vets"]) == {"1", "2"}
+    assert entity_ids_in_groups(con, []) == set()
+
+
+def test_related_tables_without_groups_keep_children_only():
+    entities = pd.DataFrame({"id": [1], "tags": [["a"]]})
+    _, children = explode_nested(entities, "id")
+    assert set(build_related(entities, children)) == {"list_tags"}
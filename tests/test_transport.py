@@ -0,0 +1,30 @@
+# tests/test_transport.py
+import pytest
+import requests
+
+from e10_api import ResponseTooLarge, build_url, get_raw, transfer_summary
+from e10_json import loads
+
+AUTH = requests.auth.HTTPBasicAuth("u", "p")
+
+
+def test_get_raw_decodes_gzip(mock_site):
+    r, body, stats = get_raw(build_url(mock_site, "api/entity/"), AUTH)
+    assert r.status_code == 200
+    assert stats["encoding"] == "gzip"
+    assert stats["decoded_bytes"] == len(body) > stats["wire_bytes"]
+    assert len(loads(body)) == 50
+
+
+def test_get_raw_caps_decoded_size(mock_site):
+    _, body, _ = get_raw(build_url(mock_site, "api/entity/"), AUTH)
+    with pytest.raises(ResponseTooLarge):
+        get_raw(build_url(mock_site, "api/entity/"), AUTH, max_bytes=len(body) // 4)
+    assert get_raw(build_url(mock_site, "api/entity/"), AUTH, max_bytes=len(body))[1] == body
+
+
+def test_transfer_summary_uses_given_log(mock_site):
+    assert transfer_summary([]).empty
+    stats = [get_raw(build_url(mock_site, "api/entity/"), AUTH)[2] for _ in range(2)]
+    out = transfer_summary(stats)
+    assert out["requests"].tolist() == [2]
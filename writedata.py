@@ -1,8 +1,8 @@
 # writedata.py
-import json
 import datetime as dt
-import requests
-from requests.auth import HTTPBasicAuth
+
+from e10_json import dumps
+from e10_outbox import TERMINAL, drain, enqueue_create, list_writes, release_stale
 
 # ---------- Basic config (edit if needed) ----------
 SITE_SLUG = "newcastleunited7703"          # e.g. "northamptontownfc"
@@ -12,9 +12,6 @@ BASE_URL = f"https://{SITE_SLUG}.{SITE_DOMAIN}"
 USERNAME = "edge10"
 PASSWORD = "loRWROgw0XtgMnnit0g6o2s2NKWIWJm6yYJIzpLCT0dyVvpvY7Sb5FPFA1QzuWN"
 
-AUTH = HTTPBasicAuth(USERNAME, PASSWORD)
-HEADERS = {"Accept": "application/json", "Content-Type": "application/json"}
-
 VALID_TITLES = {"mr", "mrs", "ms", "miss", "dr", "prof", "mx"}
 TITLE_CASE = {"mr": "Mr", "mrs": "Mrs", "ms": "Ms", "miss": "Miss", "dr": "Dr", "prof": "Prof", "mx": "Mx"}
 
@@ -57,7 +54,29 @@ def prompt(msg: str, default: str | None = None) -> str:
     return val if val else (default or "")
 
 
+def show_progress(row: dict):
+    if row["status"] == "done":
+        print(f"  {row['key'][:8]}: created {row['result_id']}" + (f" ({row['last_error']})" if row["last_error"] else ""))
+    else:
+        print(f"  {row['key'][:8]}: {row['status']} after {row['attempts']} attempt(s): {row['last_error']}")
+
+
+def replay_leftovers():
+    """Offer to send creates queued by an earlier run that never finished."""
+    release_stale()
+    left = [r for r in list_writes(BASE_URL, USERNAME) if r["status"] not in TERMINAL]
+    if not left:
+        return
+    print(f"\n{len(left)} unsent create(s) from earlier runs:")
+    for r in left:
+        print(f"  {r['key'][:8]}  {r['payload'].get('firstName')} {r['payload'].get('lastName')}  ({r['last_error'] or 'not sent'})")
+    if prompt("Send them now? (y/n)", "y").lower().startswith("y"):
+        drain([r["key"] for r in left], PASSWORD, on_update=show_progress)
+
+
 def main():
+    replay_leftovers()
+
     print("\n=== Create Player (Subject) ===")
 
     # Minimal prompts to test write
@@ -95,43 +114,26 @@ def main():
 
     payload = clean(payload)  # drop empty or None fields (avoids title validation)
 
-    url = f"{BASE_URL}/api/entity/subject"
-
     print("\nSubmitting payload:")
-    print(json.dumps(payload, indent=2))
+    print(dumps(payload, indent=True))
 
+    # Recorded before sending: a failure or timeout leaves it queued for the next run
+    key = enqueue_create(BASE_URL, USERNAME, payload)
+    print(f"\nQueued as {key} (Idempotency-Key)")
     try:
-        resp = requests.post(url, auth=AUTH, headers=HEADERS, json=payload, timeout=45)
-    except requests.RequestException as e:
-        print("\nRequest failed:", e)
+        [row] = drain([key], PASSWORD, on_update=show_progress)
+    except KeyboardInterrupt:
+        print("\nInterrupted; the create stays queued and is offered again on the next run.")
         return
 
-    print("\nStatus:", resp.status_code)
-    if not resp.ok:
-        # Try to show API error details if JSON
-        try:
-            print(json.dumps(resp.json(), indent=2))
-        except Exception:
-            print(resp.text)
+    if row["status"] != "done":
+        print(f"\nNot created ({row['status']}): {row['last_error']}")
+        if row["status"] == "review":
+            print("Check the site for this subject; it may have been created by an earlier attempt.")
         return
 
-    created = resp.json()
-    print("\n✅ Created subject id:", created.get("id"))
-    print(json.dumps(created, indent=2))
-
-    # Optional read-back to confirm
-    sid = created.get("id")
-    if sid:
-        read_url = f"{BASE_URL}/api/entity/subject/{sid}"
-        try:
-            r = requests.get(read_url, auth=AUTH, headers={"Accept": "application/json"}, timeout=30)
-            print("\nRead-back status:", r.status_code)
-            if r.ok:
-                print(json.dumps(r.json(), indent=2))
-            else:
-                print(r.text)
-        except requests.RequestException as e:
-            print("\nRead-back failed:", e)
+    print("\n✅ Created subject id:", row["result_id"])
+    print(dumps(row["response"], indent=True))
 
 
 if __name__ == "__main__":